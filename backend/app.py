@@ -14,7 +14,11 @@ from pydantic import BaseModel
 from auth import get_current_user
 from fastapi import Depends
 from db import get_supabase
-from routers import inventory, employees, schedule, money, reminders, dashboard, permissions_admin, employee_invites
+from routers import inventory, employees, schedule, money, reminders, dashboard, permissions_admin, employee_invites, notifications, metrics
+from services.email_outbox import email_outbox
+from services.low_stock_digest import low_stock_digest
+from services.low_stock_sweep import low_stock_sweep
+from services.schedule_jobs import schedule_jobs
 
 load_dotenv()
 
@@ -42,6 +46,23 @@ app.include_router(money.router)
 app.include_router(reminders.router)
 app.include_router(dashboard.router)
 app.include_router(permissions_admin.router)
+app.include_router(notifications.router)
+app.include_router(metrics.router)
+
+@app.on_event("startup")
+async def start_background_workers():
+    """Start in-process workers (email outbox delivery, low stock digests, nightly sweep)"""
+    email_outbox.start()
+    low_stock_digest.start()
+    low_stock_sweep.start()
+
+@app.on_event("shutdown")
+async def stop_background_workers():
+    """Stop background work; workers finish their current batch"""
+    schedule_jobs.stop()
+    low_stock_sweep.stop()
+    low_stock_digest.stop()
+    email_outbox.stop()
 
 @app.get("/")
 async def root():
@@ -0,0 +1,46 @@
+"""Benchmark hours balancing: weekly hours spread before and after balance_hours, by team size"""
+import argparse
+import random
+import time
+from benchmark_prompt_size import STORE_HOURS, make_team
+from services.fairness_engine import balance_hours, fairness_metrics
+from services.schedule_engine import solve_schedule, validate_schedule
+
+# Uneven slot lengths (2h / 4h / 6h), so equal shift counts are not equal hours
+SLOT_TIMES = {"Open": ("09:00:00", "13:00:00"), "Mid": ("13:00:00", "15:00:00"), "Close": ("15:00:00", "21:00:00")}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+
+    print("=" * 72)
+    print("HOURS BALANCING")
+    print("=" * 72)
+    print(f"{'team':>6} {'shifts':>7} {'best ms':>8} {'valid':>6} {'variance before':>16} {'after':>7} {'gini before':>12} {'after':>6}")
+    for size in (10, 50, 200, 500):
+        employees, shift_slots, staffing_rules, _ = make_team(size, rng)
+        for slot in shift_slots:
+            slot["start_time"], slot["end_time"] = SLOT_TIMES[slot["slot_name"]]
+        # Uneven availability gives the solver's count balancing something to miss
+        for emp in employees:
+            emp["availability"] = rng.sample(emp["availability"], max(1, len(emp["availability"]) - rng.randint(0, 3)))
+
+        shifts = solve_schedule(staffing_rules, employees, STORE_HOURS, shift_slots)
+        timings = []
+        for _ in range(args.runs):
+            start = time.perf_counter()
+            balanced = balance_hours(shifts, employees)
+            timings.append((time.perf_counter() - start) * 1000)
+
+        before = fairness_metrics(shifts, employees)["summary"]
+        after = fairness_metrics(balanced, employees)["summary"]
+        print(
+            f"{size:>6} {len(shifts):>7} {min(timings):>8.1f} {validate_schedule(balanced, employees, STORE_HOURS, shift_slots)['valid']!s:>6}"
+            f" {before['variance']:>16.2f} {after['variance']:>7.2f} {before['gini']:>12.3f} {after['gini']:>6.3f}"
+        )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+"""
+Benchmark LLM JSON extraction: parse time and success rate on a response corpus
+The bundled corpus (benchmark_data/llm_responses.json) is hand-written to cover known response
+shapes; it is not captured model output. To measure real completions, run the backend with
+LLM_RECORD_FILE=completions.jsonl and pass that file with --recorded.
+Answers are decoded through the same prompt_builder prompts the backend sends; a response
+succeeds when the rows it keeps (malformed or unknown rows are skipped) match expected_count.
+"""
+import argparse
+import json
+import os
+import time
+from services.json_extract import extract_json
+from services.prompt_builder import (
+    DAYS,
+    INVENTORY_EXAMPLE,
+    SCHEDULE_EXAMPLE,
+    build_inventory_prompt,
+    build_schedule_prompt
+)
+
+ANSWER_KEYS = {"orders": "orders", "schedule": "shifts"}
+CORPUS_PATH = os.path.join(os.path.dirname(__file__), "benchmark_data", "llm_responses.json")
+
+def legacy_extract_orders(response: str):
+    """Previous generate_inventory_orders parser: brace scan restarted at every '{'"""
+    response_text = response.strip()
+    if "```json" in response_text:
+        response_text = response_text.split("```json")[1].split("```")[0].strip()
+    elif "```" in response_text:
+        response_text = response_text.split("```")[1].split("```")[0].strip()
+
+    all_json_objects = []
+    i = 0
+    while i < len(response_text):
+        if response_text[i] == '{':
+            start = i
+            brace_count = 0
+            end = start
+            for j in range(start, len(response_text)):
+                if response_text[j] == '{':
+                    brace_count += 1
+                elif response_text[j] == '}':
+                    brace_count -= 1
+                    if brace_count == 0:
+                        end = j + 1
+                        break
+            try:
+                all_json_objects.append(json.loads(response_text[start:end]))
+            except json.JSONDecodeError:
+                pass
+            i = end if end > start else i + 1
+        else:
+            i += 1
+
+    valid = [obj for obj in all_json_objects if 'orders' in obj]
+    for obj in valid:
+        if len(obj['orders']) > 0:
+            return obj
+    return valid[-1] if valid else None
+
+def legacy_extract_shifts(response: str):
+    """Previous generate_schedule parser: strip fences, json.loads the rest"""
+    response_text = response.strip()
+    if "```json" in response_text:
+        response_text = response_text.split("```json")[1].split("```")[0].strip()
+    elif "```" in response_text:
+        response_text = response_text.split("```")[1].split("```")[0].strip()
+    try:
+        return json.loads(response_text)
+    except json.JSONDecodeError:
+        return None
+
+def build_prompts(item_ids, employee_ids):
+    """The prompts the corpus answers: decode and the echoed example come from these"""
+    items = [{"id": item_id, "current": 0, "min": 1} for item_id in item_ids]
+    employees = [{"id": emp_id, "full_name": f"Employee {i}", "availability": DAYS} for i, emp_id in enumerate(employee_ids, start=1)]
+    staffing_rules = [{"day": day, "required": len(employees)} for day in DAYS]
+    return {
+        "orders": build_inventory_prompt(items),
+        "schedule": build_schedule_prompt("2024-01-01", staffing_rules, employees)
+    }
+
+def new_extract(entry, prompts):
+    """Same call as generate_inventory_orders/generate_schedule: decoded rows, or None"""
+    built = prompts[entry["operation"]]
+    result = extract_json(
+        entry["response"],
+        required_keys=(ANSWER_KEYS[entry["operation"]],),
+        validate=lambda obj: built.decode(obj) is not None,
+        ignore=[built.example]
+    )
+    return built.decode(result) if result else None
+
+def legacy_extract(entry, prompts):
+    """Raw rows as the old parsers returned them - they never checked a row"""
+    if entry["operation"] == "orders":
+        result = legacy_extract_orders(entry["response"])
+    else:
+        result = legacy_extract_shifts(entry["response"])
+    rows = result.get(ANSWER_KEYS[entry["operation"]]) if isinstance(result, dict) else None
+    return rows if isinstance(rows, list) else None
+
+def is_success(entry, result) -> bool:
+    return len(result or []) == entry["expected_count"]
+
+def run(name, extractor, corpus, prompts, repeat):
+    successes, total_time = 0, 0.0
+    print(f"\n{name}")
+    for entry in corpus:
+        start = time.perf_counter()
+        for _ in range(repeat):
+            result = extractor(entry, prompts)
+        elapsed = (time.perf_counter() - start) / repeat
+        total_time += elapsed
+        ok = is_success(entry, result)
+        successes += ok
+        print(f"  {'✅' if ok else '❌'} {entry['name']:<32} {elapsed * 1000:8.3f}ms")
+    print(f"  Success: {successes}/{len(corpus)}  Total parse time: {total_time * 1000:.2f}ms")
+
+def scaling(repeat):
+    """Prose full of '{' before the answer: legacy cost grows quadratically"""
+    print("\nScaling (prose with N unmatched '{' before the answer)")
+    answer = json.dumps({"orders": [[1, 5]]})
+    prompts = build_prompts([1], [])
+    for n in (250, 1000, 4000):
+        text = "{ considering item " * n + "\n" + answer
+        entry = {"operation": "orders", "response": text}
+        timings = []
+        for extractor in (legacy_extract, new_extract):
+            start = time.perf_counter()
+            for _ in range(repeat):
+                extractor(entry, prompts)
+            timings.append((time.perf_counter() - start) / repeat * 1000)
+        print(f"  N={n:<6} legacy {timings[0]:9.2f}ms   single-pass {timings[1]:7.2f}ms")
+
+class _AnyRows:
+    """Recorded completions come without their inputs, so accept any row of the right shape"""
+    def __init__(self, example, width):
+        self.example = example
+        self.width = width
+
+    def decode(self, obj):
+        rows = obj.get(next(iter(self.example)))
+        if not isinstance(rows, list):
+            return None
+        kept = [row for row in rows if isinstance(row, list) and len(row) == self.width]
+        return kept if kept or not rows else None
+
+SHAPE_ONLY = {"orders": _AnyRows(INVENTORY_EXAMPLE, 2), "schedule": _AnyRows(SCHEDULE_EXAMPLE, 4)}
+
+def recorded(path, repeat):
+    """Completions captured with LLM_RECORD_FILE: the expected answer is unknown, so report
+    parse time and whether each extractor found an answer at all"""
+    with open(path, "r", encoding="utf-8") as f:
+        records = [json.loads(line) for line in f if line.strip()]
+    print(f"\nRecorded completions ({len(records)} from {path})")
+    found = {"legacy": 0, "single-pass": 0}
+    for record in records:
+        response = record["response"]
+        entry = {"operation": "schedule" if '"shifts"' in response else "orders", "response": response}
+        line = []
+        for label, extractor in (("legacy", legacy_extract), ("single-pass", new_extract)):
+            start = time.perf_counter()
+            for _ in range(repeat):
+                result = extractor(entry, SHAPE_ONLY)
+            elapsed = (time.perf_counter() - start) / repeat * 1000
+            ok = result is not None
+            found[label] += ok
+            line.append(f"{label} {'✅' if ok else '❌'} {elapsed:7.3f}ms")
+        print(f"  {record['prompt_sha256'][:12]} {entry['operation']:<9} " + "   ".join(line))
+    print(f"  Answers found: legacy {found['legacy']}/{len(records)}, single-pass {found['single-pass']}/{len(records)}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--recorded", help="JSONL file written with LLM_RECORD_FILE")
+    args = parser.parse_args()
+
+    if args.recorded:
+        recorded(args.recorded, args.repeat)
+        return
+
+    with open(CORPUS_PATH, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    corpus = data["responses"]
+    prompts = build_prompts(data["item_ids"], data["employee_ids"])
+
+    print("=" * 60)
+    print(f"JSON EXTRACTION BENCHMARK ({len(corpus)} responses)")
+    print("=" * 60)
+    run("Legacy parsers", legacy_extract, corpus, prompts, args.repeat)
+    run("Single-pass extractor + decode", new_extract, corpus, prompts, args.repeat)
+    scaling(max(1, args.repeat // 10))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""Benchmark WatsonX prompt size: indented-JSON prompts vs the compact prompt builder"""
+import argparse
+import json
+import random
+import uuid
+from services.prompt_builder import (
+    DAYS,
+    build_inventory_prompt,
+    build_schedule_prompt,
+    estimate_tokens
+)
+
+STORE_HOURS = {
+    name: {"open_time": "09:00", "close_time": "21:00", "closed": name == "sunday"}
+    for name in ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+}
+SLOT_NAMES = [("Open", "09:00:00", "13:00:00"), ("Mid", "13:00:00", "17:00:00"), ("Close", "17:00:00", "21:00:00")]
+
+def legacy_schedule_prompt(week_start, staffing_rules, employees, current_schedule, store_hours, shift_slots):
+    """The previous generate_schedule prompt body (indent=2 JSON everywhere)"""
+    return f"""You are a scheduling AI for a small business. Create an optimal employee schedule.
+
+Rules:
+1. ONLY schedule employees who are available that day
+2. NEVER schedule the same employee twice in one day
+3. Meet the required staff count for each day
+4. ONLY schedule shifts during store operating hours (ignore closed days)
+5. IMPORTANT: If shift slots are provided, you MUST use ONLY those exact time slots. Match employees to the configured slots - DO NOT create custom times. Each shift MUST use the start_time and end_time from one of the shift_slots for that day.
+6. Pair SHIFTLEADER employees with NEW employees when possible
+7. Distribute shifts evenly across employees
+8. If not enough staff available, schedule as many as possible
+9. When shift_slots are configured, create one shift per slot per employee (respecting the required_count for each slot)
+
+Week Start: {week_start}
+
+Staffing Requirements:
+{json.dumps(staffing_rules, indent=2)}
+
+Store Hours (schedule shifts within these times):
+{json.dumps(store_hours, indent=2)}
+
+
+Shift Slots (assign employees to these specific time slots):
+{json.dumps(shift_slots, indent=2)}
+
+
+Available Employees:
+{json.dumps(employees, indent=2)}
+
+Current Schedule (you can modify/improve this):
+{json.dumps(current_schedule, indent=2)}
+
+
+Return ONLY valid JSON in this exact format:
+{{"shifts": [{{"employee_id": "uuid-here", "day": "fri", "start_time": "09:00", "end_time": "17:00"}}]}}
+
+JSON Response:"""
+
+def legacy_inventory_prompt(items):
+    return f"""You are an inventory management AI. Given a list of items with current and minimum quantities, calculate how much to order for each item.
+
+Rules:
+- If current >= min: order_qty = 0 (no order needed)
+- If current < min: order_qty = (min - current) + buffer
+- Add a 20% buffer for items marked as low stock
+- Return ONLY valid JSON, no explanations
+
+Input items:
+{json.dumps(items, indent=2)}
+
+Return a JSON object in this exact format:
+{{"orders": [{{"id": 1, "order_qty": 15}}]}}
+
+JSON Response:"""
+
+def make_team(size, rng):
+    employees = [
+        {
+            "id": str(uuid.UUID(int=rng.getrandbits(128))),
+            "full_name": f"Employee {i}",
+            "strength": rng.choice(["normal", "strong", "shiftleader", "new"]),
+            "availability": sorted(rng.sample(DAYS, rng.randint(3, 7)), key=DAYS.index)
+        }
+        for i in range(size)
+    ]
+    per_slot = max(1, size // 12)
+    shift_slots = [
+        {
+            "id": i * 10 + j,
+            "business_id": "00000000-0000-0000-0000-000000000000",
+            "day_of_week": day,
+            "slot_name": name,
+            "start_time": start,
+            "end_time": end,
+            "required_count": per_slot,
+            "created_at": "2024-01-01T00:00:00+00:00"
+        }
+        for i, day in enumerate(DAYS[:6])
+        for j, (name, start, end) in enumerate(SLOT_NAMES)
+    ]
+    staffing_rules = [{"day": day, "required": per_slot * len(SLOT_NAMES)} for day in DAYS[:6]]
+    current_schedule = [
+        {"day_of_week": slot["day_of_week"], "employee_id": emp["id"], "start_time": slot["start_time"], "end_time": slot["end_time"]}
+        for slot in shift_slots
+        for emp in rng.sample(employees, slot["required_count"])
+    ]
+    return employees, shift_slots, staffing_rules, current_schedule
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+
+    print("=" * 72)
+    print("SCHEDULE PROMPT SIZE (estimated tokens)")
+    print("=" * 72)
+    print(f"{'team':>6} {'legacy':>10} {'compact':>10} {'saved':>7}   {'expected shifts':>15} {'answer budget':>14}")
+    for size in (10, 25, 50, 100, 200):
+        employees, shift_slots, staffing_rules, current = make_team(size, rng)
+        legacy = estimate_tokens(legacy_schedule_prompt("2024-01-01", staffing_rules, employees, current, STORE_HOURS, shift_slots))
+        built = build_schedule_prompt("2024-01-01", staffing_rules, employees, "", current, STORE_HOURS, shift_slots)
+        expected = sum(slot["required_count"] for slot in shift_slots)
+        print(
+            f"{size:>6} {legacy:>10} {built.estimated_tokens:>10} {1 - built.estimated_tokens / legacy:>6.0%}"
+            f"   {expected:>15} {built.max_new_tokens:>14}"
+        )
+
+    print("\nINVENTORY PROMPT SIZE (estimated tokens)")
+    print(f"{'items':>6} {'legacy':>10} {'compact':>10} {'saved':>7}   {'answer budget':>14}")
+    for count in (10, 50, 200):
+        items = [
+            {"id": 1000 + i, "name": f"Ingredient {i}", "current": rng.randint(0, 20), "min": rng.randint(10, 40)}
+            for i in range(count)
+        ]
+        legacy = estimate_tokens(legacy_inventory_prompt(items))
+        built = build_inventory_prompt(items)
+        print(f"{count:>6} {legacy:>10} {built.estimated_tokens:>10} {1 - built.estimated_tokens / legacy:>6.0%}   {built.max_new_tokens:>14}")
+
+if __name__ == "__main__":
+    main()
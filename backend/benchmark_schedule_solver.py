@@ -0,0 +1,41 @@
+"""Benchmark the local schedule solver: runtime, validity, pairing and load spread by team size"""
+import argparse
+import random
+import time
+from collections import Counter
+from benchmark_prompt_size import STORE_HOURS, make_team
+from services.schedule_engine import solve_schedule, validate_schedule
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+
+    print("=" * 72)
+    print("LOCAL SCHEDULE SOLVER")
+    print("=" * 72)
+    print(f"{'team':>6} {'shifts':>7} {'best ms':>8} {'valid':>6} {'unpaired slots':>15} {'shifts/emp min-max':>19}")
+    for size in (10, 50, 200, 500):
+        employees, shift_slots, staffing_rules, _ = make_team(size, rng)
+        timings = []
+        for _ in range(args.runs):
+            start = time.perf_counter()
+            shifts = solve_schedule(staffing_rules, employees, STORE_HOURS, shift_slots)
+            timings.append((time.perf_counter() - start) * 1000)
+
+        strength = {emp["id"]: emp["strength"] for emp in employees}
+        slots = {}
+        for shift in shifts:
+            slots.setdefault((shift["day"], shift["start_time"]), []).append(strength[shift["employee_id"]])
+        unpaired = sum(1 for staff in slots.values() if "new" in staff and "shiftleader" not in staff)
+        load = Counter(shift["employee_id"] for shift in shifts)
+        counts = [load.get(emp["id"], 0) for emp in employees]
+        print(
+            f"{size:>6} {len(shifts):>7} {min(timings):>8.1f} {validate_schedule(shifts, employees, STORE_HOURS, shift_slots)['valid']!s:>6}"
+            f" {unpaired:>15} {min(counts):>10}-{max(counts):<8}"
+        )
+
+if __name__ == "__main__":
+    main()
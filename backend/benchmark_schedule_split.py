@@ -0,0 +1,69 @@
+"""
+Benchmark whole-week vs per-day schedule generation against the offline fake backend
+Run with LLM_BACKEND=fake; LLM_FAKE_MS_PER_TOKEN / LLM_FAKE_LATENCY_MS set simulated model speed.
+"""
+import argparse
+import os
+import random
+import time
+from collections import Counter
+
+os.environ.setdefault("LLM_BACKEND", "fake")
+os.environ.setdefault("LLM_FAKE_MS_PER_TOKEN", "2")
+os.environ.setdefault("LLM_CACHE_ENABLED", "false")
+
+from benchmark_prompt_size import STORE_HOURS, make_team
+from services.schedule_engine import validate_schedule
+from services.watsonx_client import watsonx_client
+
+def spread(shifts, employees):
+    load = Counter(shift["employee_id"] for shift in shifts)
+    counts = [load.get(emp["id"], 0) for emp in employees]
+    return min(counts), max(counts)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[20, 60, 120])
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+
+    print("=" * 72)
+    print(f"SCHEDULE GENERATION (backend={watsonx_client.backend.name}, "
+          f"{watsonx_client.day_concurrency} days in parallel)")
+    print("=" * 72)
+    rows = []
+    for size in args.sizes:
+        employees, shift_slots, staffing_rules, current = make_team(size, rng)
+        kwargs = dict(
+            week_start="2024-01-01",
+            staffing_rules=staffing_rules,
+            employees=employees,
+            current_schedule=current,
+            store_hours=STORE_HOURS,
+            shift_slots=shift_slots
+        )
+
+        start = time.perf_counter()
+        whole = watsonx_client.generate_schedule(**kwargs)
+        whole_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        split, fallback_days = watsonx_client.generate_schedule_by_day(**kwargs)
+        split_s = time.perf_counter() - start
+
+        rows.append((size, whole, whole_s, split, split_s, fallback_days, employees, shift_slots))
+
+    print(f"\n{'team':>6} {'whole-week':>11} {'per-day':>9} {'speedup':>8}   {'valid':>11}   {'shifts/emp min-max':>19}")
+    for size, whole, whole_s, split, split_s, fallback_days, employees, slots in rows:
+        valid = f"{validate_schedule(whole, employees, STORE_HOURS, slots)['valid']!s:>5}/{validate_schedule(split, employees, STORE_HOURS, slots)['valid']!s:<5}"
+        whole_spread = "%d-%d" % spread(whole, employees)
+        split_spread = "%d-%d" % spread(split, employees)
+        print(
+            f"{size:>6} {whole_s:>10.2f}s {split_s:>8.2f}s {whole_s / split_s:>7.1f}x   {valid:>11}"
+            f"   {whole_spread:>8} -> {split_spread:<8}"
+            + (f"  fallback: {','.join(fallback_days)}" if fallback_days else "")
+        )
+
+if __name__ == "__main__":
+    main()
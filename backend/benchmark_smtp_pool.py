@@ -0,0 +1,122 @@
+"""Benchmark pooled SMTP delivery against one-connection-per-message delivery"""
+import argparse
+import smtplib
+import socket
+import socketserver
+import threading
+import time
+from email.mime.text import MIMEText
+from services.smtp_pool import SMTPConnectionPool
+
+class StandInSMTPHandler(socketserver.StreamRequestHandler):
+    """Minimal SMTP server (aiosmtpd-style sink): accepts AUTH and discards mail"""
+    connect_delay = 0.0
+
+    def setup(self):
+        super().setup()
+        # Replies are tiny; without this Nagle + delayed ACK stall every round trip
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def reply(self, *lines: str):
+        """Send a (possibly multi-line) reply in one write"""
+        self.wfile.write("".join(line + "\r\n" for line in lines).encode())
+
+    def handle(self):
+        # Stand-in for TCP + TLS handshake cost on a real mail server
+        time.sleep(self.connect_delay)
+        self.reply("220 standin ESMTP")
+        in_data = False
+        for raw in self.rfile:
+            line = raw.decode(errors="replace").rstrip("\r\n")
+            if in_data:
+                if line == ".":
+                    in_data = False
+                    self.server.received += 1
+                    self.reply("250 OK queued")
+                continue
+            verb = line.split(" ", 1)[0].upper()
+            if verb == "EHLO":
+                self.reply("250-standin", "250 AUTH PLAIN")
+            elif verb == "HELO":
+                self.reply("250 standin")
+            elif verb == "AUTH":
+                self.reply("235 Authentication successful")
+            elif verb in ("MAIL", "RCPT", "RSET", "NOOP"):
+                self.reply("250 OK")
+            elif verb == "DATA":
+                in_data = True
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+            elif verb == "QUIT":
+                self.reply("221 Bye")
+                return
+            else:
+                self.reply("502 Command not implemented")
+
+class StandInSMTPServer(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+    received = 0
+
+def build_messages(count: int):
+    messages = []
+    for i in range(count):
+        message = MIMEText(f"Low stock alert #{i}")
+        message["Subject"] = f"Low Stock Alert #{i}"
+        message["From"] = "bench@mainstreet.local"
+        message["To"] = f"owner{i}@example.com"
+        messages.append(message)
+    return messages
+
+def send_unpooled(host: str, port: int, messages) -> float:
+    """Previous behaviour: connect, log in, send and quit for every message"""
+    start = time.perf_counter()
+    for message in messages:
+        with smtplib.SMTP(host, port) as server:
+            server.login("bench", "bench")
+            server.send_message(message)
+    return time.perf_counter() - start
+
+def send_pooled(host: str, port: int, messages, batch_size: int) -> float:
+    pool = SMTPConnectionPool(host, port, "bench", "bench", use_ssl=False, size=1)
+    start = time.perf_counter()
+    for i in range(0, len(messages), batch_size):
+        results = pool.send_many(messages[i:i + batch_size])
+        assert all(r is True for r in results), results
+    elapsed = time.perf_counter() - start
+    print(f"   Pool stats: {pool.stats}")
+    pool.close_all()
+    return elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--messages", type=int, default=200)
+    parser.add_argument("--batch-size", type=int, default=10)
+    parser.add_argument("--connect-delay-ms", type=float, default=20.0,
+                        help="Simulated handshake latency per new connection")
+    args = parser.parse_args()
+
+    StandInSMTPHandler.connect_delay = args.connect_delay_ms / 1000
+    server = StandInSMTPServer(("127.0.0.1", 0), StandInSMTPHandler)
+    host, port = server.server_address
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    messages = build_messages(args.messages)
+
+    print("=" * 60)
+    print("SMTP THROUGHPUT BENCHMARK")
+    print("=" * 60)
+    print(f"{args.messages} messages, batch size {args.batch_size}, "
+          f"{args.connect_delay_ms:.0f}ms simulated handshake\n")
+
+    unpooled = send_unpooled(host, port, messages)
+    print(f"Unpooled: {unpooled:.2f}s  ({args.messages / unpooled:.0f} msg/s, server received {server.received})")
+
+    server.received = 0
+    pooled = send_pooled(host, port, messages, args.batch_size)
+    print(f"Pooled:   {pooled:.2f}s  ({args.messages / pooled:.0f} msg/s, server received {server.received})")
+
+    print(f"\nSpeedup: {unpooled / pooled:.1f}x")
+    server.shutdown()
+
+if __name__ == "__main__":
+    main()
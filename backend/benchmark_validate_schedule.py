@@ -0,0 +1,82 @@
+"""Benchmark validate_schedule: the previous per-shift employee scan vs the indexed sweep-line validator"""
+import argparse
+import random
+import time
+from typing import Dict, List, Set
+from services.schedule_engine import WEEK_DAYS, validate_schedule
+
+STORE_HOURS = {
+    name: {"open_time": "07:00", "close_time": "23:00", "closed": False}
+    for name in ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+}
+SLOT_TIMES = [("07:00", "15:00"), ("11:00", "19:00"), ("15:00", "23:00")]
+
+def legacy_validate_schedule(shifts: List[Dict], employees: List[Dict]) -> Dict:
+    """The previous validator: day-level duplicates and availability, employee lookup per shift"""
+    errors = []
+    day_assignments: Dict[str, Set[int]] = {}
+    for shift in shifts:
+        day = shift["day"]
+        emp_id = shift["employee_id"]
+        if day not in day_assignments:
+            day_assignments[day] = set()
+        if emp_id in day_assignments[day]:
+            errors.append(f"Employee {emp_id} scheduled twice on {day}")
+        else:
+            day_assignments[day].add(emp_id)
+        employee = next((e for e in employees if e["id"] == emp_id), None)
+        if employee:
+            if day not in employee.get("availability", []):
+                errors.append(f"Employee {emp_id} ({employee.get('full_name', 'Unknown')}) not available on {day}")
+    return {"valid": len(errors) == 0, "errors": errors, "warnings": []}
+
+def make_week(shift_count: int, rng: random.Random):
+    """About one shift per employee-day, with a few percent conflicts mixed in"""
+    employees = [
+        {"id": f"emp-{i}", "full_name": f"Employee {i}", "availability": rng.sample(WEEK_DAYS, rng.randint(4, 7))}
+        for i in range(max(1, shift_count // 5))
+    ]
+    shift_slots = [
+        {"day_of_week": day, "start_time": start, "end_time": end, "required_count": 1}
+        for day in WEEK_DAYS for start, end in SLOT_TIMES
+    ]
+    shifts = []
+    for _ in range(shift_count):
+        emp = rng.choice(employees)
+        day = rng.choice(emp["availability"]) if rng.random() > 0.02 else rng.choice(WEEK_DAYS)
+        start, end = rng.choice(SLOT_TIMES)
+        shifts.append({"employee_id": emp["id"], "day": day, "start_time": start, "end_time": end})
+    return employees, shifts, shift_slots
+
+def best_of(runs: int, fn) -> float:
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return min(timings)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+
+    print("=" * 72)
+    print("SCHEDULE VALIDATION (best of %d, ms)" % args.runs)
+    print("=" * 72)
+    print(f"{'shifts':>7} {'employees':>10} {'legacy':>10} {'indexed':>10} {'speedup':>8}   {'issues (overlap)':>17}")
+    for shift_count in (100, 1000, 10000):
+        employees, shifts, shift_slots = make_week(shift_count, rng)
+        legacy_ms = best_of(args.runs, lambda: legacy_validate_schedule(shifts, employees))
+        indexed_ms = best_of(args.runs, lambda: validate_schedule(shifts, employees, STORE_HOURS, shift_slots))
+        result = validate_schedule(shifts, employees, STORE_HOURS, shift_slots)
+        overlaps = sum(1 for issue in result["issues"] if issue["code"] == "overlap")
+        print(
+            f"{shift_count:>7} {len(employees):>10} {legacy_ms:>10.1f} {indexed_ms:>10.1f} {legacy_ms / indexed_ms:>7.1f}x"
+            f"   {len(result['issues']):>8} ({overlaps})"
+        )
+
+if __name__ == "__main__":
+    main()
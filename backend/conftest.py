@@ -0,0 +1,16 @@
+"""
+Pytest setup. The unit tests cover pure functions and need no services; the
+test_watsonx*.py scripts call the live model and are only collected when
+WATSONX_API_KEY is set.
+"""
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+if not os.getenv("WATSONX_API_KEY"):
+    collect_ignore = ["test_watsonx.py", "test_watsonx_features.py"]
+
+# Some modules build the Supabase client at import; it makes no request until used
+os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+os.environ.setdefault("SUPABASE_SERVICE_ROLE_KEY", "test-service-role-key")
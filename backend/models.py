@@ -78,6 +78,8 @@ class WatsonXOrderRequest(BaseModel):
 
 class WatsonXOrderResponse(BaseModel):
     orders: List[dict]
+    # "ai", or "fallback" when the deterministic calculator answered because the AI was unavailable
+    engine: str = "ai"
 
 # ==================== EMPLOYEE MODELS ====================
 
@@ -156,6 +158,44 @@ class ShiftSlotResponse(BaseModel):
 class ScheduleGenerateRequest(BaseModel):
     week_start: date
     preferences: Optional[str] = ""
+    # Ask the AI to apply preferences on top of the solver; None = only when preferences are given
+    use_ai: Optional[bool] = None
+    # One prompt per day instead of one for the whole week; None = automatic for large teams
+    split_by_day: Optional[bool] = None
+    # Version from GET /api/schedule/weeks/{week_start}; a mismatch returns 409 instead of overwriting
+    expected_version: Optional[int] = None
+    # Email employees whose shifts changed
+    notify: bool = True
+
+class ScheduleBatchRequest(BaseModel):
+    # First week of the batch; the following weeks start 7 days apart
+    week_start: date
+    weeks: int = Field(ge=1, le=8, default=4)
+    notify: bool = True
+
+class ScheduleCopyRequest(BaseModel):
+    from_week: date
+    to_week: date
+    # Version of to_week; a mismatch returns 409 instead of overwriting
+    expected_version: Optional[int] = None
+    # Only report the conflicts the copy would have, without writing it
+    validate_only: bool = False
+
+class UnavailableDay(BaseModel):
+    employee_id: str
+    day: Literal['mon', 'tue', 'wed', 'thu', 'fri', 'sat', 'sun']
+
+class SlotCountChange(BaseModel):
+    slot_id: int
+    required_count: int = Field(ge=0)
+
+class ScheduleRepairRequest(BaseModel):
+    week_start: date
+    unavailable: List[UnavailableDay] = []
+    # Applies to this week only; PUT /api/schedule/slots/{id} changes the slot itself
+    slot_changes: List[SlotCountChange] = []
+    expected_version: Optional[int] = None
+    notify: bool = True
 
 class ShiftResponse(BaseModel):
     id: int
@@ -7,6 +7,7 @@ import string
 from auth import get_current_user
 from db import get_supabase
 from permissions import require_permission, Permissions
+from services.email_outbox import email_outbox
 
 router = APIRouter(prefix="/api/admin", tags=["employee-invites"])
 
@@ -84,10 +85,29 @@ async def invite_employee(
             "is_active": True
         }).execute()
         
-        # In a real app, you would:
-        # 1. Send email with temporary password
-        # 2. Include link to reset password on first login
-        # For now, we return the password to the admin
+        # Queue a welcome email. The temporary password is NOT included - it is
+        # returned to the admin only, so it never sits in the outbox table
+        try:
+            business_result = supabase.table("businesses")\
+                .select("name, logo_url")\
+                .eq("id", business_id)\
+                .single()\
+                .execute()
+            business = business_result.data or {}
+            
+            email_outbox.enqueue(
+                business_id=business_id,
+                to_email=invite_data.email,
+                kind="employee_invite",
+                payload={
+                    "business_name": business.get("name"),
+                    "logo_url": business.get("logo_url"),
+                    "full_name": invite_data.full_name,
+                    "email": invite_data.email
+                }
+            )
+        except Exception as e:
+            print(f"[INVITE] Failed to queue invite email: {type(e).__name__}: {e}")
         
         # Log the invitation
         supabase.table("permission_audit_log").insert({
@@ -8,9 +8,12 @@ from models import (
 from auth import get_current_user
 from db import get_supabase
 from services.inventory_engine import (
-    format_inventory_item, get_instacart_link, check_duplicate_item
+    format_inventory_item, get_instacart_link, check_duplicate_item, calculate_order_quantities
 )
-from services.watsonx_client import watsonx_client
+from services.watsonx_client import watsonx_client, LLMUnavailableError
+from services.single_flight import single_flight
+from services.email_outbox import email_outbox
+from services.low_stock_digest import low_stock_digest
 
 router = APIRouter(prefix="/api/inventory", tags=["inventory"])
 
@@ -104,32 +107,35 @@ async def update_inventory_item(
     quantity_decreased = new_quantity < old_quantity
     threshold_unchanged = new_min_quantity == old_min_quantity
     
+    alert_item = {
+        "id": item_id,
+        "name": updated_item["name"],
+        "current_quantity": new_quantity,
+        "minimum_quantity": new_min_quantity,
+        "unit": updated_item["unit"]
+    }
+    
     if quantity_decreased and not was_low_stock and is_now_low_stock and threshold_unchanged:
-        # Item quantity decreased and just crossed threshold - send automatic alert
-        from services.email_service import email_service
-        
+        # Item quantity decreased and just crossed threshold - add to the business's digest
         # Get business name
         business_result = supabase.table("businesses")\
-            .select("name")\
+            .select("name, logo_url")\
             .eq("id", business_id)\
             .single()\
             .execute()
         
         business_name = business_result.data["name"] if business_result.data else "Your Business"
+        logo_url = business_result.data.get("logo_url") if business_result.data else None
         user_email = current_user["email"]
         
-        # Send alert for this one item
-        email_service.send_low_stock_alert(
-            to_email=user_email,
-            business_name=business_name,
-            low_stock_items=[{
-                "name": updated_item["name"],
-                "current_quantity": new_quantity,
-                "minimum_quantity": new_min_quantity,
-                "unit": updated_item["unit"]
-            }]
-        )
-        print(f"🔔 Auto-sent low stock alert for {updated_item['name']} to {user_email}")
+        # Crossings are batched per business and queued as one email when the window closes
+        low_stock_digest.record_crossing(business_id, business_name, user_email, alert_item, logo_url=logo_url)
+        print(f"🔔 Added {updated_item['name']} to low stock digest for {user_email}")
+    elif is_now_low_stock:
+        low_stock_digest.refresh_item(business_id, alert_item)
+    elif was_low_stock:
+        # Back above minimum - don't alert for an item that bounced back
+        low_stock_digest.record_recovery(business_id, item_id)
     
     return format_inventory_item(updated_item)
 
@@ -184,8 +190,20 @@ async def generate_order_list(current_user: dict = Depends(get_current_user)):
     if not low_stock_items:
         return {"orders": []}
     
-    # Use WatsonX to generate orders
-    orders = watsonx_client.generate_inventory_orders(low_stock_items)
+    # Use WatsonX to generate orders; identical concurrent requests share one call
+    flight_key = single_flight.key("generate_order_list", business_id, low_stock_items)
+    engine = "ai"
+    try:
+        orders = await single_flight.run(
+            flight_key,
+            watsonx_client.generate_inventory_orders,
+            low_stock_items,
+            business_id=business_id
+        )
+    except LLMUnavailableError as e:
+        print(f"[FALLBACK] AI ordering unavailable ({e}), using deterministic quantities")
+        orders = calculate_order_quantities(low_stock_items)
+        engine = "fallback"
     
     # Enrich orders with item details
     enriched_orders = []
@@ -202,7 +220,7 @@ async def generate_order_list(current_user: dict = Depends(get_current_user)):
                 "minimum_quantity": item["minimum_quantity"]
             })
     
-    return {"orders": enriched_orders}
+    return {"orders": enriched_orders, "engine": engine}
 
 @router.get("/instacart-link/{item_id}")
 async def get_instacart_order_link(
@@ -236,14 +254,15 @@ async def send_low_stock_alert(current_user: dict = Depends(get_current_user)):
     user_email = current_user["email"]
     supabase = get_supabase()
     
-    # Get business name
+    # Get business name and logo for branding
     business_result = supabase.table("businesses")\
-        .select("name")\
+        .select("name, logo_url")\
         .eq("id", business_id)\
         .single()\
         .execute()
     
     business_name = business_result.data["name"] if business_result.data else "Your Business"
+    logo_url = business_result.data.get("logo_url") if business_result.data else None
     
     # Get all low stock items
     inventory_result = supabase.table("inventory_items")\
@@ -269,24 +288,29 @@ async def send_low_stock_alert(current_user: dict = Depends(get_current_user)):
             "items_alerted": 0
         }
     
-    # Send email
-    from services.email_service import email_service
-    
-    success = email_service.send_low_stock_alert(
-        to_email=user_email,
-        business_name=business_name,
-        low_stock_items=low_stock_items
-    )
-    
-    if success:
-        return {
-            "success": True,
-            "message": f"Alert sent for {len(low_stock_items)} low stock items",
-            "items_alerted": len(low_stock_items),
-            "items": low_stock_items
-        }
-    else:
+    # Queue email - delivery status is available from /api/notifications/outbox
+    try:
+        outbox_row = email_outbox.enqueue(
+            business_id=business_id,
+            to_email=user_email,
+            kind="low_stock_alert",
+            payload={
+                "business_name": business_name,
+                "logo_url": logo_url,
+                "items": low_stock_items
+            }
+        )
+    except Exception as e:
         raise HTTPException(
             status_code=500, 
-            detail="Failed to send email alert"
+            detail=f"Failed to queue email alert: {str(e)}"
         )
+    
+    return {
+        "success": True,
+        "message": f"Alert queued for {len(low_stock_items)} low stock items",
+        "items_alerted": len(low_stock_items),
+        "items": low_stock_items,
+        "outbox_id": outbox_row["id"],
+        "status": outbox_row["status"]
+    }
@@ -0,0 +1,51 @@
+"""Service metrics routes"""
+import os
+from dotenv import load_dotenv
+from fastapi import APIRouter, Depends
+from auth import get_current_user
+from services.watsonx_client import watsonx_client
+from services.llm_cache import llm_cache
+from services.single_flight import single_flight
+from services.llm_metrics import llm_metrics
+from services.schedule_jobs import schedule_jobs
+
+load_dotenv()
+
+router = APIRouter(prefix="/api/metrics", tags=["metrics"])
+
+# User ids of the people running this deployment. Business admins are tenants too,
+# so only these see process-wide figures that mix every business's traffic.
+OPERATOR_USER_IDS = {
+    user_id.strip() for user_id in os.getenv("METRICS_OPERATOR_USER_IDS", "").split(",") if user_id.strip()
+}
+
+def is_operator(current_user: dict) -> bool:
+    return current_user.get("user_id") in OPERATOR_USER_IDS
+
+@router.get("/")
+async def get_metrics(current_user: dict = Depends(get_current_user)):
+    """
+    Per-operation call histograms for the caller's business. Operators (listed in
+    METRICS_OPERATOR_USER_IDS) also get the process-wide sections: AI backend health
+    (circuit breaker and its last error, deadlines, cache, request coalescing), overall
+    call histograms and schedule job counts, which mix every business in this process.
+    """
+    if not is_operator(current_user):
+        usage = llm_metrics.snapshot(current_user["business_id"], include_overall=False)
+        return {"llm": {"usage": usage["business"]}}
+
+    usage = llm_metrics.snapshot(current_user["business_id"])
+    return {
+        "llm": {
+            "backend": watsonx_client.backend.stats(),
+            "circuit_breaker": watsonx_client.breaker.snapshot(),
+            "timeouts_seconds": {
+                operation: watsonx_client.timeout_for(operation)
+                for operation in ("inventory_orders", "schedule", "analyze_financials")
+            },
+            "cache": llm_cache.stats(),
+            "single_flight": single_flight.stats(),
+            "usage": usage
+        },
+        "schedule_jobs": schedule_jobs.stats()
+    }
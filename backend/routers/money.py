@@ -1,10 +1,22 @@
 """Financial tracking routes"""
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
 from typing import List
 from models import FinancialsCreate, FinancialsResponse
 from auth import get_current_user
 from db import get_supabase
 from services.watsonx_client import watsonx_client
+from services.single_flight import single_flight
+from services.llm_metrics import llm_metrics
+from services.financial_analysis import (
+    SECTION_START,
+    StreamingAnalysisTrimmer,
+    build_analysis_prompt,
+    expense_breakdown,
+    summarize_financials,
+    summary_payload,
+    trim_analysis
+)
 import json
 
 router = APIRouter(prefix="/api/financials", tags=["financials"])
@@ -219,13 +231,8 @@ async def get_financials_by_month(current_user: dict = Depends(get_current_user)
     
     return sorted(monthly_list, key=lambda x: x["month"], reverse=True)
 
-@router.post("/analyze")
-async def analyze_financials_with_ai(
-    current_user: dict = Depends(get_current_user),
-    month: str = None  # Optional: analyze specific month
-):
-    """Use Watson AI to analyze financial data and provide insights"""
-    business_id = current_user["business_id"]
+def load_analysis_records(business_id: str, month: str = None) -> list:
+    """Weekly records to analyze, optionally limited to one month"""
     supabase = get_supabase()
     
     # Get financial data
@@ -243,101 +250,52 @@ async def analyze_financials_with_ai(
             end_date = f"{year}-{int(mon)+1:02d}-01"
         query = query.gte("week_start", start_date).lt("week_start", end_date)
     
-    result = query.execute()
+    return query.execute().data
+
+def sse_event(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@router.post("/analyze")
+async def analyze_financials_with_ai(
+    current_user: dict = Depends(get_current_user),
+    month: str = None  # Optional: analyze specific month
+):
+    """Use Watson AI to analyze financial data and provide insights"""
+    business_id = current_user["business_id"]
+    records = load_analysis_records(business_id, month)
     
-    if not result.data:
+    if not records:
         return {"error": "No financial data available for analysis"}
     
     # Prepare summary for AI
-    total_revenue = sum(r.get("gross_sales", 0) for r in result.data)
-    total_expenses = sum(r.get("total_expenses", 0) for r in result.data)
-    
-    # Aggregate expenses by category
-    expense_categories = {
-        "Cost of Goods Sold": sum(r.get("cogs", 0) for r in result.data),
-        "Payroll": sum(r.get("payroll", 0) for r in result.data),
-        "Rent": sum(r.get("rent", 0) for r in result.data),
-        "Utilities": sum(r.get("utilities", 0) for r in result.data),
-        "Supplies": sum(r.get("supplies", 0) for r in result.data),
-        "Marketing": sum(r.get("marketing", 0) for r in result.data),
-        "Maintenance": sum(r.get("maintenance", 0) for r in result.data),
-        "Insurance": sum(r.get("insurance", 0) for r in result.data),
-        "Processing Fees": sum(r.get("processing_fees", 0) for r in result.data),
-        "Other": sum(r.get("other_expenses", 0) for r in result.data)
-    }
-    
-    net_profit = total_revenue - total_expenses
-    profit_margin = (net_profit / total_revenue * 100) if total_revenue > 0 else 0
-    
-    # Create prompt for Watson
-    prompt = f"""You are a financial analyst. Analyze this data and respond ONLY with the formatted output. NO explanations, NO revisions, NO notes.
-
-DATA:
-Revenue: ${total_revenue:,.2f} | Expenses: ${total_expenses:,.2f} | Profit: ${net_profit:,.2f} ({profit_margin:.1f}%)
-
-TOP EXPENSES:
-{chr(10).join([f'{cat}: ${amt:,.2f} ({amt/total_expenses*100:.1f}%)' for cat, amt in sorted(expense_categories.items(), key=lambda x: x[1], reverse=True)[:3] if amt > 0])}
-
-Return ONLY this format (no other text):
-
-KEY INSIGHTS
-• [insight 1 - max 12 words]
-• [insight 2 - max 12 words]
-
-COST SAVINGS
-• [action 1 with $ amount - max 10 words]
-• [action 2 with $ amount - max 10 words]
-
-WINS
-• [achievement - max 10 words]
-
-RECOMMENDATIONS
-1. [action - max 8 words]
-2. [action - max 8 words]
-3. [action - max 8 words]
-
-CRITICAL: Return ONLY the formatted response above. NO additional text. NO explanations. NO revisions. START with "KEY INSIGHTS" and END after the 3rd recommendation."""
+    summary = summarize_financials(records)
+    prompt = build_analysis_prompt(summary)
 
     try:
-        # Call Watson AI using the existing client
-        model = watsonx_client._get_model()
+        # Call Watson AI using the shared model handle pool
         print("   🤖 Analyzing financial data with WatsonX AI...")
-        response = model.generate_text(prompt=prompt)
+        # Identical concurrent requests share one call
+        response = await single_flight.run(
+            single_flight.key("analyze_financials", business_id, prompt),
+            watsonx_client.generate_text,
+            prompt,
+            business_id=business_id,
+            operation="analyze_financials"
+        )
         print("   ✅ Received AI analysis")
         
-        # Clean up response - remove any extra text before/after the format
-        analysis = response.strip()
+        llm_metrics.record_parse(
+            "analyze_financials", business_id, "ok" if SECTION_START in response else "unformatted"
+        )
         
-        # If Watson added extra text, extract only the formatted section
-        if "KEY INSIGHTS" in analysis:
-            # Find start
-            start_idx = analysis.find("KEY INSIGHTS")
-            
-            # Find end (after 3rd recommendation)
-            lines = analysis[start_idx:].split('\n')
-            rec_count = 0
-            end_idx = start_idx
-            for i, line in enumerate(lines):
-                if line.strip().startswith(('1.', '2.', '3.')):
-                    rec_count += 1
-                    if rec_count == 3:
-                        # Found the 3rd recommendation, include next line break
-                        end_idx = start_idx + len('\n'.join(lines[:i+1]))
-                        break
-            
-            if end_idx > start_idx:
-                analysis = analysis[start_idx:end_idx].strip()
+        # Clean up response - remove any extra text before/after the format
+        analysis = trim_analysis(response)
         
         return {
             "month": month,
-            "period_weeks": len(result.data),
-            "summary": {
-                "revenue": round(total_revenue, 2),
-                "expenses": round(total_expenses, 2),
-                "profit": round(net_profit, 2),
-                "profit_margin": round(profit_margin, 1)
-            },
-            "expense_breakdown": {k: round(v, 2) for k, v in expense_categories.items() if v > 0},
+            "period_weeks": len(records),
+            "summary": summary_payload(summary),
+            "expense_breakdown": expense_breakdown(summary),
             "ai_analysis": analysis
         }
         
@@ -345,14 +303,73 @@ CRITICAL: Return ONLY the formatted response above. NO additional text. NO expla
         print(f"[WATSON ERROR] {str(e)}")
         return {
             "error": "AI analysis temporarily unavailable",
-            "summary": {
-                "revenue": round(total_revenue, 2),
-                "expenses": round(total_expenses, 2),
-                "profit": round(net_profit, 2),
-                "profit_margin": round(profit_margin, 1)
-            }
+            "summary": summary_payload(summary)
         }
 
+@router.post("/analyze/stream")
+async def stream_financial_analysis(
+    current_user: dict = Depends(get_current_user),
+    month: str = None  # Optional: analyze specific month
+):
+    """
+    Server-sent events version of /analyze.
+    Events: summary (numbers, sent immediately), token (analysis text as generated),
+    done (final trimmed analysis) or error. Generation stops after the 3rd recommendation.
+    """
+    business_id = current_user["business_id"]
+    records = load_analysis_records(business_id, month)
+    
+    def events():
+        if not records:
+            yield sse_event("error", {"error": "No financial data available for analysis"})
+            return
+        
+        summary = summarize_financials(records)
+        yield sse_event("summary", {
+            "month": month,
+            "period_weeks": len(records),
+            "summary": summary_payload(summary),
+            "expense_breakdown": expense_breakdown(summary)
+        })
+        
+        trimmer = StreamingAnalysisTrimmer()
+        prompt = build_analysis_prompt(summary)
+        stream = watsonx_client.generate_text_stream(
+            prompt,
+            business_id=business_id,
+            operation="analyze_financials"
+        )
+        try:
+            print("   🤖 Streaming financial analysis from WatsonX AI...")
+            for chunk in stream:
+                text = trimmer.feed(chunk)
+                if text:
+                    yield sse_event("token", {"text": text})
+                if trimmer.done:
+                    break
+            llm_metrics.record_parse(
+                "analyze_financials", business_id, "ok" if trimmer.started else "unformatted"
+            )
+            analysis = trimmer.finish()
+            if trimmer.done:
+                # Stopping early skips the stream's own caching; the trimmed text is a complete
+                # answer, so cache it where /analyze and the next stream will find it
+                watsonx_client.cache_text(prompt, business_id, analysis)
+            yield sse_event("done", {"ai_analysis": analysis, "stopped_early": trimmer.done})
+            print(f"   ✅ Streamed AI analysis{' (stopped after 3rd recommendation)' if trimmer.done else ''}")
+        except Exception as e:
+            print(f"[WATSON ERROR] {str(e)}")
+            yield sse_event("error", {"error": "AI analysis temporarily unavailable"})
+        finally:
+            # Stops generation if we broke out early or the client disconnected
+            stream.close()
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @router.put("/{week_start}", response_model=FinancialsResponse)
 async def update_financial_record(
     week_start: str,
@@ -0,0 +1,39 @@
+"""Notification delivery status routes"""
+from fastapi import APIRouter, Depends, HTTPException
+from typing import Optional
+from auth import get_current_user
+from services.email_outbox import email_outbox, OUTBOX_STATUSES
+
+router = APIRouter(prefix="/api/notifications", tags=["notifications"])
+
+@router.get("/outbox")
+async def get_outbox_status(
+    status: Optional[str] = None,
+    limit: int = 50,
+    current_user: dict = Depends(get_current_user)
+):
+    """Get email delivery status for current business"""
+    if status and status not in OUTBOX_STATUSES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid status. Use one of: {', '.join(OUTBOX_STATUSES)}"
+        )
+
+    return email_outbox.get_status(
+        current_user["business_id"],
+        status=status,
+        limit=max(1, min(limit, 200))
+    )
+
+@router.get("/outbox/{message_id}")
+async def get_outbox_message(
+    message_id: int,
+    current_user: dict = Depends(get_current_user)
+):
+    """Get delivery status of a single queued email"""
+    message = email_outbox.get_message(current_user["business_id"], message_id)
+
+    if not message:
+        raise HTTPException(status_code=404, detail="Message not found")
+
+    return message
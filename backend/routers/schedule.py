@@ -1,21 +1,33 @@
 """Scheduling routes"""
-from fastapi import APIRouter, Depends, HTTPException
-from typing import List
-from datetime import datetime
+import asyncio
+import json
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from typing import Dict, List
 from models import (
     StaffingRuleCreate, StaffingRuleUpdate, StaffingRuleResponse,
-    ScheduleGenerateRequest, ShiftResponse,
+    ScheduleGenerateRequest, ScheduleBatchRequest, ScheduleCopyRequest, ScheduleRepairRequest, ShiftResponse,
     ShiftSlotCreate, ShiftSlotUpdate, ShiftSlotResponse
 )
 from auth import get_current_user
 from db import get_supabase
-from services.watsonx_client import watsonx_client
-from services.schedule_engine import (
-    get_week_days, validate_schedule, calculate_schedule_coverage
+from services.single_flight import single_flight
+from services.coverage_engine import compute_coverage
+from services.fairness_engine import fairness_metrics
+from services.shift_store import shift_store, ScheduleVersionConflict, ScheduleWeekNotFound
+from services.schedule_engine import validate_schedule, calculate_schedule_coverage, repair_schedule
+from services.schedule_pipeline import (
+    ScheduleGenerationError, generate_week, generate_weeks, load_employees, load_schedule_config, load_schedule_inputs,
+    notify_schedule_changes, run_schedule_generation
 )
+from services.schedule_jobs import schedule_jobs, JobLimitError
 
 router = APIRouter(prefix="/api/schedule", tags=["schedule"])
 
+# Job event streams check for changes this often and send a comment when idle this long
+JOB_STREAM_POLL_SECONDS = 0.5
+JOB_STREAM_KEEPALIVE_SECONDS = 15.0
+
 # ==================== STAFFING RULES ====================
 
 @router.get("/staffing-rules", response_model=List[StaffingRuleResponse])
@@ -188,183 +200,295 @@ async def delete_shift_slot(
 
 # ==================== SCHEDULE GENERATION ====================
 
+def http_error(e: ScheduleGenerationError) -> HTTPException:
+    return HTTPException(status_code=e.status_code, detail=e.detail)
+
 @router.post("/generate")
 async def generate_schedule(
     request: ScheduleGenerateRequest,
     current_user: dict = Depends(get_current_user)
 ):
-    """Generate AI-powered schedule using WatsonX"""
+    """Generate a schedule with the local solver, optionally applying preferences with WatsonX"""
     business_id = current_user["business_id"]
-    supabase = get_supabase()
     
     week_start = request.week_start.isoformat()
+    options = request.model_dump(exclude={"week_start"})
+    
+    try:
+        inputs = load_schedule_inputs(business_id, week_start)
+    except ScheduleGenerationError as e:
+        raise http_error(e)
+    
+    def generate_and_save() -> dict:
+        try:
+            return generate_week(business_id, week_start, inputs, **options)
+        except ScheduleGenerationError as e:
+            raise http_error(e)
+    
+    # Identical concurrent requests (double clicks, refreshes) share one generation
+    flight_key = single_flight.key("generate_schedule", business_id, week_start, inputs, options)
+    return await single_flight.run(flight_key, generate_and_save)
+
+@router.post("/generate-batch")
+async def generate_schedule_batch(
+    request: ScheduleBatchRequest,
+    current_user: dict = Depends(get_current_user)
+):
+    """Generate several consecutive weeks with the local solver and save them together"""
+    business_id = current_user["business_id"]
     
-    # Get staffing rules
-    rules_result = supabase.table("staffing_rules")\
-        .select("*")\
-        .eq("business_id", business_id)\
-        .execute()
+    week_start = request.week_start.isoformat()
     
-    staffing_rules = [
-        {"day": rule["day_of_week"], "required": rule["required_count"]}
-        for rule in rules_result.data
-    ]
+    def generate_and_save() -> dict:
+        try:
+            return generate_weeks(business_id, week_start, request.weeks, notify=request.notify)
+        except ScheduleGenerationError as e:
+            raise http_error(e)
     
-    if not staffing_rules:
-        raise HTTPException(
-            status_code=400, 
-            detail="No staffing rules configured. Set required staff counts first."
+    flight_key = single_flight.key("generate_schedule_batch", business_id, week_start, request.weeks, request.notify)
+    return await single_flight.run(flight_key, generate_and_save)
+
+# ==================== GENERATION JOBS ====================
+
+def sse_event(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+@router.post("/jobs", status_code=202)
+async def create_schedule_job(
+    request: ScheduleGenerateRequest,
+    current_user: dict = Depends(get_current_user)
+):
+    """Start generating a schedule in the background; poll GET /jobs/{id} or stream /jobs/{id}/events"""
+    business_id = current_user["business_id"]
+    week_start = request.week_start.isoformat()
+    options = request.model_dump(exclude={"week_start"})
+    
+    try:
+        job, created = schedule_jobs.submit(
+            business_id,
+            single_flight.key("schedule_job", business_id, week_start, options),
+            run_schedule_generation,
+            {"business_id": business_id, "week_start": week_start, **options}
         )
+    except JobLimitError as e:
+        raise HTTPException(status_code=429, detail=str(e))
     
-    # Get active employees from profiles (exclude admins) with availability  
-    profiles_result = supabase.table("profiles")\
-        .select("id, full_name, strength, is_active, is_admin")\
-        .eq("business_id", business_id)\
-        .eq("is_active", True)\
-        .eq("is_admin", False)\
-        .execute()
-    
-    if not profiles_result.data:
-        raise HTTPException(status_code=400, detail="No active employees found")
-    
-    # Build employee data with availability from weekly_availability
-    employees = []
-    for emp in profiles_result.data:
-        # Get weekly availability (the new system)
-        availability_result = supabase.table("weekly_availability")\
-            .select("date, available")\
-            .eq("user_id", emp["id"])\
-            .eq("business_id", business_id)\
-            .eq("week_start", week_start)\
-            .eq("available", True)\
-            .execute()
-        
-        print(f"[AVAILABILITY] Employee {emp['full_name']} availability data: {availability_result.data}")
-        
-        # Convert dates to day names
-        available_days = []
-        for avail in availability_result.data:
-            try:
-                date_obj = datetime.fromisoformat(avail["date"]).date()
-                day_name = date_obj.strftime('%a').lower()  # Mon -> mon
-                available_days.append(day_name)
-                print(f"[AVAILABILITY] Converted {avail['date']} to {day_name}")
-            except Exception as e:
-                print(f"[AVAILABILITY] Error converting date {avail['date']}: {e}")
-        
-        # If no availability is set, assume available all 7 days (default)
-        if not available_days:
-            available_days = ["mon", "tue", "wed", "thu", "fri", "sat", "sun"]  # Default: available all days
-            print(f"[AVAILABILITY] No availability set for {emp['full_name']}, using default: {available_days}")
-        
-        print(f"[AVAILABILITY] Final available days for {emp['full_name']}: {available_days}")
-        
-        employees.append({
-            "id": emp["id"],
-            "full_name": emp["full_name"],
-            "strength": emp.get("strength", "normal"),
-            "availability": available_days
-        })
-    
-    # Get current shifts for this week to provide context
-    current_shifts_result = supabase.table("shifts")\
-        .select("day_of_week, employee_id, start_time, end_time")\
-        .eq("business_id", business_id)\
-        .eq("week_start", week_start)\
-        .execute()
-    
-    current_schedule = current_shifts_result.data if current_shifts_result.data else []
+    return {**job, "created": created}
+
+@router.get("/jobs")
+async def list_schedule_jobs(current_user: dict = Depends(get_current_user)):
+    """Recent schedule jobs for the business (without results)"""
+    return schedule_jobs.list(current_user["business_id"])
+
+@router.get("/jobs/{job_id}")
+async def get_schedule_job(
+    job_id: str,
+    current_user: dict = Depends(get_current_user)
+):
+    """Status, stage, progress and - once finished - result or error of a schedule job"""
+    job = schedule_jobs.get(current_user["business_id"], job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@router.get("/jobs/{job_id}/events")
+async def stream_schedule_job(
+    job_id: str,
+    current_user: dict = Depends(get_current_user)
+):
+    """Server-sent events: progress on every stage change, then done (with result or error)"""
+    business_id = current_user["business_id"]
+    if not schedule_jobs.get(business_id, job_id):
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    async def events():
+        revision = -1
+        idle = 0.0
+        while True:
+            job = schedule_jobs.get(business_id, job_id)
+            if job is None:
+                yield sse_event("error", {"detail": "Job expired"})
+                return
+            if job["status"] not in ("queued", "running"):
+                yield sse_event("done", job)
+                return
+            if job["revision"] != revision:
+                revision = job["revision"]
+                idle = 0.0
+                yield sse_event("progress", {key: job[key] for key in ("id", "status", "stage", "progress")})
+            elif idle >= JOB_STREAM_KEEPALIVE_SECONDS:
+                idle = 0.0
+                yield ": keepalive\n\n"
+            await asyncio.sleep(JOB_STREAM_POLL_SECONDS)
+            idle += JOB_STREAM_POLL_SECONDS
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.post("/repair")
+async def repair_schedule_week(
+    request: ScheduleRepairRequest,
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Reassign only the slots affected by an absence or a slot count change, writing only changed rows.
+    The repaired week is validated first and nothing is saved if it has errors.
+    """
+    business_id = current_user["business_id"]
     
-    # Get store hours for scheduling context
-    store_hours_result = supabase.table("businesses")\
-        .select("store_hours")\
-        .eq("id", business_id)\
-        .execute()
+    week_start = request.week_start.isoformat()
+    try:
+        inputs = load_schedule_inputs(business_id, week_start)
+    except ScheduleGenerationError as e:
+        raise http_error(e)
+    employees = inputs["employees"]
     
-    store_hours = None
-    if store_hours_result.data and store_hours_result.data[0] and store_hours_result.data[0].get("store_hours"):
-        store_hours = store_hours_result.data[0]["store_hours"]
-    else:
-        # Default hours if not set
-        store_hours = {
-            "monday": {"open_time": "09:00", "close_time": "17:00", "closed": False},
-            "tuesday": {"open_time": "09:00", "close_time": "17:00", "closed": False},
-            "wednesday": {"open_time": "09:00", "close_time": "17:00", "closed": False},
-            "thursday": {"open_time": "09:00", "close_time": "17:00", "closed": False},
-            "friday": {"open_time": "09:00", "close_time": "17:00", "closed": False},
-            "saturday": {"open_time": "09:00", "close_time": "17:00", "closed": False},
-            "sunday": {"open_time": "09:00", "close_time": "17:00", "closed": True}
+    shifts = [
+        {
+            "id": row["id"],
+            "employee_id": row["employee_id"],
+            "day": row["day_of_week"],
+            "start_time": row["start_time"][:5],
+            "end_time": row["end_time"][:5]
         }
+        for row in inputs["current_schedule"]
+    ]
     
-    # Get shift slots configured for the business
-    shift_slots_result = supabase.table("shift_slots")\
-        .select("*")\
-        .eq("business_id", business_id)\
-        .order("day_of_week, start_time")\
-        .execute()
+    slots_by_id = {slot["id"]: slot for slot in inputs["shift_slots"]}
+    slot_targets = []
+    for change in request.slot_changes:
+        slot = slots_by_id.get(change.slot_id)
+        if not slot:
+            raise HTTPException(status_code=404, detail=f"Shift slot {change.slot_id} not found")
+        slot_targets.append({
+            "day": slot["day_of_week"],
+            "start_time": slot["start_time"],
+            "end_time": slot["end_time"],
+            "required_count": change.required_count
+        })
     
-    shift_slots = shift_slots_result.data if shift_slots_result.data else []
-    
-    # Generate schedule using WatsonX with preferences and current schedule context
-    shifts = watsonx_client.generate_schedule(
-        week_start=week_start, 
-        staffing_rules=staffing_rules, 
-        employees=employees,
-        preferences=getattr(request, 'preferences', ''),
-        current_schedule=current_schedule,
-        store_hours=store_hours,
-        shift_slots=shift_slots
+    result = repair_schedule(
+        shifts,
+        employees,
+        unavailable=[entry.model_dump() for entry in request.unavailable],
+        slot_targets=slot_targets
     )
     
-    # Validate schedule
-    validation = validate_schedule(shifts, employees)
-    
-    print(f"[VALIDATION] Schedule validation result: {validation}")
-    print(f"[VALIDATION] Generated shifts: {shifts}")
-    print(f"[VALIDATION] Employee data: {employees}")
-    
+    validation = validate_schedule(result["shifts"], employees, inputs["store_hours"], inputs["shift_slots"])
     if not validation["valid"]:
-        print(f"[VALIDATION] Validation failed with errors: {validation['errors']}")
         raise HTTPException(
             status_code=400,
-            detail={"message": "Schedule validation failed", "errors": validation["errors"]}
+            detail={"message": "Schedule validation failed", "errors": validation["errors"], "issues": validation["issues"]}
         )
     
-    # Delete existing shifts for this week
-    supabase.table("shifts")\
-        .delete()\
-        .eq("business_id", business_id)\
-        .eq("week_start", week_start)\
-        .execute()
+    try:
+        saved = shift_store.save_week(business_id, week_start, result["shifts"], expected_version=request.expected_version)
+    except ScheduleVersionConflict as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    notified = notify_schedule_changes(business_id, week_start, saved, result["shifts"]) if request.notify else 0
     
-    # Insert new shifts
-    week_days = get_week_days(week_start)
+    print(f"[REPAIR] {week_start}: +{len(saved['added'])} ~{len(saved['moved'])} -{len(saved['removed'])} shifts, "
+          f"{len(result['unfilled'])} slots left short")
     
-    shift_records = [
+    return {
+        "message": "Schedule repaired",
+        "added": saved["added"],
+        "removed": saved["removed"],
+        "moved": saved["moved"],
+        "version": saved["version"],
+        "notified": notified,
+        "unfilled": result["unfilled"],
+        "coverage": calculate_schedule_coverage(result["shifts"], inputs["staffing_rules"]),
+        "coverage_detail": compute_coverage(
+            result["shifts"], inputs["staffing_rules"], inputs["store_hours"], inputs["shift_slots"]
+        ),
+        "fairness": fairness_metrics(result["shifts"], employees),
+        "warnings": validation["warnings"],
+        "issues": validation["issues"]
+    }
+
+def copy_conflicts(rows: List[Dict], employees: List[Dict], config: Dict) -> List[Dict]:
+    """Error-level issues of copied shift rows against the target week, each with its shift_id"""
+    shifts = [
         {
-            "business_id": business_id,
-            "week_start": week_start,
-            "day_of_week": shift["day"],
-            "employee_id": shift["employee_id"],
-            "start_time": shift.get("start_time", "10:00"),
-            "end_time": shift.get("end_time", "18:00")
+            "employee_id": row["employee_id"],
+            "day": row["day_of_week"],
+            "start_time": row["start_time"][:5],
+            "end_time": row["end_time"][:5]
         }
-        for shift in shifts
+        for row in rows
     ]
+    validation = validate_schedule(shifts, employees, config["store_hours"], config["shift_slots"])
+    return [
+        {**issue, "shift_id": rows[issue["shift_index"]]["id"]}
+        for issue in validation["issues"]
+        if issue["severity"] == "error"
+    ]
+
+@router.post("/copy")
+async def copy_schedule_week(
+    request: ScheduleCopyRequest,
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Roll a week's schedule forward onto another week and report what no longer fits.
+    The copy is written even when it has conflicts; the caller fixes them afterwards.
+    With validate_only nothing is written and the conflicts refer to from_week's shift ids.
+    """
+    business_id = current_user["business_id"]
+    
+    from_week = request.from_week.isoformat()
+    to_week = request.to_week.isoformat()
+    if from_week == to_week:
+        raise HTTPException(status_code=400, detail="from_week and to_week must differ")
+    
+    # Load the target week's employees first, so a business without any fails before the copy
+    config = load_schedule_config(business_id)
+    try:
+        employees = load_employees(business_id, [to_week])[to_week]
+    except ScheduleGenerationError as e:
+        raise http_error(e)
+    
+    if request.validate_only:
+        rows = shift_store.load_rows(business_id, from_week)
+        if not rows:
+            raise HTTPException(status_code=404, detail=f"no shifts found for week {from_week}")
+        return {
+            "message": f"{len(rows)} shifts from {from_week} checked against {to_week}",
+            "copied": 0,
+            "conflicts": copy_conflicts(rows, employees, config)
+        }
     
-    if shift_records:
-        supabase.table("shifts").insert(shift_records).execute()
+    try:
+        copied = shift_store.copy_week(business_id, from_week, to_week, expected_version=request.expected_version)
+    except ScheduleWeekNotFound as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ScheduleVersionConflict as e:
+        raise HTTPException(status_code=409, detail=str(e))
     
-    # Calculate coverage
-    coverage = calculate_schedule_coverage(shifts, staffing_rules)
+    # Check the copy against the target week's availability, slots and store hours
+    rows = shift_store.load_rows(business_id, to_week)
     
     return {
-        "message": "Schedule generated",
-        "shifts_created": len(shifts),
-        "coverage": coverage,
-        "warnings": validation["warnings"]
+        "message": f"Copied {copied['inserted']} shifts from {from_week}",
+        "copied": copied["inserted"],
+        "replaced": copied["deleted"],
+        "version": copied["version"],
+        "conflicts": copy_conflicts(rows, employees, config)
     }
 
+@router.get("/weeks/{week_start}")
+async def get_week_version(
+    week_start: str,
+    current_user: dict = Depends(get_current_user)
+):
+    """Current version of a week, for expected_version on the next write"""
+    business_id = current_user["business_id"]
+    return {"week_start": week_start, "version": shift_store.get_version(business_id, week_start)}
+
 @router.get("/shifts/{week_start}", response_model=List[ShiftResponse])
 async def get_shifts(
     week_start: str,
@@ -399,19 +523,49 @@ async def get_shifts(
     
     return formatted_shifts
 
-@router.delete("/shifts/{week_start}")
-async def delete_week_shifts(
+@router.get("/shifts/{week_start}/coverage")
+async def get_week_coverage(
     week_start: str,
+    bucket_minutes: int = Query(60, ge=15, le=240),
     current_user: dict = Depends(get_current_user)
 ):
-    """Delete all shifts for a week"""
+    """Per-slot and per-hour headcount for a saved week, with under/over-staffed windows"""
     business_id = current_user["business_id"]
     supabase = get_supabase()
     
-    supabase.table("shifts")\
-        .delete()\
+    shifts_result = supabase.table("shifts")\
+        .select("day_of_week, employee_id, start_time, end_time")\
         .eq("business_id", business_id)\
         .eq("week_start", week_start)\
         .execute()
     
-    return {"message": "Shifts deleted"}
+    shifts = [
+        {
+            "employee_id": row["employee_id"],
+            "day": row["day_of_week"],
+            "start_time": row["start_time"],
+            "end_time": row["end_time"]
+        }
+        for row in shifts_result.data or []
+    ]
+    
+    config = load_schedule_config(business_id)
+    return compute_coverage(
+        shifts,
+        config["staffing_rules"],
+        config["store_hours"],
+        config["shift_slots"],
+        bucket_minutes=bucket_minutes
+    )
+
+@router.delete("/shifts/{week_start}")
+async def delete_week_shifts(
+    week_start: str,
+    current_user: dict = Depends(get_current_user)
+):
+    """Delete all shifts for a week"""
+    business_id = current_user["business_id"]
+    
+    written = shift_store.replace_week(business_id, week_start, [])
+    
+    return {"message": "Shifts deleted", "version": written["version"]}
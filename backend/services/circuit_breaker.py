@@ -0,0 +1,113 @@
+"""
+Circuit breaker for calls to an external dependency
+Opens after too many consecutive failures or consecutive slow calls, rejects
+calls while open, then lets a single probe through after a cool-down. A
+successful probe closes the circuit; a failed one opens it again.
+"""
+import threading
+import time
+from typing import Any, Dict, Optional
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a dependency whose circuit is open"""
+
+class CircuitBreaker:
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 5,
+        slow_call_seconds: float = 20.0,
+        slow_call_threshold: int = 3,
+        reset_timeout_seconds: float = 30.0
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.slow_call_seconds = slow_call_seconds
+        self.slow_call_threshold = slow_call_threshold
+        self.reset_timeout_seconds = reset_timeout_seconds
+
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.consecutive_slow_calls = 0
+        self.opened_at: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+        self.times_opened = 0
+        self.rejected = 0
+
+    def allow(self) -> bool:
+        """True if a call may proceed; in half-open only one probe is let through"""
+        with self._lock:
+            if self.state == self.OPEN:
+                if time.monotonic() - self.opened_at < self.reset_timeout_seconds:
+                    self.rejected += 1
+                    return False
+                self.state = self.HALF_OPEN
+                self._probe_in_flight = False
+                print(f"[BREAKER] {self.name} half-open, probing")
+
+            if self.state == self.HALF_OPEN:
+                if self._probe_in_flight:
+                    self.rejected += 1
+                    return False
+                self._probe_in_flight = True
+            return True
+
+    def check(self):
+        """allow() that raises CircuitOpenError instead of returning False"""
+        if not self.allow():
+            raise CircuitOpenError(f"{self.name} circuit is open")
+
+    def record_success(self, latency_seconds: float):
+        with self._lock:
+            self.consecutive_failures = 0
+            if latency_seconds >= self.slow_call_seconds:
+                self.consecutive_slow_calls += 1
+                if self.state == self.HALF_OPEN or self.consecutive_slow_calls >= self.slow_call_threshold:
+                    self._open(f"{self.consecutive_slow_calls} slow calls (last {latency_seconds:.1f}s)")
+                    return
+            else:
+                self.consecutive_slow_calls = 0
+
+            if self.state == self.HALF_OPEN:
+                print(f"[BREAKER] {self.name} closed after successful probe")
+            self.state = self.CLOSED
+            self._probe_in_flight = False
+
+    def record_failure(self, error: str):
+        with self._lock:
+            self.consecutive_failures += 1
+            self.last_error = error
+            if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+                self._open(f"{self.consecutive_failures} consecutive failures: {error}")
+
+    def _open(self, reason: str):
+        # Caller holds the lock
+        if self.state != self.OPEN:
+            self.times_opened += 1
+            print(f"[BREAKER] {self.name} opened - {reason}")
+        self.state = self.OPEN
+        self.opened_at = time.monotonic()
+        self._probe_in_flight = False
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            retry_in = None
+            if self.state == self.OPEN:
+                retry_in = max(0.0, self.reset_timeout_seconds - (time.monotonic() - self.opened_at))
+            return {
+                "name": self.name,
+                "state": self.state,
+                "consecutive_failures": self.consecutive_failures,
+                "consecutive_slow_calls": self.consecutive_slow_calls,
+                "times_opened": self.times_opened,
+                "rejected": self.rejected,
+                "retry_in_seconds": round(retry_in, 1) if retry_in is not None else None,
+                "last_error": self.last_error
+            }
@@ -0,0 +1,151 @@
+"""
+Staffing coverage for a week of shifts
+Headcount is computed per minute with difference arrays (+1 at a shift's start, -1 at its
+end, then a running sum), so each day costs O(shifts + minutes) regardless of overlap.
+Requirements come from shift_slots (required_count over the slot's window) or, on days
+without slots, from staffing_rules across the store's opening hours.
+"""
+from typing import Any, Dict, List, Optional
+from services.schedule_engine import STORE_HOURS_DAY_NAMES, WEEK_DAYS, calculate_schedule_coverage, to_minutes
+
+MINUTES_PER_DAY = 24 * 60
+
+def _format_minutes(minutes: int) -> str:
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+def _running_sum(diff: List[int]) -> List[int]:
+    counts = []
+    total = 0
+    for delta in diff[:MINUTES_PER_DAY]:
+        total += delta
+        counts.append(total)
+    return counts
+
+def _add_interval(diff: List[int], start: int, end: int, amount: int = 1):
+    start = max(0, min(start, MINUTES_PER_DAY))
+    end = max(0, min(end, MINUTES_PER_DAY))
+    if end > start:
+        diff[start] += amount
+        diff[end] -= amount
+
+def _windows(day: str, staffed: List[int], required: List[int], status: str) -> List[Dict[str, Any]]:
+    """Contiguous runs of minutes that are under (or over) their requirement"""
+    windows = []
+    current = None
+    for minute in range(MINUTES_PER_DAY):
+        gap = staffed[minute] - required[minute]
+        hit = gap < 0 if status == "under" else (gap > 0 and required[minute] > 0)
+        if hit:
+            if current is None:
+                current = {"day": day, "start": minute, "end": minute + 1, "worst": gap,
+                           "required": required[minute], "scheduled": staffed[minute]}
+            else:
+                current["end"] = minute + 1
+                if abs(gap) > abs(current["worst"]):
+                    current.update(worst=gap, required=required[minute], scheduled=staffed[minute])
+        elif current is not None:
+            windows.append(current)
+            current = None
+    if current is not None:
+        windows.append(current)
+
+    return [
+        {
+            "day": window["day"],
+            "start_time": _format_minutes(window["start"]),
+            "end_time": _format_minutes(window["end"]),
+            "required": window["required"],
+            "scheduled": window["scheduled"],
+            ("shortfall" if status == "under" else "surplus"): abs(window["worst"])
+        }
+        for window in windows
+    ]
+
+def compute_coverage(
+    shifts: List[Dict],
+    staffing_rules: List[Dict],
+    store_hours: Optional[Dict] = None,
+    shift_slots: Optional[List[Dict]] = None,
+    bucket_minutes: int = 60
+) -> Dict[str, Any]:
+    """
+    Input shifts as [{"employee_id", "day", "start_time", "end_time"}].
+    Returns:
+    - days: the per-day summary from calculate_schedule_coverage
+    - slots: per shift slot, the fewest people on shift at any point of its window vs required_count
+    - buckets: per day, min/max headcount and requirement for each bucket_minutes window of opening hours
+    - understaffed / overstaffed: contiguous windows where headcount misses the requirement
+    """
+    slots_by_day: Dict[str, List[Dict]] = {}
+    for slot in shift_slots or []:
+        slots_by_day.setdefault(slot["day_of_week"], []).append(slot)
+    rules_by_day: Dict[str, int] = {}
+    for rule in staffing_rules:
+        rules_by_day[rule["day"]] = rules_by_day.get(rule["day"], 0) + rule["required"]
+
+    staffed_diff = {day: [0] * (MINUTES_PER_DAY + 1) for day in WEEK_DAYS}
+    for shift in shifts:
+        if shift["day"] in staffed_diff:
+            _add_interval(staffed_diff[shift["day"]], to_minutes(shift["start_time"]), to_minutes(shift["end_time"]))
+
+    result = {
+        "days": calculate_schedule_coverage(shifts, staffing_rules),
+        "slots": [],
+        "buckets": {},
+        "understaffed": [],
+        "overstaffed": []
+    }
+
+    for day in WEEK_DAYS:
+        hours = (store_hours or {}).get(STORE_HOURS_DAY_NAMES[day]) or {}
+        day_slots = [] if hours.get("closed") else slots_by_day.get(day, [])
+        open_minute = to_minutes(hours.get("open_time") or "00:00")
+        close_minute = to_minutes(hours.get("close_time") or "24:00")
+
+        required_diff = [0] * (MINUTES_PER_DAY + 1)
+        if day_slots:
+            for slot in day_slots:
+                _add_interval(required_diff, to_minutes(slot["start_time"]), to_minutes(slot["end_time"]), slot.get("required_count") or 1)
+        elif rules_by_day.get(day) and not hours.get("closed"):
+            _add_interval(required_diff, open_minute, close_minute, rules_by_day[day])
+
+        staffed = _running_sum(staffed_diff[day])
+        required = _running_sum(required_diff)
+        if not any(staffed) and not any(required):
+            continue
+
+        for slot in sorted(day_slots, key=lambda s: s["start_time"]):
+            start, end = to_minutes(slot["start_time"]), to_minutes(slot["end_time"])
+            scheduled = min(staffed[start:end]) if end > start else 0
+            needed = slot.get("required_count") or 1
+            result["slots"].append({
+                "slot_id": slot.get("id"),
+                "slot_name": slot.get("slot_name"),
+                "day": day,
+                "start_time": slot["start_time"][:5],
+                "end_time": slot["end_time"][:5],
+                "required": needed,
+                "scheduled": scheduled,
+                "status": "under" if scheduled < needed else "over" if scheduled > needed else "ok"
+            })
+
+        # Buckets span opening hours, widened to any shift or requirement outside them
+        active = [m for m in range(MINUTES_PER_DAY) if staffed[m] or required[m]]
+        first = min([open_minute] + active[:1]) if hours else active[0]
+        last = max([close_minute] + active[-1:]) if hours else active[-1] + 1
+        buckets = []
+        for start in range(first, min(last, MINUTES_PER_DAY), bucket_minutes):
+            end = min(start + bucket_minutes, MINUTES_PER_DAY)
+            buckets.append({
+                "start_time": _format_minutes(start),
+                "end_time": _format_minutes(end),
+                "min_staff": min(staffed[start:end]),
+                "max_staff": max(staffed[start:end]),
+                "required": max(required[start:end])
+            })
+        result["buckets"][day] = buckets
+
+        result["understaffed"].extend(_windows(day, staffed, required, "under"))
+        result["overstaffed"].extend(_windows(day, staffed, required, "over"))
+
+    return result
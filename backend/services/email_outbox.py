@@ -0,0 +1,282 @@
+"""
+Durable email outbox with an in-process worker pool
+Request handlers enqueue rows in email_outbox and return immediately;
+background workers deliver them with retry, exponential backoff and dead-lettering
+"""
+import os
+import threading
+import time
+import traceback
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+from dotenv import load_dotenv
+from db import get_supabase
+from services.email_service import email_service
+from services.email_templates import TEMPLATES
+
+load_dotenv()
+
+OUTBOX_STATUSES = ["pending", "sending", "sent", "dead"]
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+class EmailOutbox:
+    def __init__(self):
+        self.worker_count = int(os.getenv("EMAIL_OUTBOX_WORKERS", "2"))
+        self.max_attempts = int(os.getenv("EMAIL_OUTBOX_MAX_ATTEMPTS", "5"))
+        self.backoff_seconds = float(os.getenv("EMAIL_OUTBOX_BACKOFF_SECONDS", "30"))
+        self.poll_seconds = float(os.getenv("EMAIL_OUTBOX_POLL_SECONDS", "5"))
+        self.batch_size = int(os.getenv("EMAIL_OUTBOX_BATCH_SIZE", "10"))
+        # A row stuck in 'sending' this long belongs to a worker that died
+        self.stale_lock_seconds = int(os.getenv("EMAIL_OUTBOX_STALE_LOCK_SECONDS", "600"))
+        # How often a worker looks for such rows while running
+        self.stale_check_seconds = float(os.getenv("EMAIL_OUTBOX_STALE_CHECK_SECONDS", "60"))
+        self._stale_lock = threading.Lock()
+        self._last_stale_check = 0.0
+
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+
+        # Outbox kind == template name; the payload is the template context
+        self.kinds = set(TEMPLATES)
+
+    # ==================== PRODUCER ====================
+
+    def enqueue(self, business_id: str, to_email: str, kind: str, payload: Dict) -> Dict:
+        """Queue an email for background delivery and return the outbox row"""
+        if kind not in self.kinds:
+            raise ValueError(f"Unknown outbox kind: {kind}")
+
+        supabase = get_supabase()
+        result = supabase.table("email_outbox").insert({
+            "business_id": business_id,
+            "to_email": to_email,
+            "kind": kind,
+            "payload": payload,
+            "status": "pending",
+            "max_attempts": self.max_attempts,
+            "next_attempt_at": _utcnow().isoformat()
+        }).execute()
+
+        row = result.data[0]
+        print(f"[OUTBOX] Queued {kind} #{row['id']} for {to_email}")
+        self._wake.set()
+        return row
+
+    def enqueue_many(self, messages: List[Dict]) -> List[Dict]:
+        """Queue several emails in one insert; each message has business_id, to_email, kind, payload"""
+        for message in messages:
+            if message["kind"] not in self.kinds:
+                raise ValueError(f"Unknown outbox kind: {message['kind']}")
+        if not messages:
+            return []
+
+        now = _utcnow().isoformat()
+        result = get_supabase().table("email_outbox").insert([
+            {
+                "business_id": message["business_id"],
+                "to_email": message["to_email"],
+                "kind": message["kind"],
+                "payload": message["payload"],
+                "status": "pending",
+                "max_attempts": self.max_attempts,
+                "next_attempt_at": now
+            }
+            for message in messages
+        ]).execute()
+
+        self._wake.set()
+        return result.data
+
+    def wake(self):
+        """Rows were queued outside enqueue (e.g. by a database function) - poll now"""
+        self._wake.set()
+
+    # ==================== STATUS ====================
+
+    def get_status(self, business_id: str, status: Optional[str] = None, limit: int = 50) -> Dict:
+        """Per-business delivery status: counts by status plus the most recent messages"""
+        supabase = get_supabase()
+
+        counts = {}
+        for s in OUTBOX_STATUSES:
+            count_result = supabase.table("email_outbox")\
+                .select("id", count="exact")\
+                .eq("business_id", business_id)\
+                .eq("status", s)\
+                .limit(1)\
+                .execute()
+            counts[s] = count_result.count or 0
+
+        query = supabase.table("email_outbox")\
+            .select("id, to_email, kind, status, attempts, max_attempts, next_attempt_at, last_error, sent_at, created_at")\
+            .eq("business_id", business_id)
+
+        if status:
+            query = query.eq("status", status)
+
+        result = query.order("created_at", desc=True).limit(limit).execute()
+
+        return {"counts": counts, "messages": result.data}
+
+    def get_message(self, business_id: str, message_id: int) -> Optional[Dict]:
+        """Single outbox row, scoped to the business"""
+        supabase = get_supabase()
+        result = supabase.table("email_outbox")\
+            .select("id, to_email, kind, status, attempts, max_attempts, next_attempt_at, last_error, sent_at, created_at")\
+            .eq("id", message_id)\
+            .eq("business_id", business_id)\
+            .execute()
+        return result.data[0] if result.data else None
+
+    # ==================== WORKERS ====================
+
+    def start(self):
+        """Start the worker pool (idempotent)"""
+        if self._threads:
+            return
+        self._stop.clear()
+        self._last_stale_check = time.monotonic()
+        self._requeue_stale()
+        for i in range(self.worker_count):
+            thread = threading.Thread(target=self._worker_loop, name=f"email-outbox-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        print(f"📬 Email outbox started with {self.worker_count} workers")
+
+    def stop(self, timeout: float = 5.0):
+        """Signal workers to finish their current batch and exit"""
+        self._stop.set()
+        self._wake.set()
+        for thread in self._threads:
+            thread.join(timeout=timeout)
+        self._threads = []
+
+    def _worker_loop(self):
+        while not self._stop.is_set():
+            self._maybe_requeue_stale()
+            try:
+                claimed = self._claim_batch()
+            except Exception as e:
+                print(f"[OUTBOX] Claim failed: {type(e).__name__}: {e}")
+                claimed = []
+
+            if not claimed:
+                self._wake.wait(timeout=self.poll_seconds)
+                self._wake.clear()
+                continue
+
+            self._deliver_batch(claimed)
+
+    def _claim_batch(self) -> List[Dict]:
+        """Claim due pending rows; the status guard makes each claim win for exactly one worker"""
+        supabase = get_supabase()
+        now = _utcnow().isoformat()
+
+        due = supabase.table("email_outbox")\
+            .select("id")\
+            .eq("status", "pending")\
+            .lte("next_attempt_at", now)\
+            .order("next_attempt_at")\
+            .limit(self.batch_size)\
+            .execute()
+
+        claimed = []
+        for candidate in due.data:
+            result = supabase.table("email_outbox")\
+                .update({"status": "sending", "locked_at": now})\
+                .eq("id", candidate["id"])\
+                .eq("status", "pending")\
+                .execute()
+            if result.data:
+                claimed.append(result.data[0])
+        return claimed
+
+    def _maybe_requeue_stale(self):
+        """Requeue stale rows at most once per stale_check_seconds across all workers"""
+        with self._stale_lock:
+            now = time.monotonic()
+            if now - self._last_stale_check < self.stale_check_seconds:
+                return
+            self._last_stale_check = now
+        self._requeue_stale()
+
+    def _requeue_stale(self):
+        """Return rows abandoned mid-send (e.g. by a crashed process) to the queue"""
+        try:
+            cutoff = (_utcnow() - timedelta(seconds=self.stale_lock_seconds)).isoformat()
+            get_supabase().table("email_outbox")\
+                .update({"status": "pending", "locked_at": None})\
+                .eq("status", "sending")\
+                .lt("locked_at", cutoff)\
+                .execute()
+        except Exception as e:
+            print(f"[OUTBOX] Stale requeue failed: {type(e).__name__}: {e}")
+
+    def _deliver_batch(self, rows: List[Dict]):
+        """Build every claimed message, then send the whole batch over one pooled SMTP session"""
+        messages, sendable, errors = [], [], {}
+        for row in rows:
+            try:
+                messages.append(email_service.build_message(row["to_email"], row["kind"], row.get("payload") or {}))
+                sendable.append(row)
+            except Exception as e:
+                errors[row["id"]] = f"{type(e).__name__}: {e}"
+                traceback.print_exc()
+
+        try:
+            results = email_service.send_messages(messages)
+        except Exception as e:
+            traceback.print_exc()
+            results = [False] * len(messages)
+            for row in sendable:
+                errors[row["id"]] = f"{type(e).__name__}: {e}"
+
+        for row, ok in zip(sendable, results):
+            if not ok and row["id"] not in errors:
+                errors[row["id"]] = "Sender reported failure"
+
+        for row in rows:
+            if row["id"] in errors:
+                self._mark_failed(row, errors[row["id"]])
+            else:
+                self._mark_sent(row)
+
+    def _mark_sent(self, row: Dict):
+        get_supabase().table("email_outbox")\
+            .update({
+                "status": "sent",
+                "attempts": row["attempts"] + 1,
+                "sent_at": _utcnow().isoformat(),
+                "locked_at": None,
+                "last_error": None
+            })\
+            .eq("id", row["id"])\
+            .execute()
+        print(f"[OUTBOX] Sent {row['kind']} #{row['id']} to {row['to_email']}")
+
+    def _mark_failed(self, row: Dict, error: str):
+        attempts = row["attempts"] + 1
+        max_attempts = row.get("max_attempts") or self.max_attempts
+
+        if attempts >= max_attempts:
+            update = {"status": "dead", "attempts": attempts, "locked_at": None, "last_error": error}
+            print(f"[OUTBOX] Dead-lettered #{row['id']} after {attempts} attempts: {error}")
+        else:
+            # Exponential backoff: base, 2x base, 4x base, ...
+            delay = self.backoff_seconds * (2 ** (attempts - 1))
+            update = {
+                "status": "pending",
+                "attempts": attempts,
+                "locked_at": None,
+                "last_error": error,
+                "next_attempt_at": (_utcnow() + timedelta(seconds=delay)).isoformat()
+            }
+            print(f"[OUTBOX] Attempt {attempts}/{max_attempts} for #{row['id']} failed, retrying in {delay:.0f}s: {error}")
+
+        get_supabase().table("email_outbox").update(update).eq("id", row["id"]).execute()
+
+# Singleton instance
+email_outbox = EmailOutbox()
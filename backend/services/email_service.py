@@ -1,13 +1,14 @@
 """
-Email notification service for inventory alerts
+Email notification service (inventory alerts, invites, schedules, reminders)
 Supports both mock mode (console) and real emails (Gmail SMTP)
 """
 import os
-import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from typing import List, Dict
 from dotenv import load_dotenv
+from services.smtp_pool import SMTPConnectionPool
+from services.email_templates import render_email
 
 load_dotenv()
 
@@ -16,6 +17,17 @@ class EmailService:
         self.gmail_user = os.getenv("GMAIL_USER")
         self.gmail_password = os.getenv("GMAIL_APP_PASSWORD")
         self.mock_mode = not (self.gmail_user and self.gmail_password)
+        self.smtp_pool = None
+        if not self.mock_mode:
+            self.smtp_pool = SMTPConnectionPool(
+                host=os.getenv("SMTP_HOST", "smtp.gmail.com"),
+                port=int(os.getenv("SMTP_PORT", "465")),
+                username=self.gmail_user,
+                password=self.gmail_password,
+                use_ssl=os.getenv("SMTP_USE_SSL", "true").lower() == "true",
+                size=int(os.getenv("SMTP_POOL_SIZE", "2")),
+                idle_timeout=float(os.getenv("SMTP_IDLE_TIMEOUT_SECONDS", "60"))
+            )
         
         print("\n" + "="*60)
         if self.mock_mode:
@@ -28,95 +40,63 @@ class EmailService:
             print("Emails will be sent via Gmail")
         print("="*60 + "\n")
     
-    def send_low_stock_alert(
-        self, 
-        to_email: str, 
-        business_name: str, 
-        low_stock_items: List[Dict]
-    ) -> bool:
-        """Send low stock alert email"""
+    def build_message(self, to_email: str, template_name: str, context: Dict) -> MIMEMultipart:
+        """Render a template into a multipart text/HTML message"""
+        rendered = render_email(template_name, context)
         
+        message = MIMEMultipart("alternative")
+        message["Subject"] = rendered.subject
+        message["From"] = self.gmail_user or "mock@mainstreet.local"
+        message["To"] = to_email
+        message.attach(MIMEText(rendered.text, "plain"))
+        message.attach(MIMEText(rendered.html, "html"))
+        return message
+    
+    def send_messages(self, messages: List[MIMEMultipart]) -> List[bool]:
+        """Send a batch of messages over one pooled SMTP session; returns success per message"""
+        if not messages:
+            return []
         if self.mock_mode:
-            return self._send_mock_email(to_email, business_name, low_stock_items)
-        else:
-            return self._send_gmail_email(to_email, business_name, low_stock_items)
+            return [self._send_mock_email(message) for message in messages]
+        return self._send_gmail_emails(messages)
     
-    def _send_mock_email(self, to_email: str, business_name: str, items: List[Dict]) -> bool:
+    def _send_mock_email(self, message: MIMEMultipart) -> bool:
         """Mock email - prints to console (perfect for hackathon demo)"""
-        print("\n" + "="*60)
-        print("📧 MOCK EMAIL SENT")
-        print("="*60)
-        print(f"To: {to_email}")
-        print(f"Subject: 🚨 Low Stock Alert - {business_name}")
-        print("\nItems needing attention:")
-        for item in items:
-            print(f"  • {item['name']}: {item['current_quantity']} {item['unit']} " +
-                  f"(needs {item['minimum_quantity']})")
-        print("="*60 + "\n")
+        text_part = next(
+            (part for part in message.walk() if part.get_content_type() == "text/plain"),
+            None
+        )
+        body = text_part.get_payload(decode=True).decode("utf-8") if text_part else ""
+        print("\n" + "="*60 + "\n"
+              "📧 MOCK EMAIL SENT\n" +
+              "="*60 + "\n"
+              f"To: {message['To']}\n"
+              f"Subject: {message['Subject']}\n\n"
+              f"{body}" +
+              "="*60 + "\n")
         return True
     
-    def _send_gmail_email(self, to_email: str, business_name: str, items: List[Dict]) -> bool:
-        """Send real email via Gmail SMTP"""
+    def _send_gmail_emails(self, messages: List[MIMEMultipart]) -> List[bool]:
+        """Send real emails via Gmail SMTP, reusing pooled authenticated sessions"""
+        print(f"📧 Sending {len(messages)} email(s) via {self.smtp_pool.host} as {self.gmail_user}")
+        
         try:
-            print(f"📧 Attempting to send email to: {to_email}")
-            print(f"📧 Using Gmail account: {self.gmail_user}")
-            
-            # Build HTML email
-            items_html = "".join([
-                f"<li><strong>{item['name']}</strong>: "
-                f"{item['current_quantity']} {item['unit']} "
-                f"(minimum: {item['minimum_quantity']})</li>"
-                for item in items
-            ])
-            
-            html_content = f"""
-            <html>
-            <body style="font-family: Arial, sans-serif;">
-                <h2 style="color: #DC2626;">🚨 Low Stock Alert</h2>
-                <p>Hi {business_name} team,</p>
-                <p>The following items are running low and need to be reordered:</p>
-                <ul style="color: #374151;">
-                    {items_html}
-                </ul>
-                <p>Please review your inventory and place orders as needed.</p>
-                <hr style="margin: 20px 0;">
-                <p style="color: #6B7280; font-size: 12px;">
-                    Sent by MainStreet Copilot - Your Business Operating System
-                </p>
-            </body>
-            </html>
-            """
-            
-            # Create message
-            message = MIMEMultipart("alternative")
-            message["Subject"] = f"🚨 Low Stock Alert - {business_name}"
-            message["From"] = self.gmail_user
-            message["To"] = to_email
-            
-            # Attach HTML content
-            html_part = MIMEText(html_content, "html")
-            message.attach(html_part)
-            
-            print(f"📧 Connecting to Gmail SMTP...")
-            
-            # Send via Gmail SMTP
-            with smtplib.SMTP_SSL("smtp.gmail.com", 465) as server:
-                server.login(self.gmail_user, self.gmail_password)
-                server.send_message(message)
-            
-            print(f"✅ Email sent successfully!")
-            print(f"✅ To: {to_email}")
-            print(f"✅ From: {self.gmail_user}")
-            return True
-            
+            results = self.smtp_pool.send_many(messages)
         except Exception as e:
-            print(f"❌ Email sending failed!")
-            print(f"❌ Error type: {type(e).__name__}")
-            print(f"❌ Error message: {str(e)}")
+            print(f"❌ Email batch failed: {type(e).__name__}: {str(e)}")
             import traceback
-            print(f"❌ Full traceback:")
             traceback.print_exc()
-            return False
+            return [False] * len(messages)
+        
+        successes = []
+        for message, result in zip(messages, results):
+            if result is True:
+                print(f"✅ Email sent to: {message['To']}")
+                successes.append(True)
+            else:
+                print(f"❌ Email to {message['To']} failed: {type(result).__name__}: {result}")
+                successes.append(False)
+        return successes
 
 # Singleton instance
 email_service = EmailService()
\ No newline at end of file
@@ -0,0 +1,215 @@
+"""
+Email templates for all outbound mail
+Templates are parsed once at import into literal/placeholder segments, values are
+HTML-escaped in the HTML part, and each tenant's branded header/footer is cached
+"""
+import html
+import re
+from functools import lru_cache
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+class SafeHTML(str):
+    """Pre-rendered HTML fragment that must not be escaped again"""
+
+class RenderedEmail(NamedTuple):
+    subject: str
+    text: str
+    html: str
+
+_PLACEHOLDER = re.compile(r"\$\{(\w+)\}")
+
+class CompiledTemplate:
+    """Template split once into literals and ${name} placeholders"""
+
+    def __init__(self, source: str, escape_html: bool = False):
+        self.escape_html = escape_html
+        self.segments: List[Tuple[bool, str]] = []
+        pos = 0
+        for match in _PLACEHOLDER.finditer(source):
+            if match.start() > pos:
+                self.segments.append((False, source[pos:match.start()]))
+            self.segments.append((True, match.group(1)))
+            pos = match.end()
+        if pos < len(source):
+            self.segments.append((False, source[pos:]))
+
+    def render(self, context: Dict) -> str:
+        parts = []
+        for is_field, value in self.segments:
+            if not is_field:
+                parts.append(value)
+                continue
+            field = context.get(value, "")
+            field = "" if field is None else str(field) if not isinstance(field, str) else field
+            if self.escape_html and not isinstance(field, SafeHTML):
+                field = html.escape(field)
+            parts.append(field)
+        return "".join(parts)
+
+# ==================== LAYOUT & BRANDING ====================
+
+_LAYOUT_HTML = CompiledTemplate("""<html>
+<body style="font-family: Arial, sans-serif;">
+${header}
+${content}
+<hr style="margin: 20px 0;">
+${footer}
+</body>
+</html>""", escape_html=True)
+
+_HEADER_HTML = CompiledTemplate(
+    '<div style="margin-bottom: 16px;">${logo}'
+    '<span style="font-size: 18px; font-weight: bold; color: #111827;">${business_name}</span></div>',
+    escape_html=True
+)
+_LOGO_HTML = CompiledTemplate(
+    '<img src="${logo_url}" alt="${business_name}" style="height: 40px; vertical-align: middle; margin-right: 8px;">',
+    escape_html=True
+)
+_FOOTER_HTML = SafeHTML(
+    '<p style="color: #6B7280; font-size: 12px;">'
+    'Sent by MainStreet Copilot - Your Business Operating System</p>'
+)
+_FOOTER_TEXT = "\n--\nSent by MainStreet Copilot - Your Business Operating System\n"
+
+@lru_cache(maxsize=1024)
+def _branded_header(business_name: str, logo_url: Optional[str]) -> SafeHTML:
+    """Static per-tenant header; cached because it only changes when the branding does"""
+    context = {"business_name": business_name, "logo_url": logo_url or ""}
+    logo = SafeHTML(_LOGO_HTML.render(context)) if logo_url else SafeHTML("")
+    return SafeHTML(_HEADER_HTML.render({**context, "logo": logo}))
+
+# ==================== TEMPLATES ====================
+
+class EmailTemplate:
+    def __init__(
+        self,
+        subject: str,
+        text: str,
+        html_content: str,
+        prepare: Optional[Callable[[Dict], Dict]] = None
+    ):
+        self.subject = CompiledTemplate(subject)
+        self.text = CompiledTemplate(text)
+        self.html = CompiledTemplate(html_content, escape_html=True)
+        # Derives list fields (pre-rendered rows) from the raw context
+        self.prepare = prepare
+
+    def render(self, context: Dict) -> RenderedEmail:
+        business_name = context.get("business_name") or "Your Business"
+        context = {**context, "business_name": business_name}
+        if self.prepare:
+            context.update(self.prepare(context))
+
+        content = SafeHTML(self.html.render(context))
+        return RenderedEmail(
+            subject=self.subject.render(context),
+            text=self.text.render(context) + _FOOTER_TEXT,
+            html=_LAYOUT_HTML.render({
+                "header": _branded_header(business_name, context.get("logo_url")),
+                "content": content,
+                "footer": _FOOTER_HTML
+            })
+        )
+
+_ITEM_TEXT = CompiledTemplate("  • ${name}: ${current_quantity} ${unit} (needs ${minimum_quantity})")
+_ITEM_HTML = CompiledTemplate(
+    "<li><strong>${name}</strong>: ${current_quantity} ${unit} (minimum: ${minimum_quantity})</li>",
+    escape_html=True
+)
+
+def _prepare_low_stock(context: Dict) -> Dict:
+    items = context.get("items", [])
+    return {
+        "item_count": len(items),
+        "items_text": "\n".join(_ITEM_TEXT.render(item) for item in items),
+        "items_html": SafeHTML("".join(_ITEM_HTML.render(item) for item in items))
+    }
+
+_SHIFT_TEXT = CompiledTemplate("  • ${day}: ${start_time} - ${end_time}")
+_SHIFT_HTML = CompiledTemplate(
+    "<li><strong>${day}</strong>: ${start_time} - ${end_time}</li>",
+    escape_html=True
+)
+
+def _prepare_schedule(context: Dict) -> Dict:
+    shifts = context.get("shifts", [])
+    return {
+        "shift_count": len(shifts),
+        "shifts_text": "\n".join(_SHIFT_TEXT.render(shift) for shift in shifts) or "  (no shifts this week)",
+        "shifts_html": SafeHTML(
+            "".join(_SHIFT_HTML.render(shift) for shift in shifts) or "<li>No shifts this week</li>"
+        )
+    }
+
+TEMPLATES: Dict[str, EmailTemplate] = {
+    "low_stock_alert": EmailTemplate(
+        subject="🚨 Low Stock Alert - ${business_name}",
+        text=(
+            "Hi ${business_name} team,\n\n"
+            "The following items are running low and need to be reordered:\n"
+            "${items_text}\n\n"
+            "Please review your inventory and place orders as needed.\n"
+        ),
+        html_content=(
+            '<h2 style="color: #DC2626;">🚨 Low Stock Alert</h2>'
+            "<p>Hi ${business_name} team,</p>"
+            "<p>The following items are running low and need to be reordered:</p>"
+            '<ul style="color: #374151;">${items_html}</ul>'
+            "<p>Please review your inventory and place orders as needed.</p>"
+        ),
+        prepare=_prepare_low_stock
+    ),
+    "employee_invite": EmailTemplate(
+        subject="You're invited to join ${business_name}",
+        text=(
+            "Hi ${full_name},\n\n"
+            "${business_name} has invited you to MainStreet Copilot.\n"
+            "Sign in with ${email} using the temporary password your administrator shared with you,\n"
+            "then change it after your first login.\n"
+        ),
+        html_content=(
+            '<h2 style="color: #2563EB;">Welcome to ${business_name}</h2>'
+            "<p>Hi ${full_name},</p>"
+            "<p>${business_name} has invited you to MainStreet Copilot.</p>"
+            "<p>Sign in with <strong>${email}</strong> using the temporary password your "
+            "administrator shared with you, then change it after your first login.</p>"
+        )
+    ),
+    "schedule_published": EmailTemplate(
+        subject="📅 Your schedule for the week of ${week_start} - ${business_name}",
+        text=(
+            "Hi ${employee_name},\n\n"
+            "Your schedule for the week of ${week_start} has been published:\n"
+            "${shifts_text}\n"
+        ),
+        html_content=(
+            '<h2 style="color: #2563EB;">📅 Schedule Published</h2>'
+            "<p>Hi ${employee_name},</p>"
+            "<p>Your schedule for the week of <strong>${week_start}</strong> has been published:</p>"
+            '<ul style="color: #374151;">${shifts_html}</ul>'
+        ),
+        prepare=_prepare_schedule
+    ),
+    "reminder": EmailTemplate(
+        subject="⏰ Reminder: ${type} - ${business_name}",
+        text=(
+            "Hi ${business_name} team,\n\n"
+            "Reminder (${type}, ${day_of_week} at ${time_of_day}):\n"
+            "${message}\n"
+        ),
+        html_content=(
+            '<h2 style="color: #D97706;">⏰ Reminder</h2>'
+            "<p>Hi ${business_name} team,</p>"
+            "<p><strong>${type}</strong> - ${day_of_week} at ${time_of_day}</p>"
+            "<p>${message}</p>"
+        )
+    )
+}
+
+def render_email(template_name: str, context: Dict) -> RenderedEmail:
+    """Render a registered template; context carries business_name/logo_url for branding"""
+    template = TEMPLATES.get(template_name)
+    if template is None:
+        raise ValueError(f"Unknown email template: {template_name}")
+    return template.render(context)
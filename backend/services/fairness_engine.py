@@ -0,0 +1,180 @@
+"""
+Hours fairness for a week of shifts
+The week is held as NumPy matrices - availability (employees x slots), assignments
+(employees x slots) and slot lengths - so weekly hours are one matrix-vector product and
+every candidate for a move is checked for all employees at once. balance_hours hands shifts
+from the employees with the most hours to those with the fewest (or swaps shifts of different
+lengths on the same day) while that lowers the variance of weekly hours, keeping
+availability, one shift per employee per day, slot headcounts and shiftleader pairing intact.
+"""
+from typing import Any, Dict, List
+import numpy as np
+from services.schedule_engine import LEADER, NEW, WEEK_DAYS, to_minutes
+
+def _minutes(shift: Dict) -> int:
+    return to_minutes(shift["end_time"]) - to_minutes(shift["start_time"])
+
+def _gini(values: np.ndarray) -> float:
+    """0 = everyone works the same hours, towards 1 = one person works them all"""
+    if values.size == 0 or values.sum() <= 0:
+        return 0.0
+    ordered = np.sort(values)
+    ranks = np.arange(1, ordered.size + 1)
+    return float(2 * np.sum(ranks * ordered) / (ordered.size * ordered.sum()) - (ordered.size + 1) / ordered.size)
+
+def fairness_metrics(shifts: List[Dict], employees: List[Dict]) -> Dict[str, Any]:
+    """
+    Weekly shifts and hours per employee with their deviation from the team average, plus
+    summary figures (mean, standard deviation, variance, range and Gini coefficient of hours).
+    Employees without shifts count with zero hours.
+    """
+    index = {emp["id"]: i for i, emp in enumerate(employees)}
+    minutes = np.zeros(len(employees))
+    counts = np.zeros(len(employees), dtype=int)
+    for shift in shifts:
+        i = index.get(shift["employee_id"])
+        if i is None:
+            continue
+        try:
+            minutes[i] += max(_minutes(shift), 0)
+        except (KeyError, ValueError):
+            pass
+        counts[i] += 1
+
+    hours = minutes / 60
+    mean = float(hours.mean()) if hours.size else 0.0
+    return {
+        "employees": [
+            {
+                "employee_id": emp["id"],
+                "full_name": emp.get("full_name"),
+                "shifts": int(counts[i]),
+                "hours": round(float(hours[i]), 2),
+                "deviation": round(float(hours[i] - mean), 2)
+            }
+            for i, emp in enumerate(employees)
+        ],
+        "summary": {
+            "mean_hours": round(mean, 2),
+            "std_hours": round(float(hours.std()), 2) if hours.size else 0.0,
+            "variance": round(float(hours.var()), 2) if hours.size else 0.0,
+            "min_hours": round(float(hours.min()), 2) if hours.size else 0.0,
+            "max_hours": round(float(hours.max()), 2) if hours.size else 0.0,
+            "gini": round(_gini(hours), 3)
+        }
+    }
+
+def balance_hours(
+    shifts: List[Dict],
+    employees: List[Dict],
+    prior_hours: Dict[str, float] = None
+) -> List[Dict]:
+    """
+    Lower the variance of weekly hours without breaking any constraint the solver keeps.
+    prior_hours (employee_id -> hours already worked, e.g. earlier weeks of a batch) counts
+    towards the balance. Shifts keep their day and times; only who works them changes.
+    Shifts of unknown employees or with unreadable times are left as they are.
+    """
+    index = {emp["id"]: i for i, emp in enumerate(employees)}
+    day_index = {day: d for d, day in enumerate(WEEK_DAYS)}
+
+    # Columns: one per distinct (day, start, end)
+    slot_index: Dict[tuple, int] = {}
+    owners: List[int] = []
+    shift_slot: List[int] = []
+    movable: List[int] = []
+    for n, shift in enumerate(shifts):
+        i = index.get(shift["employee_id"])
+        try:
+            length = _minutes(shift)
+        except (KeyError, ValueError):
+            continue
+        if i is None or shift.get("day") not in day_index or length <= 0:
+            continue
+        key = (shift["day"], shift["start_time"][:5], shift["end_time"][:5])
+        slot_index.setdefault(key, len(slot_index))
+        owners.append(i)
+        shift_slot.append(slot_index[key])
+        movable.append(n)
+    if not movable:
+        return shifts
+
+    slot_keys = list(slot_index)
+    slot_day = np.array([day_index[key[0]] for key in slot_keys])
+    length = np.array([to_minutes(key[2]) - to_minutes(key[1]) for key in slot_keys])
+
+    available_day = np.array([
+        [day in emp.get("availability", []) for day in WEEK_DAYS] for emp in employees
+    ], dtype=bool)
+    available = available_day[:, slot_day]  # employees x slots
+    is_leader = np.array([(emp.get("strength") or "normal") == LEADER for emp in employees], dtype=int)
+    is_new = np.array([(emp.get("strength") or "normal") == NEW for emp in employees], dtype=int)
+
+    assigned = np.zeros((len(employees), len(slot_keys)), dtype=int)
+    np.add.at(assigned, (np.array(owners), np.array(shift_slot)), 1)
+    busy = assigned @ (slot_day[:, None] == np.arange(len(WEEK_DAYS))).astype(int)  # employees x days
+    prior = np.array([round((prior_hours or {}).get(emp["id"], 0) * 60) for emp in employees])
+    minutes = assigned @ length + prior
+    leaders = is_leader @ assigned
+    new_staff = is_new @ assigned
+    everyone = np.arange(len(employees))
+
+    def pairing_ok(slot: int, out: int, incoming: np.ndarray) -> np.ndarray:
+        # Swapping `out` for each of `incoming` must not leave new staff without a shiftleader
+        was_unpaired = new_staff[slot] > 0 and leaders[slot] == 0
+        new_after = new_staff[slot] - is_new[out] + is_new[incoming]
+        leaders_after = leaders[slot] - is_leader[out] + is_leader[incoming]
+        return was_unpaired | ~((new_after > 0) & (leaders_after == 0))
+
+    def move(emp: int, slot: int, receiver: int):
+        assigned[emp, slot] -= 1
+        assigned[receiver, slot] += 1
+        busy[emp, slot_day[slot]] -= 1
+        busy[receiver, slot_day[slot]] += 1
+        minutes[emp] -= length[slot]
+        minutes[receiver] += length[slot]
+        leaders[slot] += is_leader[receiver] - is_leader[emp]
+        new_staff[slot] += is_new[receiver] - is_new[emp]
+        k = next(k for k in range(len(owners)) if owners[k] == emp and shift_slot[k] == slot)
+        owners[k] = receiver
+
+    # Every move strictly lowers the sum of squared minutes, so this terminates
+    improved = True
+    while improved:
+        improved = False
+        for emp in np.argsort(-minutes, kind="stable"):
+            for slot in np.flatnonzero(assigned[emp]):
+                if not assigned[emp, slot]:
+                    continue
+                # Transfer: someone free that day with fewer hours even after taking the shift
+                candidates = available[:, slot] & (busy[:, slot_day[slot]] == 0) & (minutes + length[slot] < minutes[emp])
+                candidates &= pairing_ok(slot, emp, everyone)
+                if candidates.any():
+                    receiver = int(np.flatnonzero(candidates)[np.argmin(minutes[candidates])])
+                    move(emp, slot, receiver)
+                    improved = True
+                    continue
+
+                # Swap: trade for a shorter shift on the same day held by someone with fewer hours
+                swapped = False
+                for other in np.flatnonzero((slot_day == slot_day[slot]) & (length < length[slot])):
+                    gap = length[slot] - length[other]
+                    candidates = (assigned[:, other] > 0) & (minutes + gap < minutes[emp])
+                    candidates[emp] = False
+                    if not candidates.any():
+                        continue
+                    candidates &= pairing_ok(slot, emp, everyone)
+                    for receiver in np.flatnonzero(candidates)[np.argsort(minutes[candidates], kind="stable")]:
+                        # The other slot loses the receiver and gains emp
+                        if pairing_ok(other, int(receiver), np.array([emp]))[0]:
+                            move(emp, slot, int(receiver))
+                            move(int(receiver), other, emp)
+                            improved = swapped = True
+                            break
+                    if swapped:
+                        break
+
+    balanced = [dict(shift) for shift in shifts]
+    for k, n in enumerate(movable):
+        balanced[n]["employee_id"] = employees[owners[k]]["id"]
+    return balanced
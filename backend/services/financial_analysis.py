@@ -0,0 +1,168 @@
+"""
+Financial analysis helpers shared by the blocking and streaming AI routes
+Builds the summary and prompt from weekly_financials rows and trims the model's
+answer to the "KEY INSIGHTS ... 3rd recommendation" section, either all at once
+or incrementally as tokens arrive.
+"""
+from typing import Dict, List
+
+SECTION_START = "KEY INSIGHTS"
+RECOMMENDATION_PREFIXES = ("1.", "2.", "3.")
+RECOMMENDATION_COUNT = 3
+
+def summarize_financials(records: List[Dict]) -> Dict:
+    """Totals and per-category expenses for a set of weekly records"""
+    total_revenue = sum(r.get("gross_sales", 0) for r in records)
+    total_expenses = sum(r.get("total_expenses", 0) for r in records)
+
+    # Aggregate expenses by category
+    expense_categories = {
+        "Cost of Goods Sold": sum(r.get("cogs", 0) for r in records),
+        "Payroll": sum(r.get("payroll", 0) for r in records),
+        "Rent": sum(r.get("rent", 0) for r in records),
+        "Utilities": sum(r.get("utilities", 0) for r in records),
+        "Supplies": sum(r.get("supplies", 0) for r in records),
+        "Marketing": sum(r.get("marketing", 0) for r in records),
+        "Maintenance": sum(r.get("maintenance", 0) for r in records),
+        "Insurance": sum(r.get("insurance", 0) for r in records),
+        "Processing Fees": sum(r.get("processing_fees", 0) for r in records),
+        "Other": sum(r.get("other_expenses", 0) for r in records)
+    }
+
+    net_profit = total_revenue - total_expenses
+    profit_margin = (net_profit / total_revenue * 100) if total_revenue > 0 else 0
+
+    return {
+        "total_revenue": total_revenue,
+        "total_expenses": total_expenses,
+        "net_profit": net_profit,
+        "profit_margin": profit_margin,
+        "expense_categories": expense_categories
+    }
+
+def summary_payload(summary: Dict) -> Dict:
+    """Rounded summary block returned to the client"""
+    return {
+        "revenue": round(summary["total_revenue"], 2),
+        "expenses": round(summary["total_expenses"], 2),
+        "profit": round(summary["net_profit"], 2),
+        "profit_margin": round(summary["profit_margin"], 1)
+    }
+
+def expense_breakdown(summary: Dict) -> Dict:
+    return {k: round(v, 2) for k, v in summary["expense_categories"].items() if v > 0}
+
+def build_analysis_prompt(summary: Dict) -> str:
+    total_revenue = summary["total_revenue"]
+    total_expenses = summary["total_expenses"]
+    net_profit = summary["net_profit"]
+    profit_margin = summary["profit_margin"]
+    expense_categories = summary["expense_categories"]
+
+    return f"""You are a financial analyst. Analyze this data and respond ONLY with the formatted output. NO explanations, NO revisions, NO notes.
+
+DATA:
+Revenue: ${total_revenue:,.2f} | Expenses: ${total_expenses:,.2f} | Profit: ${net_profit:,.2f} ({profit_margin:.1f}%)
+
+TOP EXPENSES:
+{chr(10).join([f'{cat}: ${amt:,.2f} ({amt/total_expenses*100:.1f}%)' for cat, amt in sorted(expense_categories.items(), key=lambda x: x[1], reverse=True)[:3] if amt > 0])}
+
+Return ONLY this format (no other text):
+
+KEY INSIGHTS
+• [insight 1 - max 12 words]
+• [insight 2 - max 12 words]
+
+COST SAVINGS
+• [action 1 with $ amount - max 10 words]
+• [action 2 with $ amount - max 10 words]
+
+WINS
+• [achievement - max 10 words]
+
+RECOMMENDATIONS
+1. [action - max 8 words]
+2. [action - max 8 words]
+3. [action - max 8 words]
+
+CRITICAL: Return ONLY the formatted response above. NO additional text. NO explanations. NO revisions. START with "KEY INSIGHTS" and END after the 3rd recommendation."""
+
+def trim_analysis(response: str) -> str:
+    """Cut a complete response down to the formatted section"""
+    analysis = response.strip()
+
+    # If Watson added extra text, extract only the formatted section
+    if SECTION_START in analysis:
+        start_idx = analysis.find(SECTION_START)
+
+        # Find end (after 3rd recommendation)
+        lines = analysis[start_idx:].split('\n')
+        rec_count = 0
+        end_idx = start_idx
+        for i, line in enumerate(lines):
+            if line.strip().startswith(RECOMMENDATION_PREFIXES):
+                rec_count += 1
+                if rec_count == RECOMMENDATION_COUNT:
+                    end_idx = start_idx + len('\n'.join(lines[:i+1]))
+                    break
+
+        if end_idx > start_idx:
+            analysis = analysis[start_idx:end_idx].strip()
+
+    return analysis
+
+class StreamingAnalysisTrimmer:
+    """
+    Incremental version of trim_analysis.
+    Text before "KEY INSIGHTS" is held back; after it, chunks pass straight through
+    until the line holding the 3rd recommendation ends, at which point `done` is set
+    so the caller can stop generation. finish() returns the same text trim_analysis
+    would have produced for everything fed so far.
+    """
+    def __init__(self):
+        self.raw = ""
+        self.started = False
+        self.done = False
+        self._pending = ""
+        self._line = ""
+        self._rec_count = 0
+
+    def feed(self, chunk: str) -> str:
+        """Add model output; returns the part that should be sent to the client"""
+        if self.done or not chunk:
+            return ""
+        self.raw += chunk
+
+        if not self.started:
+            self._pending += chunk
+            idx = self._pending.find(SECTION_START)
+            if idx < 0:
+                return ""
+            self.started = True
+            chunk = self._pending[idx:]
+            self._pending = ""
+
+        emitted = []
+        for line in chunk.split("\n")[:-1]:
+            self._line += line
+            if self._end_line():
+                emitted.append(line)
+                return "".join(emitted)
+            emitted.append(line + "\n")
+        tail = chunk.rsplit("\n", 1)[-1]
+        self._line += tail
+        emitted.append(tail)
+        return "".join(emitted)
+
+    def _end_line(self) -> bool:
+        """A full line has arrived - count it and report whether the section is complete"""
+        line, self._line = self._line, ""
+        if line.strip().startswith(RECOMMENDATION_PREFIXES):
+            self._rec_count += 1
+            if self._rec_count == RECOMMENDATION_COUNT:
+                self.done = True
+        return self.done
+
+    def finish(self) -> str:
+        """Final trimmed analysis for the text received"""
+        return trim_analysis(self.raw)
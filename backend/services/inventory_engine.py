@@ -1,4 +1,5 @@
 """Inventory management logic"""
+import math
 from typing import List, Dict
 from db import get_supabase
 
@@ -40,3 +41,15 @@ def check_duplicate_item(business_id: str, item_name: str, exclude_id: int = Non
     result = query.execute()
     
     return len(result.data) > 0
+
+def calculate_order_quantities(items: List[Dict], buffer_pct: float = 0.20) -> List[Dict]:
+    """
+    Deterministic fallback for AI ordering: shortfall plus a buffer, rounded up.
+    Input: [{"id": 1, "current": 5, "min": 20}]  Output: [{"id": 1, "order_qty": 18}]
+    """
+    orders = []
+    for item in items:
+        shortfall = item["min"] - item["current"]
+        order_qty = math.ceil(shortfall * (1 + buffer_pct)) if shortfall > 0 else 0
+        orders.append({"id": item["id"], "order_qty": order_qty})
+    return orders
@@ -0,0 +1,98 @@
+"""
+Robust JSON extraction for LLM outputs
+One pass over the text finds every balanced {...} span while tracking string
+literals and escapes, so braces inside strings never confuse the scan. Code
+fences and surrounding prose need no special handling. Nested spans are only
+parsed when their parent fails to, which keeps the work near-linear.
+"""
+import json
+import re
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+# Only these characters can change scanner state; everything else is skipped by the regex engine
+_STRUCTURAL = re.compile(r'[{}"\\\n]')
+
+def _scan_spans(text: str) -> List[Tuple[int, int, list]]:
+    """
+    Return top-level object spans as (start, end, children), where children are
+    the spans of objects nested directly inside, in the same format.
+    """
+    roots: List[Tuple[int, int, list]] = []
+    # Each open frame: [start, children]
+    stack: List[list] = []
+    in_string = False
+    skip_to = -1
+
+    for match in _STRUCTURAL.finditer(text):
+        i = match.start()
+        if i < skip_to:
+            continue
+        ch = text[i]
+
+        if in_string:
+            if ch == "\\":
+                skip_to = i + 2
+            elif ch == '"':
+                in_string = False
+            elif ch == "\n":
+                # JSON strings can't span lines - treat as a stray quote in prose
+                in_string = False
+            continue
+
+        if ch == '"' and stack:
+            in_string = True
+        elif ch == "{":
+            stack.append([i, []])
+        elif ch == "}" and stack:
+            start, children = stack.pop()
+            span = (start, i + 1, children)
+            if stack:
+                stack[-1][1].append(span)
+            else:
+                roots.append(span)
+
+    # A stray '{' in prose never closes; objects inside it still count as top-level
+    for _, children in stack:
+        roots.extend(children)
+    roots.sort(key=lambda span: span[0])
+    return roots
+
+def iter_json_objects(text: str) -> Iterator[Dict[str, Any]]:
+    """Yield every parseable JSON object in the text, outermost first"""
+    pending = list(reversed(_scan_spans(text)))
+    while pending:
+        start, end, children = pending.pop()
+        try:
+            parsed = json.loads(text[start:end])
+        except json.JSONDecodeError:
+            # Broken outer object - its complete inner objects may still be usable
+            pending.extend(reversed(children))
+            continue
+        if isinstance(parsed, dict):
+            yield parsed
+
+def extract_json(
+    text: str,
+    required_keys: Sequence[str] = (),
+    validate: Optional[Callable[[Dict[str, Any]], bool]] = None,
+    ignore: Sequence[Dict[str, Any]] = ()
+) -> Optional[Dict[str, Any]]:
+    """
+    Pick the best object that has all required_keys and passes validate.
+    Objects equal to one in ignore (e.g. the format example from the prompt) are skipped.
+    Prefers the first candidate whose required values are non-empty (models often echo
+    an empty or example object before the real answer); otherwise the last candidate.
+    """
+    candidates = [
+        obj for obj in iter_json_objects(text or "")
+        if all(key in obj for key in required_keys)
+        and obj not in ignore
+        and (validate is None or validate(obj))
+    ]
+    if not candidates:
+        return None
+
+    for obj in candidates:
+        if all(obj[key] not in (None, [], {}, "") for key in required_keys):
+            return obj
+    return candidates[-1]
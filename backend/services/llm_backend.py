@@ -0,0 +1,343 @@
+"""
+LLM backends behind the shared client
+LLM_BACKEND selects the implementation:
+- watsonx (default): IBM WatsonX through a pool of long-lived model handles
+- fake: offline and deterministic; replays recorded completions from
+  LLM_REPLAY_FILE and otherwise synthesizes well-formed answers, with
+  configurable latency, so routers and load tests run without credentials
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+from dotenv import load_dotenv
+from services.llm_cache import canonicalize_prompt
+from services.prompt_builder import DAYS, estimate_tokens
+
+load_dotenv()
+
+class LLMResult:
+    def __init__(self, text: str, prompt_tokens: int, completion_tokens: int, stop_reason: Optional[str]):
+        self.text = text
+        self.prompt_tokens = prompt_tokens
+        self.completion_tokens = completion_tokens
+        self.stop_reason = stop_reason
+
+class LLMBackend:
+    """Interface every backend implements"""
+    name = "base"
+    model_id = ""
+
+    def generate(self, prompt: str, parameters: Dict[str, Any]) -> LLMResult:
+        raise NotImplementedError
+
+    def stream(self, prompt: str, parameters: Dict[str, Any]) -> Iterator[str]:
+        """Yield the completion in chunks; closing the iterator must stop generation"""
+        raise NotImplementedError
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": self.name, "model_id": self.model_id}
+
+def prompt_fingerprint(prompt: str) -> str:
+    """Key used to record and replay completions"""
+    return hashlib.sha256(canonicalize_prompt(prompt).encode("utf-8")).hexdigest()
+
+# ==================== WATSONX ====================
+
+class _ModelHandle:
+    def __init__(self, model: Any, setup_seconds: float):
+        self.model = model
+        self.created_at = time.monotonic()
+        self.setup_seconds = setup_seconds
+
+class ModelPool:
+    """
+    Lazily created, thread-safe pool of long-lived model handles.
+    Building a Model does the IAM token exchange and HTTP setup, so handles are
+    reused across requests and rebuilt before their token would expire.
+    """
+    def __init__(self, factory: Callable[[], Any], size: int, refresh_after_seconds: float):
+        self.factory = factory
+        self.size = size
+        self.refresh_after_seconds = refresh_after_seconds
+
+        self._idle: List[_ModelHandle] = []
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(size)
+
+        self.created = 0
+        self.reused = 0
+        self.total_setup_seconds = 0.0
+
+    def _create(self) -> _ModelHandle:
+        start = time.perf_counter()
+        model = self.factory()
+        setup_seconds = time.perf_counter() - start
+        with self._lock:
+            self.created += 1
+            self.total_setup_seconds += setup_seconds
+        print(f"   🔌 Created WatsonX model handle in {setup_seconds * 1000:.0f}ms")
+        return _ModelHandle(model, setup_seconds)
+
+    @property
+    def avg_setup_ms(self) -> float:
+        return (self.total_setup_seconds / self.created * 1000) if self.created else 0.0
+
+    @contextmanager
+    def acquire(self):
+        """Borrow a handle exclusively for one call"""
+        self._slots.acquire()
+        handle = None
+        try:
+            with self._lock:
+                handle = self._idle.pop() if self._idle else None
+
+            if handle and time.monotonic() - handle.created_at >= self.refresh_after_seconds:
+                # Token is close to expiry - rebuild rather than fail mid-request
+                handle = None
+
+            if handle is None:
+                handle = self._create()
+            else:
+                with self._lock:
+                    self.reused += 1
+                print(f"   ♻️  Reused WatsonX model handle (saved ~{self.avg_setup_ms:.0f}ms setup)")
+
+            try:
+                yield handle.model
+            except GeneratorExit:
+                # A stream consumer stopped early - the handle itself is still healthy
+                with self._lock:
+                    self._idle.append(handle)
+                raise
+
+            with self._lock:
+                self._idle.append(handle)
+        finally:
+            self._slots.release()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "size": self.size,
+                "idle": len(self._idle),
+                "created": self.created,
+                "reused": self.reused,
+                "avg_setup_ms": round(self.avg_setup_ms, 1),
+                "setup_ms_saved": round(self.reused * self.avg_setup_ms, 1)
+            }
+
+class WatsonXBackend(LLMBackend):
+    name = "watsonx"
+
+    def __init__(self, model_id: str):
+        self.api_key = os.getenv("WATSONX_API_KEY")
+        self.project_id = os.getenv("WATSONX_PROJECT_ID")
+        self.url = os.getenv("WATSONX_URL", "https://us-south.ml.cloud.ibm.com")
+
+        # Validate credentials
+        if not self.api_key:
+            raise ValueError("WATSONX_API_KEY is required (or set LLM_BACKEND=fake to run offline)")
+        if not self.project_id:
+            raise ValueError("WATSONX_PROJECT_ID is required")
+        if self.api_key.startswith("ApiKey-"):
+            raise ValueError(
+                "Invalid API key format! You provided the Key ID instead of the actual key.\n"
+                "Go to https://cloud.ibm.com/iam/apikeys and create a NEW key.\n"
+                "Copy the LONG string shown (NOT the Key ID)."
+            )
+
+        print("=" * 60)
+        print("🤖 WATSONX AI ENABLED")
+        print("=" * 60)
+        print(f"Model: {model_id}")
+        print(f"Project ID: {self.project_id[:8]}...")
+        print(f"API Key: {self.api_key[:10]}...")
+        print("=" * 60)
+
+        self.credentials = {
+            "url": self.url,
+            "apikey": self.api_key
+        }
+        self.model_id = model_id
+
+        self.model_pool = ModelPool(
+            self._create_model,
+            size=int(os.getenv("WATSONX_MODEL_POOL_SIZE", "4")),
+            # IAM tokens last 60 minutes; rebuild handles a few minutes early
+            refresh_after_seconds=float(os.getenv("WATSONX_HANDLE_REFRESH_SECONDS", "3300"))
+        )
+
+    def _create_model(self):
+        """Initialize WatsonX model"""
+        from ibm_watsonx_ai.foundation_models import Model
+
+        return Model(
+            model_id=self.model_id,
+            credentials=self.credentials,
+            project_id=self.project_id
+        )
+
+    def generate(self, prompt: str, parameters: Dict[str, Any]) -> LLMResult:
+        with self.model_pool.acquire() as model:
+            raw = model.generate_text(prompt=prompt, params=parameters, raw_response=True)
+
+        result = raw["results"][0]
+        return LLMResult(
+            result.get("generated_text", ""),
+            result.get("input_token_count", 0),
+            result.get("generated_token_count", 0),
+            result.get("stop_reason")
+        )
+
+    def stream(self, prompt: str, parameters: Dict[str, Any]) -> Iterator[str]:
+        with self.model_pool.acquire() as model:
+            stream = model.generate_text_stream(prompt=prompt, params=parameters)
+            try:
+                for chunk in stream:
+                    if chunk:
+                        yield chunk
+            finally:
+                stream.close()
+
+    def stats(self) -> Dict[str, Any]:
+        return {**super().stats(), "pool": self.model_pool.stats()}
+
+# ==================== OFFLINE ====================
+
+FAKE_ANALYSIS = """KEY INSIGHTS
+• Revenue covers expenses with a healthy margin
+• Payroll is the largest controllable cost
+
+COST SAVINGS
+• Trim overtime hours to save $200 weekly
+• Renegotiate supplier pricing to save $150
+
+WINS
+• Profitable every week this period
+
+RECOMMENDATIONS
+1. Review weekly labor against sales
+2. Bundle supply orders to cut costs
+3. Track waste on top ingredients"""
+
+def _table_after(prompt: str, header: str) -> Optional[list]:
+    """Parse the one-line JSON table that follows a header in a prompt_builder prompt"""
+    idx = prompt.find(header)
+    if idx < 0:
+        return None
+    line = prompt[idx + len(header):].lstrip("\n").split("\n", 1)[0]
+    try:
+        return json.loads(line)
+    except ValueError:
+        return None
+
+def _fake_orders(prompt: str) -> Optional[str]:
+    rows = _table_after(prompt, "Items as [id,current,min]:")
+    if rows is None:
+        return None
+    orders = [[item_id, max(0, round((minimum - current) * 1.2))] for item_id, current, minimum in rows]
+    return json.dumps({"orders": orders}, separators=(",", ":"))
+
+def _fake_shifts(prompt: str) -> Optional[str]:
+    employees = _table_after(prompt, "Available Employees as [id,name,strength,day mask]:")
+    if employees is None:
+        return None
+    slots = _table_after(prompt, "Shift Slots as [name,start,end,required_count,day mask]:") or []
+
+    required = {}
+    marker = "Required staff per day:"
+    if marker in prompt:
+        for part in prompt.split(marker, 1)[1].split("\n", 1)[0].split():
+            day, _, count = part.partition(":")
+            if count.isdigit():
+                required[day] = int(count)
+
+    # Fewest-shifts-first round robin, one shift per employee per day
+    load = {emp[0]: 0 for emp in employees}
+    shifts = []
+    for d, day in enumerate(DAYS):
+        if slots:
+            openings = [(slot[1], slot[2]) for slot in slots if slot[4][d] == "1" for _ in range(slot[3])]
+        else:
+            openings = [("09:00", "17:00")] * required.get(day, 0)
+        free = [emp[0] for emp in employees if emp[3][d] == "1"]
+        for start, end in openings:
+            if not free:
+                break
+            free.sort(key=lambda short_id: load[short_id])
+            short_id = free.pop(0)
+            load[short_id] += 1
+            shifts.append([short_id, day, start, end])
+    return json.dumps({"shifts": shifts}, separators=(",", ":"))
+
+class FakeLLMBackend(LLMBackend):
+    name = "fake"
+
+    def __init__(self, model_id: str):
+        self.model_id = f"fake/{model_id}"
+        self.latency_ms = float(os.getenv("LLM_FAKE_LATENCY_MS", "0"))
+        self.ms_per_token = float(os.getenv("LLM_FAKE_MS_PER_TOKEN", "0"))
+        self.replay_path = os.getenv("LLM_REPLAY_FILE") or None
+
+        # prompt fingerprint -> completion
+        self.replay: Dict[str, str] = {}
+        if self.replay_path and os.path.exists(self.replay_path):
+            with open(self.replay_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        record = json.loads(line)
+                        self.replay[record["prompt_sha256"]] = record["response"]
+
+        self.calls = 0
+        self.replayed = 0
+        self._lock = threading.Lock()
+
+        print("=" * 60)
+        print("🧪 LLM BACKEND: FAKE (offline, deterministic)")
+        print(f"Latency: {self.latency_ms:.0f}ms + {self.ms_per_token:.1f}ms/token")
+        print(f"Replay: {len(self.replay)} recorded completions" if self.replay_path else "Replay: off")
+        print("=" * 60)
+
+    def _complete(self, prompt: str) -> str:
+        recorded = self.replay.get(prompt_fingerprint(prompt))
+        with self._lock:
+            self.calls += 1
+            if recorded is not None:
+                self.replayed += 1
+        if recorded is not None:
+            return recorded
+        if "KEY INSIGHTS" in prompt:
+            return FAKE_ANALYSIS
+        return _fake_orders(prompt) or _fake_shifts(prompt) or "OK"
+
+    def generate(self, prompt: str, parameters: Dict[str, Any]) -> LLMResult:
+        text = self._complete(prompt)
+        completion_tokens = estimate_tokens(text)
+        time.sleep((self.latency_ms + self.ms_per_token * completion_tokens) / 1000)
+        return LLMResult(text, estimate_tokens(prompt), completion_tokens, "eos_token")
+
+    def stream(self, prompt: str, parameters: Dict[str, Any]) -> Iterator[str]:
+        text = self._complete(prompt)
+        time.sleep(self.latency_ms / 1000)
+        for i, word in enumerate(text.split(" ")):
+            time.sleep(self.ms_per_token / 1000)
+            yield word if i == 0 else " " + word
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**super().stats(), "calls": self.calls, "replayed": self.replayed}
+
+BACKENDS = {
+    "watsonx": WatsonXBackend,
+    "fake": FakeLLMBackend
+}
+
+def create_backend(model_id: str, name: Optional[str] = None) -> LLMBackend:
+    name = (name or os.getenv("LLM_BACKEND", "watsonx")).lower()
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown LLM_BACKEND '{name}' (expected one of: {', '.join(BACKENDS)})")
+    return BACKENDS[name](model_id)
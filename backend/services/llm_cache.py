@@ -0,0 +1,166 @@
+"""
+Content-addressed LLM response cache
+Greedy decoding is deterministic, so a completion is keyed by a hash of
+business, model, parameters and the canonicalized prompt. Entries live in an
+LRU memory tier with an optional on-disk tier (LLM_CACHE_DIR), both with TTLs.
+Tenants are isolated: the business is part of every key, disk entries are
+partitioned per business, and each business has its own memory quota.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+from dotenv import load_dotenv
+
+load_dotenv()
+
+def canonicalize_prompt(prompt: str) -> str:
+    """Normalize line endings and trailing whitespace so cosmetic differences still hit"""
+    lines = prompt.replace("\r\n", "\n").split("\n")
+    return "\n".join(line.rstrip() for line in lines).strip()
+
+def make_cache_key(business_id: str, model_id: str, parameters: Dict[str, Any], prompt: str) -> str:
+    material = json.dumps({
+        "business_id": business_id,
+        "model_id": model_id,
+        "parameters": parameters,
+        "prompt": canonicalize_prompt(prompt)
+    }, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+class LLMResponseCache:
+    def __init__(self):
+        self.enabled = os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true"
+        self.max_entries = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "512"))
+        self.max_entries_per_tenant = int(os.getenv("LLM_CACHE_MAX_ENTRIES_PER_TENANT", "64"))
+        self.default_ttl = float(os.getenv("LLM_CACHE_TTL_SECONDS", "3600"))
+        self.disk_dir = os.getenv("LLM_CACHE_DIR") or None
+
+        # key -> (expires_at, business_id, value)
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        # business_id -> keys in LRU order, for per-tenant quotas and invalidation
+        self._tenant_keys: Dict[str, "OrderedDict[str, None]"] = {}
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    # ==================== MEMORY TIER ====================
+
+    def _drop(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry:
+            tenant = self._tenant_keys.get(entry[1])
+            if tenant is not None:
+                tenant.pop(key, None)
+                if not tenant:
+                    del self._tenant_keys[entry[1]]
+
+    def _store(self, business_id: str, key: str, value: Any, expires_at: float):
+        self._drop(key)
+        tenant = self._tenant_keys.setdefault(business_id, OrderedDict())
+        while len(tenant) >= self.max_entries_per_tenant:
+            self._drop(next(iter(tenant)))
+            tenant = self._tenant_keys.setdefault(business_id, OrderedDict())
+        while len(self._entries) >= self.max_entries:
+            self._drop(next(iter(self._entries)))
+        self._entries[key] = (expires_at, business_id, value)
+        self._tenant_keys.setdefault(business_id, OrderedDict())[key] = None
+
+    # ==================== DISK TIER ====================
+
+    def _disk_path(self, business_id: str, key: str) -> str:
+        tenant_dir = hashlib.sha256(business_id.encode("utf-8")).hexdigest()[:16]
+        return os.path.join(self.disk_dir, tenant_dir, f"{key}.json")
+
+    def _disk_get(self, business_id: str, key: str) -> Optional[tuple]:
+        path = self._disk_path(business_id, key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                record = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if record.get("expires_at", 0) <= time.time():
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None
+        return record["expires_at"], record["value"]
+
+    def _disk_set(self, business_id: str, key: str, value: Any, expires_at: float):
+        path = self._disk_path(business_id, key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"expires_at": expires_at, "value": value}, f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"[LLM CACHE] Disk write failed: {e}")
+
+    # ==================== PUBLIC API ====================
+
+    def get(self, business_id: str, key: str) -> Optional[Any]:
+        if not self.enabled:
+            return None
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry:
+                expires_at, _, value = entry
+                if expires_at > time.time():
+                    self._entries.move_to_end(key)
+                    self._tenant_keys[business_id].move_to_end(key)
+                    self.hits += 1
+                    return value
+                self._drop(key)
+
+        if self.disk_dir:
+            record = self._disk_get(business_id, key)
+            if record:
+                expires_at, value = record
+                with self._lock:
+                    self._store(business_id, key, value, expires_at)
+                    self.hits += 1
+                    self.disk_hits += 1
+                return value
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def set(self, business_id: str, key: str, value: Any, ttl: Optional[float] = None):
+        if not self.enabled:
+            return
+        expires_at = time.time() + (ttl if ttl is not None else self.default_ttl)
+        with self._lock:
+            self._store(business_id, key, value, expires_at)
+        if self.disk_dir:
+            self._disk_set(business_id, key, value, expires_at)
+
+    def invalidate_business(self, business_id: str):
+        """Forget every memory entry for one business (disk entries expire by TTL)"""
+        with self._lock:
+            for key in list(self._tenant_keys.get(business_id, {})):
+                self._drop(key)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._entries),
+                "tenants": len(self._tenant_keys),
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0
+            }
+
+# Singleton instance
+llm_cache = LLMResponseCache()
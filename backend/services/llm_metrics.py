@@ -0,0 +1,186 @@
+"""
+In-process instrumentation for LLM calls
+Every generate call records queue wait, model latency, prompt/completion tokens,
+cache hit/miss and outcome; parsers record whether the answer could be used.
+Figures are aggregated into fixed-bucket histograms per operation, both overall
+and per business, for capacity planning. Nothing leaves the process.
+"""
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+from dotenv import load_dotenv
+
+load_dotenv()
+
+LATENCY_BUCKETS_MS = [50, 100, 250, 500, 1000, 2500, 5000, 10000, 20000, 30000, 60000]
+TOKEN_BUCKETS = [64, 128, 256, 512, 1024, 2048, 4096, 8192]
+
+class Histogram:
+    """Fixed upper-bound buckets plus count/sum/min/max; percentiles are bucket estimates"""
+    def __init__(self, bounds: List[float]):
+        self.bounds = bounds
+        # One extra bucket for values above the last bound
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+
+    def observe(self, value: float):
+        i = 0
+        while i < len(self.bounds) and value > self.bounds[i]:
+            i += 1
+        self.counts[i] += 1
+        self.count += 1
+        self.total += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def percentile(self, pct: float) -> Optional[float]:
+        """Upper bound of the bucket holding the pct-th value (max for the overflow bucket)"""
+        if not self.count:
+            return None
+        rank = pct / 100 * self.count
+        seen = 0
+        for i, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= rank and bucket_count:
+                return self.bounds[i] if i < len(self.bounds) else self.max
+        return self.max
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "avg": round(self.total / self.count, 1) if self.count else None,
+            "min": self.min,
+            "max": self.max,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99),
+            "buckets": {
+                **{f"le_{bound}": count for bound, count in zip(self.bounds, self.counts)},
+                "inf": self.counts[-1]
+            }
+        }
+
+class OperationStats:
+    def __init__(self):
+        self.queue_wait_ms = Histogram(LATENCY_BUCKETS_MS)
+        self.latency_ms = Histogram(LATENCY_BUCKETS_MS)
+        self.prompt_tokens = Histogram(TOKEN_BUCKETS)
+        self.completion_tokens = Histogram(TOKEN_BUCKETS)
+        # ok / timeout / error / circuit_open
+        self.outcomes: Dict[str, int] = {}
+        # ok / invalid / ... as reported by the parser
+        self.parse_outcomes: Dict[str, int] = {}
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def snapshot(self) -> Dict[str, Any]:
+        lookups = self.cache_hits + self.cache_misses
+        return {
+            "queue_wait_ms": self.queue_wait_ms.snapshot(),
+            "latency_ms": self.latency_ms.snapshot(),
+            "prompt_tokens": self.prompt_tokens.snapshot(),
+            "completion_tokens": self.completion_tokens.snapshot(),
+            "prompt_tokens_total": int(self.prompt_tokens.total),
+            "completion_tokens_total": int(self.completion_tokens.total),
+            "outcomes": dict(self.outcomes),
+            "parse_outcomes": dict(self.parse_outcomes),
+            "cache": {
+                "hits": self.cache_hits,
+                "misses": self.cache_misses,
+                "hit_rate": round(self.cache_hits / lookups, 3) if lookups else 0.0
+            }
+        }
+
+class LLMMetrics:
+    def __init__(self):
+        self.enabled = os.getenv("LLM_METRICS_ENABLED", "true").lower() == "true"
+        # Oldest-touched businesses are dropped past this many
+        self.max_tenants = int(os.getenv("LLM_METRICS_MAX_TENANTS", "1000"))
+
+        self._overall: Dict[str, OperationStats] = {}
+        # business_id -> operation -> stats, in least-recently-touched order
+        self._tenants: "OrderedDict[str, Dict[str, OperationStats]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _targets(self, operation: str, business_id: Optional[str]) -> List[OperationStats]:
+        # Caller holds the lock
+        targets = [self._overall.setdefault(operation, OperationStats())]
+        if business_id:
+            tenant = self._tenants.get(business_id)
+            if tenant is None:
+                tenant = self._tenants[business_id] = {}
+                while len(self._tenants) > self.max_tenants:
+                    self._tenants.popitem(last=False)
+            else:
+                self._tenants.move_to_end(business_id)
+            targets.append(tenant.setdefault(operation, OperationStats()))
+        return targets
+
+    def record_call(
+        self,
+        operation: str,
+        business_id: Optional[str],
+        outcome: str,
+        queue_wait_ms: Optional[float] = None,
+        latency_ms: Optional[float] = None,
+        prompt_tokens: Optional[int] = None,
+        completion_tokens: Optional[int] = None
+    ):
+        """One model call (not a cache hit)"""
+        if not self.enabled:
+            return
+        with self._lock:
+            for stats in self._targets(operation, business_id):
+                stats.outcomes[outcome] = stats.outcomes.get(outcome, 0) + 1
+                for histogram, value in (
+                    (stats.queue_wait_ms, queue_wait_ms),
+                    (stats.latency_ms, latency_ms),
+                    (stats.prompt_tokens, prompt_tokens),
+                    (stats.completion_tokens, completion_tokens)
+                ):
+                    if value is not None:
+                        histogram.observe(value)
+
+    def record_cache(self, operation: str, business_id: Optional[str], hit: bool):
+        if not self.enabled:
+            return
+        with self._lock:
+            for stats in self._targets(operation, business_id):
+                if hit:
+                    stats.cache_hits += 1
+                else:
+                    stats.cache_misses += 1
+
+    def record_parse(self, operation: str, business_id: Optional[str], outcome: str):
+        """Whether the model's answer could be used: "ok", "invalid", ..."""
+        if not self.enabled:
+            return
+        with self._lock:
+            for stats in self._targets(operation, business_id):
+                stats.parse_outcomes[outcome] = stats.parse_outcomes.get(outcome, 0) + 1
+
+    def snapshot(self, business_id: Optional[str] = None, include_overall: bool = True) -> Dict[str, Any]:
+        """
+        Overall per-operation stats, plus one business's breakdown when given.
+        include_overall=False leaves out the process-wide figures (every tenant's traffic).
+        """
+        with self._lock:
+            result = {}
+            if include_overall:
+                result["operations"] = {op: stats.snapshot() for op, stats in self._overall.items()}
+            if business_id:
+                tenant = self._tenants.get(business_id, {})
+                result["business"] = {op: stats.snapshot() for op, stats in tenant.items()}
+            return result
+
+    def reset(self):
+        with self._lock:
+            self._overall.clear()
+            self._tenants.clear()
+
+# Singleton instance
+llm_metrics = LLMMetrics()
@@ -0,0 +1,124 @@
+"""
+Debounced low stock digest
+Collects threshold crossings per business over a window and queues one combined
+alert instead of one email per item. Items that recover before the window closes
+are dropped, and an item that bounces across the threshold appears only once.
+Pending items are stored in low_stock_digest_items (migration 023), so they survive
+restarts and all app processes share one digest per business; flush_low_stock_digests
+moves closed windows into email_outbox in one transaction.
+"""
+import os
+import threading
+from typing import Dict, Optional
+from dotenv import load_dotenv
+from db import get_supabase
+from services.email_outbox import email_outbox
+
+load_dotenv()
+
+ITEM_FIELDS = ("name", "current_quantity", "minimum_quantity", "unit")
+
+class LowStockDigest:
+    def __init__(self):
+        self.window_seconds = float(os.getenv("LOW_STOCK_DIGEST_WINDOW_SECONDS", "300"))
+        # How often each process checks for closed windows
+        self.poll_seconds = float(os.getenv("LOW_STOCK_DIGEST_POLL_SECONDS", "30"))
+
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def record_crossing(
+        self,
+        business_id: str,
+        business_name: str,
+        to_email: str,
+        item: Dict,
+        logo_url: Optional[str] = None
+    ):
+        """Item just dropped below its minimum - add it to the business's open digest"""
+        # Upsert keeps created_at, so the window still runs from the first crossing
+        try:
+            get_supabase().table("low_stock_digest_items").upsert({
+                "business_id": business_id,
+                "item_id": item["id"],
+                "to_email": to_email,
+                "business_name": business_name,
+                "logo_url": logo_url,
+                "item": {k: item[k] for k in ITEM_FIELDS}
+            }, on_conflict="business_id,item_id,to_email").execute()
+        except Exception as e:
+            # An alert problem never fails the inventory update
+            print(f"[DIGEST] Failed to record {item.get('name')}: {type(e).__name__}: {e}")
+            return
+
+        if self.window_seconds <= 0:
+            self.flush_due()
+
+    def refresh_item(self, business_id: str, item: Dict):
+        """Item is still low - keep the quantity shown in an open digest current"""
+        try:
+            get_supabase().table("low_stock_digest_items")\
+                .update({"item": {k: item[k] for k in ITEM_FIELDS}})\
+                .eq("business_id", business_id)\
+                .eq("item_id", item["id"])\
+                .execute()
+        except Exception as e:
+            print(f"[DIGEST] Failed to refresh {item.get('name')}: {type(e).__name__}: {e}")
+
+    def record_recovery(self, business_id: str, item_id: int):
+        """Item climbed back above its minimum before the digest went out - drop it"""
+        try:
+            get_supabase().table("low_stock_digest_items")\
+                .delete()\
+                .eq("business_id", business_id)\
+                .eq("item_id", item_id)\
+                .execute()
+        except Exception as e:
+            print(f"[DIGEST] Failed to drop item {item_id}: {type(e).__name__}: {e}")
+
+    def flush_due(self, force: bool = False) -> int:
+        """Queue every digest whose window has closed; returns the number of emails queued"""
+        try:
+            result = get_supabase().rpc("flush_low_stock_digests", {
+                "p_window_seconds": int(self.window_seconds),
+                "p_max_attempts": email_outbox.max_attempts,
+                "p_force": force
+            }).execute()
+        except Exception as e:
+            print(f"[DIGEST] Flush failed: {type(e).__name__}: {e}")
+            return 0
+
+        queued = result.data or 0
+        if queued:
+            print(f"🔔 Queued {queued} low stock digest email(s)")
+            email_outbox.wake()
+        return queued
+
+    # ==================== FLUSHER ====================
+
+    def start(self):
+        """Start the background flusher (idempotent)"""
+        if self._thread:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="low-stock-digest", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the flusher; open digests stay in the table for the next run"""
+        self._stop.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout=5.0)
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(timeout=self.poll_seconds)
+            self._wake.clear()
+            if not self._stop.is_set():
+                self.flush_due()
+
+# Singleton instance
+low_stock_digest = LowStockDigest()
@@ -0,0 +1,217 @@
+"""
+Nightly all-tenant low stock sweep
+Pages through the low_stock_inventory view in (business_id, id) order, so each
+business's items arrive contiguously, and queues one digest per business with
+bounded concurrency. Run in-process on a daily timer or from cron:
+
+    python -m services.low_stock_sweep
+
+Each day is claimed in low_stock_sweep_runs first (migration 024), so with several
+workers or replicas only one of them sends that day's digests.
+"""
+import os
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterator, List, Optional, Tuple
+from dotenv import load_dotenv
+from db import get_supabase
+from services.email_outbox import email_outbox
+
+load_dotenv()
+
+class LowStockSweep:
+    def __init__(self):
+        self.page_size = int(os.getenv("LOW_STOCK_SWEEP_PAGE_SIZE", "1000"))
+        self.concurrency = int(os.getenv("LOW_STOCK_SWEEP_CONCURRENCY", "8"))
+        # Businesses whose names/recipients are looked up per query
+        self.tenant_batch_size = int(os.getenv("LOW_STOCK_SWEEP_TENANT_BATCH", "50"))
+        self.enabled = os.getenv("LOW_STOCK_SWEEP_ENABLED", "true").lower() == "true"
+        # Daily run time, UTC, "HH:MM"
+        self.run_at = os.getenv("LOW_STOCK_SWEEP_TIME_UTC", "02:00")
+
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # ==================== SWEEP ====================
+
+    def _iter_low_stock_pages(self) -> Iterator[List[Dict]]:
+        """Keyset pagination over (business_id, id) - no OFFSET, so late pages stay cheap"""
+        supabase = get_supabase()
+        last: Optional[Tuple[str, int]] = None
+
+        while True:
+            query = supabase.table("low_stock_inventory")\
+                .select("id, business_id, name, current_quantity, minimum_quantity, unit")
+
+            if last:
+                business_id, item_id = last
+                query = query.or_(
+                    f"business_id.gt.{business_id},"
+                    f"and(business_id.eq.{business_id},id.gt.{item_id})"
+                )
+
+            result = query.order("business_id").order("id").limit(self.page_size).execute()
+            if not result.data:
+                return
+
+            yield result.data
+
+            if len(result.data) < self.page_size:
+                return
+            tail = result.data[-1]
+            last = (tail["business_id"], tail["id"])
+
+    def _iter_tenant_groups(self) -> Iterator[Tuple[str, List[Dict]]]:
+        """Group the ordered stream into (business_id, items) as each business completes"""
+        current_id, items = None, []
+        for page in self._iter_low_stock_pages():
+            for row in page:
+                if row["business_id"] != current_id:
+                    if items:
+                        yield current_id, items
+                    current_id, items = row["business_id"], []
+                items.append(row)
+        if items:
+            yield current_id, items
+
+    def _queue_digests(self, groups: List[Tuple[str, List[Dict]]]) -> int:
+        """Look up branding and admin recipients for a batch of businesses, then queue digests"""
+        supabase = get_supabase()
+        business_ids = [business_id for business_id, _ in groups]
+
+        businesses_result = supabase.table("businesses")\
+            .select("id, name, logo_url")\
+            .in_("id", business_ids)\
+            .execute()
+        businesses = {b["id"]: b for b in businesses_result.data}
+
+        admins_result = supabase.table("profiles")\
+            .select("business_id, email")\
+            .in_("business_id", business_ids)\
+            .eq("is_admin", True)\
+            .eq("is_active", True)\
+            .execute()
+        recipients: Dict[str, List[str]] = {}
+        for admin in admins_result.data:
+            if admin.get("email"):
+                recipients.setdefault(admin["business_id"], []).append(admin["email"])
+
+        messages = []
+        for business_id, items in groups:
+            business = businesses.get(business_id, {})
+            payload = {
+                "business_name": business.get("name"),
+                "logo_url": business.get("logo_url"),
+                "items": [
+                    {k: item[k] for k in ("name", "current_quantity", "minimum_quantity", "unit")}
+                    for item in items
+                ]
+            }
+            for to_email in recipients.get(business_id, []):
+                messages.append({
+                    "business_id": business_id,
+                    "to_email": to_email,
+                    "kind": "low_stock_alert",
+                    "payload": payload
+                })
+
+        email_outbox.enqueue_many(messages)
+        return len(messages)
+
+    def run(self) -> Dict:
+        """Run one sweep across every business; returns counts"""
+        started = time.monotonic()
+        stats = {"businesses": 0, "items": 0, "emails_queued": 0, "failed_batches": 0}
+        print("🌙 Low stock sweep started")
+
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="low-stock-sweep") as executor:
+            futures, batch = [], []
+            for business_id, items in self._iter_tenant_groups():
+                stats["businesses"] += 1
+                stats["items"] += len(items)
+                batch.append((business_id, items))
+                if len(batch) >= self.tenant_batch_size:
+                    futures.append(executor.submit(self._queue_digests, batch))
+                    batch = []
+            if batch:
+                futures.append(executor.submit(self._queue_digests, batch))
+
+            for future in futures:
+                try:
+                    stats["emails_queued"] += future.result()
+                except Exception as e:
+                    stats["failed_batches"] += 1
+                    print(f"[SWEEP] Batch failed: {type(e).__name__}: {e}")
+
+        stats["duration_seconds"] = round(time.monotonic() - started, 2)
+        print(f"🌙 Low stock sweep finished: {stats}")
+        return stats
+
+    # ==================== SCHEDULER ====================
+
+    def claim_day(self, sweep_date: str) -> bool:
+        """Claim a sweep day; False if another process already has it"""
+        result = get_supabase().table("low_stock_sweep_runs")\
+            .upsert(
+                {"sweep_date": sweep_date, "claimed_by": f"{socket.gethostname()}:{os.getpid()}"},
+                on_conflict="sweep_date",
+                ignore_duplicates=True
+            )\
+            .execute()
+        return bool(result.data)
+
+    def run_once_for_today(self) -> Optional[Dict]:
+        """Run today's sweep unless another process has claimed it; returns counts when it ran"""
+        sweep_date = datetime.now(timezone.utc).date().isoformat()
+        if not self.claim_day(sweep_date):
+            print(f"🌙 Low stock sweep for {sweep_date} already claimed by another process")
+            return None
+
+        stats = self.run()
+        try:
+            get_supabase().table("low_stock_sweep_runs")\
+                .update({"finished_at": datetime.now(timezone.utc).isoformat(), "stats": stats})\
+                .eq("sweep_date", sweep_date)\
+                .execute()
+        except Exception as e:
+            print(f"[SWEEP] Failed to record sweep stats: {type(e).__name__}: {e}")
+        return stats
+
+    def _seconds_until_next_run(self) -> float:
+        hour, minute = (int(part) for part in self.run_at.split(":"))
+        now = datetime.now(timezone.utc)
+        next_run = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+        if next_run <= now:
+            next_run += timedelta(days=1)
+        return (next_run - now).total_seconds()
+
+    def start(self):
+        """Start the daily timer (no-op when disabled or already running)"""
+        if not self.enabled or self._thread:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run_forever, name="low-stock-sweep-timer", daemon=True)
+        self._thread.start()
+        print(f"🌙 Low stock sweep scheduled daily at {self.run_at} UTC")
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5.0)
+            self._thread = None
+
+    def _run_forever(self):
+        while not self._stop.wait(timeout=self._seconds_until_next_run()):
+            try:
+                self.run_once_for_today()
+            except Exception as e:
+                print(f"[SWEEP] Sweep failed: {type(e).__name__}: {e}")
+
+# Singleton instance
+low_stock_sweep = LowStockSweep()
+
+if __name__ == "__main__":
+    low_stock_sweep.run_once_for_today()
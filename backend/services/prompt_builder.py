@@ -0,0 +1,234 @@
+"""
+Compact prompt builder for the WatsonX scheduling and ordering prompts
+Inputs are encoded as short-id tables instead of indented JSON: employees get
+ids like e1, availability is a 7-character day bitmask, identical shift slots
+are stored once with the days they apply to, and the model answers in
+positional rows. Each prompt carries a token estimate and a MAX_NEW_TOKENS
+budget sized to the answer it expects.
+"""
+import json
+import math
+import os
+from typing import Any, Callable, Dict, List, Optional
+from dotenv import load_dotenv
+
+load_dotenv()
+
+DAYS = ["mon", "tue", "wed", "thu", "fri", "sat", "sun"]
+DAY_MASK_LEGEND = "day mask = 7 chars for mon..sun, 1 = yes"
+STORE_HOURS_KEYS = {
+    "monday": "mon", "tuesday": "tue", "wednesday": "wed", "thursday": "thu",
+    "friday": "fri", "saturday": "sat", "sunday": "sun"
+}
+
+# Llama-3 averages a little under 4 characters per token on this kind of text
+CHARS_PER_TOKEN = float(os.getenv("PROMPT_CHARS_PER_TOKEN", "3.5"))
+MAX_NEW_TOKENS_FLOOR = int(os.getenv("WATSONX_MIN_BUDGET_TOKENS", "64"))
+MAX_NEW_TOKENS_CAP = int(os.getenv("WATSONX_MAX_NEW_TOKENS_CAP", "4096"))
+
+# Expected cost of one answer row, e.g. ["e12","fri","09:00","17:00"],
+SCHEDULE_ROW_TOKENS = 16
+ORDER_ROW_TOKENS = 7
+ANSWER_OVERHEAD_TOKENS = 24
+# Headroom for models that add a word or two around the JSON
+BUDGET_MARGIN = 1.25
+
+INVENTORY_EXAMPLE = {"orders": [[101, 15]]}
+SCHEDULE_EXAMPLE = {"shifts": [["e1", "fri", "09:00", "17:00"]]}
+
+def compact_json(value: Any) -> str:
+    return json.dumps(value, separators=(",", ":"))
+
+def estimate_tokens(text: str) -> int:
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+def token_budget(rows: int, row_tokens: int) -> int:
+    """MAX_NEW_TOKENS for an answer of `rows` positional rows"""
+    expected = ANSWER_OVERHEAD_TOKENS + rows * row_tokens
+    return max(MAX_NEW_TOKENS_FLOOR, min(MAX_NEW_TOKENS_CAP, math.ceil(expected * BUDGET_MARGIN)))
+
+def day_mask(days: List[str]) -> str:
+    """["mon", "fri"] -> "1000100" """
+    selected = set(days)
+    return "".join("1" if day in selected else "0" for day in DAYS)
+
+def short_time(value: Optional[str]) -> Optional[str]:
+    """"09:00:00" -> "09:00" """
+    return value[:5] if value else value
+
+class BuiltPrompt:
+    def __init__(
+        self,
+        prompt: str,
+        max_new_tokens: int,
+        decode: Callable[[Dict, List[Any]], Optional[List[Dict]]],
+        example: Dict
+    ):
+        self.prompt = prompt
+        self.max_new_tokens = max_new_tokens
+        self.estimated_tokens = estimate_tokens(prompt)
+        # Turns the model's compact JSON answer back into full records: rows that don't fit are
+        # skipped and kept in `rejected`; None if the answer has no usable rows at all
+        self._decode = decode
+        self.rejected: List[Any] = []
+        # Format example shown in the prompt - skipped if the model echoes it
+        self.example = example
+
+    def decode(self, obj: Dict) -> Optional[List[Dict]]:
+        self.rejected = []
+        return self._decode(obj, self.rejected)
+
+# ==================== INVENTORY ====================
+
+def build_inventory_prompt(items: List[Dict[str, Any]]) -> BuiltPrompt:
+    """Items are [{"id", "name", "current", "min"}]; decode returns [{"id", "order_qty"}]"""
+    rows = [[item["id"], item["current"], item["min"]] for item in items]
+
+    prompt = f"""You are an inventory management AI. Given a list of items with current and minimum quantities, calculate how much to order for each item.
+
+Rules:
+- If current >= min: order_qty = 0 (no order needed)
+- If current < min: order_qty = (min - current) + buffer
+- Add a 20% buffer for items marked as low stock
+- Return ONLY valid JSON, no explanations
+
+Items as [id,current,min]:
+{compact_json(rows)}
+
+Return a JSON object with one [id,order_qty] row per item, e.g.:
+{compact_json(INVENTORY_EXAMPLE)}
+
+JSON Response:"""
+
+    item_ids = {item["id"] for item in items}
+
+    def decode(obj: Dict, rejected: List[Any]) -> Optional[List[Dict]]:
+        orders = obj.get("orders")
+        if not isinstance(orders, list):
+            return None
+        decoded = []
+        for row in orders:
+            if not (isinstance(row, list) and len(row) == 2 and row[0] in item_ids):
+                rejected.append(row)
+                continue
+            decoded.append({"id": row[0], "order_qty": row[1]})
+        return decoded if decoded or not orders else None
+
+    return BuiltPrompt(prompt, token_budget(len(items), ORDER_ROW_TOKENS), decode, INVENTORY_EXAMPLE)
+
+# ==================== SCHEDULE ====================
+
+def _slot_table(shift_slots: List[Dict]) -> List[List]:
+    """Identical slots on several days collapse into one [name,start,end,count,day mask] row"""
+    grouped: Dict[tuple, List[str]] = {}
+    for slot in shift_slots:
+        key = (
+            slot["slot_name"],
+            short_time(slot["start_time"]),
+            short_time(slot["end_time"]),
+            slot.get("required_count") or 1
+        )
+        grouped.setdefault(key, []).append(slot["day_of_week"])
+    return [[*key, day_mask(days)] for key, days in grouped.items()]
+
+def _store_hours_line(store_hours: Dict) -> str:
+    parts = []
+    for name, day in STORE_HOURS_KEYS.items():
+        hours = store_hours.get(name) or store_hours.get(day)
+        if not hours:
+            continue
+        if hours.get("closed"):
+            parts.append(f"{day} closed")
+        else:
+            parts.append(f"{day} {short_time(hours.get('open_time'))}-{short_time(hours.get('close_time'))}")
+    return ", ".join(parts)
+
+def expected_shift_count(staffing_rules: List[Dict], shift_slots: Optional[List[Dict]]) -> int:
+    if shift_slots:
+        return sum(slot.get("required_count") or 1 for slot in shift_slots)
+    return sum(rule.get("required") or 0 for rule in staffing_rules)
+
+def build_schedule_prompt(
+    week_start: str,
+    staffing_rules: List[Dict],
+    employees: List[Dict],
+    preferences: str = "",
+    current_schedule: Optional[List[Dict]] = None,
+    store_hours: Optional[Dict] = None,
+    shift_slots: Optional[List[Dict]] = None
+) -> BuiltPrompt:
+    """Decode returns [{"employee_id", "day", "start_time", "end_time"}] with real employee ids"""
+    short_ids = {emp["id"]: f"e{i}" for i, emp in enumerate(employees, start=1)}
+    long_ids = {short: emp_id for emp_id, short in short_ids.items()}
+
+    employee_rows = [
+        [short_ids[emp["id"]], emp.get("full_name"), emp.get("strength", "normal"), day_mask(emp.get("availability", []))]
+        for emp in employees
+    ]
+    requirements = " ".join(f"{rule['day']}:{rule['required']}" for rule in staffing_rules)
+
+    preferences_section = f"\n\nAdditional Preferences:\n{preferences}\n" if preferences and preferences.strip() else ""
+
+    current_schedule_section = ""
+    if current_schedule:
+        current_rows = [
+            [short_ids[s["employee_id"]], s["day_of_week"], short_time(s["start_time"]), short_time(s["end_time"])]
+            for s in current_schedule
+            if s.get("employee_id") in short_ids
+        ]
+        if current_rows:
+            current_schedule_section = f"\n\nCurrent Schedule as [employee,day,start,end] (you can modify/improve this):\n{compact_json(current_rows)}\n"
+
+    store_hours_section = ""
+    if store_hours:
+        store_hours_section = f"\n\nStore Hours (schedule shifts within these times):\n{_store_hours_line(store_hours)}\n"
+
+    shift_slots_section = ""
+    if shift_slots:
+        shift_slots_section = f"\n\nShift Slots as [name,start,end,required_count,day mask] (assign employees to these specific time slots):\n{compact_json(_slot_table(shift_slots))}\n"
+
+    prompt = f"""You are a scheduling AI for a small business. Create an optimal employee schedule.
+
+Rules:
+1. ONLY schedule employees who are available that day
+2. NEVER schedule the same employee twice in one day
+3. Meet the required staff count for each day
+4. ONLY schedule shifts during store operating hours (ignore closed days)
+5. IMPORTANT: If shift slots are provided, you MUST use ONLY those exact time slots. Match employees to the configured slots - DO NOT create custom times. Each shift MUST use the start and end of one of the shift slots for that day.
+6. Pair SHIFTLEADER employees with NEW employees when possible
+7. Distribute shifts evenly across employees
+8. If not enough staff available, schedule as many as possible
+9. When shift slots are configured, create one shift per slot per employee (respecting the required_count for each slot){preferences_section}
+
+Week Start: {week_start}
+({DAY_MASK_LEGEND})
+
+Required staff per day: {requirements}{store_hours_section}{shift_slots_section}
+
+Available Employees as [id,name,strength,day mask]:
+{compact_json(employee_rows)}{current_schedule_section}
+
+Return ONLY valid JSON with one [employee_id,day,start,end] row per shift, e.g.:
+{compact_json(SCHEDULE_EXAMPLE)}
+
+JSON Response:"""
+
+    def decode(obj: Dict, rejected: List[Any]) -> Optional[List[Dict]]:
+        shifts = obj.get("shifts")
+        if not isinstance(shifts, list):
+            return None
+        decoded = []
+        for row in shifts:
+            if not (isinstance(row, list) and len(row) == 4 and row[0] in long_ids and row[1] in DAYS):
+                rejected.append(row)
+                continue
+            decoded.append({
+                "employee_id": long_ids[row[0]],
+                "day": row[1],
+                "start_time": row[2],
+                "end_time": row[3]
+            })
+        return decoded if decoded or not shifts else None
+
+    budget = token_budget(expected_shift_count(staffing_rules, shift_slots), SCHEDULE_ROW_TOKENS)
+    return BuiltPrompt(prompt, budget, decode, SCHEDULE_EXAMPLE)
@@ -20,44 +20,101 @@ def get_week_days(week_start_str: str) -> Dict[str, str]:
     
     return result
 
-def validate_schedule(shifts: List[Dict], employees: List[Dict]) -> Dict:
+def to_minutes(value: str) -> int:
+    """"09:30" or "09:30:00" -> 570"""
+    hours, minutes = value.split(":")[:2]
+    return int(hours) * 60 + int(minutes)
+
+def _issue(issues: List[Dict], severity: str, code: str, message: str, **details):
+    issues.append({"severity": severity, "code": code, "message": message, **details})
+
+def validate_schedule(
+    shifts: List[Dict],
+    employees: List[Dict],
+    store_hours: Dict = None,
+    shift_slots: List[Dict] = None
+) -> Dict:
     """
     Validate generated schedule for conflicts.
-    Returns: {"valid": bool, "errors": [], "warnings": []}
+    Errors: unknown employee, not available, invalid times, overlapping or second shifts
+    on a day, shifts on a closed day, and off-slot shifts outside store hours.
+    Warnings: times that match no configured slot on a day that has slots.
+    Returns: {"valid": bool, "errors": [], "warnings": [], "issues": [{"severity", "code", "message", ...}]}
     """
-    errors = []
-    warnings = []
-    
-    # Track employee assignments per day
-    day_assignments: Dict[str, Set[int]] = {}
-    
-    for shift in shifts:
+    issues: List[Dict] = []
+    employees_by_id = {emp["id"]: emp for emp in employees}
+    availability = {emp["id"]: set(emp.get("availability", [])) for emp in employees}
+
+    slot_times: Dict[str, Set[tuple]] = {}
+    for slot in shift_slots or []:
+        slot_times.setdefault(slot["day_of_week"], set()).add((to_minutes(slot["start_time"]), to_minutes(slot["end_time"])))
+
+    # (employee_id, day) -> [(start, end, shift index)] for the overlap sweep
+    intervals: Dict[tuple, List[tuple]] = {}
+
+    for index, shift in enumerate(shifts):
         day = shift["day"]
         emp_id = shift["employee_id"]
-        
-        # Initialize day set
-        if day not in day_assignments:
-            day_assignments[day] = set()
-        
-        # Check for duplicate assignment
-        if emp_id in day_assignments[day]:
-            errors.append(f"Employee {emp_id} scheduled twice on {day}")
-        else:
-            day_assignments[day].add(emp_id)
-        
-        # Check availability
-        employee = next((e for e in employees if e["id"] == emp_id), None)
-        if employee:
-            if day not in employee.get("availability", []):
-                errors.append(
-                    f"Employee {emp_id} ({employee.get('full_name', 'Unknown')}) "
-                    f"not available on {day}"
-                )
-    
+        employee = employees_by_id.get(emp_id)
+        where = {"employee_id": emp_id, "day": day, "shift_index": index}
+
+        if employee is None:
+            _issue(issues, "error", "unknown_employee", f"Employee {emp_id} is not an active employee", **where)
+        elif day not in availability[emp_id]:
+            _issue(issues, "error", "not_available",
+                   f"Employee {emp_id} ({employee.get('full_name', 'Unknown')}) not available on {day}", **where)
+
+        try:
+            start = to_minutes(shift.get("start_time") or "")
+            end = to_minutes(shift.get("end_time") or "")
+        except ValueError:
+            _issue(issues, "error", "invalid_time",
+                   f"Shift for {emp_id} on {day} has unreadable times", **where)
+            continue
+        if end <= start:
+            _issue(issues, "error", "invalid_time",
+                   f"Shift for {emp_id} on {day} ends before it starts", **where)
+            continue
+
+        intervals.setdefault((emp_id, day), []).append((start, end, index))
+
+        # Configured slot times are authoritative; anything else must fit the store hours
+        on_slot = (start, end) in slot_times.get(day, ())
+        if day in slot_times and not on_slot:
+            _issue(issues, "warning", "off_slot", f"Shift for {emp_id} on {day} matches no shift slot", **where)
+
+        hours = (store_hours or {}).get(STORE_HOURS_DAY_NAMES.get(day, ""))
+        if hours:
+            if hours.get("closed"):
+                _issue(issues, "error", "store_closed", f"Shift for {emp_id} on {day} but the store is closed", **where)
+            elif not on_slot and hours.get("open_time") and hours.get("close_time") and (
+                start < to_minutes(hours["open_time"]) or end > to_minutes(hours["close_time"])
+            ):
+                _issue(issues, "error", "outside_store_hours",
+                       f"Shift for {emp_id} on {day} runs outside store hours "
+                       f"{hours['open_time'][:5]}-{hours['close_time'][:5]}", **where)
+
+    # Sweep each employee's day in start order: overlap if a shift starts before the latest end so far
+    for (emp_id, day), spans in intervals.items():
+        if len(spans) < 2:
+            continue
+        spans.sort()
+        latest_end = spans[0][1]
+        for start, end, index in spans[1:]:
+            where = {"employee_id": emp_id, "day": day, "shift_index": index}
+            if start < latest_end:
+                _issue(issues, "error", "overlap", f"Employee {emp_id} has overlapping shifts on {day}", **where)
+            else:
+                _issue(issues, "error", "double_booked", f"Employee {emp_id} scheduled twice on {day}", **where)
+            latest_end = max(latest_end, end)
+
+    errors = [issue["message"] for issue in issues if issue["severity"] == "error"]
+    warnings = [issue["message"] for issue in issues if issue["severity"] == "warning"]
     return {
         "valid": len(errors) == 0,
         "errors": errors,
-        "warnings": warnings
+        "warnings": warnings,
+        "issues": issues
     }
 
 def calculate_schedule_coverage(shifts: List[Dict], staffing_rules: List[Dict]) -> Dict:
@@ -86,3 +143,347 @@ def calculate_schedule_coverage(shifts: List[Dict], staffing_rules: List[Dict])
         }
     
     return coverage
+
+WEEK_DAYS = ["mon", "tue", "wed", "thu", "fri", "sat", "sun"]
+STORE_HOURS_DAY_NAMES = {
+    "mon": "monday", "tue": "tuesday", "wed": "wednesday", "thu": "thursday",
+    "fri": "friday", "sat": "saturday", "sun": "sunday"
+}
+
+def _day_openings(day: str, staffing_rules: List[Dict], store_hours: Dict, shift_slots: List[Dict]) -> List[tuple]:
+    """(start_time, end_time) for every position to fill on a day"""
+    hours = (store_hours or {}).get(STORE_HOURS_DAY_NAMES[day]) or {}
+    if hours.get("closed"):
+        return []
+
+    day_slots = [slot for slot in shift_slots or [] if slot["day_of_week"] == day]
+    if day_slots:
+        return [
+            (slot["start_time"][:5], slot["end_time"][:5])
+            for slot in sorted(day_slots, key=lambda s: s["start_time"])
+            for _ in range(slot.get("required_count") or 1)
+        ]
+
+    required = sum(rule["required"] for rule in staffing_rules if rule["day"] == day)
+    start = (hours.get("open_time") or "09:00")[:5]
+    end = (hours.get("close_time") or "17:00")[:5]
+    return [(start, end)] * required
+
+LEADER = "shiftleader"
+NEW = "new"
+
+def _slot_key(start_time: str, end_time: str) -> tuple:
+    return (start_time, end_time)
+
+def _unpaired(strengths: Dict[str, int]) -> bool:
+    """A slot with new staff and no shiftleader on it"""
+    return strengths.get(NEW, 0) > 0 and strengths.get(LEADER, 0) == 0
+
+def solve_schedule(
+    staffing_rules: List[Dict],
+    employees: List[Dict],
+    store_hours: Dict = None,
+    shift_slots: List[Dict] = None,
+    prior_load: Dict[str, int] = None
+) -> List[Dict]:
+    """
+    Deterministic constraint-based scheduler - the default engine, no AI involved.
+    Hard constraints: availability, at most one shift per employee per day and never more
+    people on a day/slot than it requires. Greedy construction fills the tightest days first
+    with the least-booked available employees; local search then puts a shiftleader on every
+    slot with new staff where the roster allows it and evens out shifts per employee.
+    prior_load (employee_id -> shifts already worked, e.g. in earlier weeks of a batch) counts
+    towards the balancing so fairness carries over from week to week.
+    Output matches generate_schedule: [{"employee_id", "day", "start_time", "end_time"}]
+    """
+    employees_by_id = {emp["id"]: emp for emp in employees}
+    strength = {emp["id"]: emp.get("strength") or "normal" for emp in employees}
+    prior_load = prior_load or {}
+    load = {emp["id"]: prior_load.get(emp["id"], 0) for emp in employees}
+
+    def rank(emp_id):
+        # Least booked first; people available on fewer days get their few days first
+        emp = employees_by_id[emp_id]
+        return (load[emp_id], len(emp.get("availability", [])), emp.get("full_name") or "", str(emp_id))
+
+    available: Dict[str, List] = {}
+    capacity: Dict[str, Dict[tuple, int]] = {}
+    for day in WEEK_DAYS:
+        caps: Dict[tuple, int] = {}
+        for start_time, end_time in _day_openings(day, staffing_rules, store_hours, shift_slots):
+            caps[_slot_key(start_time, end_time)] = caps.get(_slot_key(start_time, end_time), 0) + 1
+        if caps:
+            capacity[day] = caps
+            available[day] = [emp["id"] for emp in employees if day in emp.get("availability", [])]
+
+    # day -> employee_id -> slot, and per-slot strength counts for the pairing rule
+    seats: Dict[str, Dict] = {day: {} for day in capacity}
+    slot_strengths: Dict[tuple, Dict[str, int]] = {
+        (day, slot): {} for day, caps in capacity.items() for slot in caps
+    }
+
+    def seat(day, emp_id, slot):
+        seats[day][emp_id] = slot
+        counts = slot_strengths[(day, slot)]
+        counts[strength[emp_id]] = counts.get(strength[emp_id], 0) + 1
+        load[emp_id] += 1
+
+    def unseat(day, emp_id):
+        slot = seats[day].pop(emp_id)
+        slot_strengths[(day, slot)][strength[emp_id]] -= 1
+        load[emp_id] -= 1
+        return slot
+
+    # Greedy construction, days with the least slack first
+    for day in sorted(capacity, key=lambda d: (len(available[d]) - sum(capacity[d].values()), WEEK_DAYS.index(d))):
+        caps = capacity[day]
+        chosen = sorted(available[day], key=rank)[:sum(caps.values())]
+        remaining = dict(caps)
+
+        leaders = [e for e in chosen if strength[e] == LEADER]
+        new_staff = [e for e in chosen if strength[e] == NEW]
+        others = [e for e in chosen if strength[e] not in (LEADER, NEW)]
+
+        # One leader per slot (biggest slots first), new staff next to a leader, then everyone else
+        led = []
+        for slot in sorted(caps, key=lambda s: (-caps[s], s)):
+            if leaders:
+                seat(day, leaders.pop(0), slot)
+                remaining[slot] -= 1
+                led.append(slot)
+        for emp_id in new_staff + others + leaders:
+            preferred = led if strength[emp_id] == NEW else []
+            open_slots = [s for s in preferred if remaining[s]] or [s for s in caps if remaining[s]]
+            slot = max(open_slots, key=lambda s: (remaining[s], s))
+            seat(day, emp_id, slot)
+            remaining[slot] -= 1
+
+    # Local search 1: pair new staff with a shiftleader
+    for day, caps in capacity.items():
+        for slot in caps:
+            counts = slot_strengths[(day, slot)]
+            if not _unpaired(counts):
+                continue
+
+            # Swap in a leader seated on another slot of the same day who is not needed there
+            in_slot = [e for e, s in seats[day].items() if s == slot and strength[e] != NEW]
+            spare_leaders = [
+                e for e, s in seats[day].items()
+                if s != slot and strength[e] == LEADER
+                and (slot_strengths[(day, s)].get(LEADER, 0) > 1 or not slot_strengths[(day, s)].get(NEW, 0))
+            ]
+            if spare_leaders and in_slot:
+                leader, other = spare_leaders[0], in_slot[0]
+                other_slot = unseat(day, leader)
+                unseat(day, other)
+                seat(day, leader, slot)
+                seat(day, other, other_slot)
+                continue
+
+            # Bring in an unbooked leader, or swap a new hire for an unbooked experienced employee
+            unbooked = sorted((e for e in available[day] if e not in seats[day]), key=rank)
+            free_leaders = [e for e in unbooked if strength[e] == LEADER]
+            free_experienced = [e for e in unbooked if strength[e] != NEW]
+            in_slot = [e for e, s in seats[day].items() if s == slot]
+            if free_leaders:
+                # Replace a non-new employee if there is one so the new hire keeps the shift
+                out = min(in_slot, key=lambda e: (strength[e] == NEW, -load[e]))
+                unseat(day, out)
+                seat(day, free_leaders[0], slot)
+            else:
+                new_in_slot = [e for e in in_slot if strength[e] == NEW]
+                while new_in_slot and free_experienced and _unpaired(counts):
+                    unseat(day, new_in_slot.pop())
+                    seat(day, free_experienced.pop(0), slot)
+
+    # Local search 2: hand shifts from the most booked to the least booked without breaking pairing
+    moved = True
+    while moved:
+        moved = False
+        booked = [(day, emp_id, slot) for day in seats for emp_id, slot in seats[day].items()]
+        for day, donor, slot in sorted(booked, key=lambda b: -load[b[1]]):
+            if seats[day].get(donor) != slot:
+                continue
+            counts = slot_strengths[(day, slot)]
+            was_unpaired = _unpaired(counts)
+            best = None
+            for receiver in available[day]:
+                if load[receiver] >= load[donor] - 1 or receiver in seats[day]:
+                    continue
+                after = dict(counts)
+                after[strength[donor]] -= 1
+                after[strength[receiver]] = after.get(strength[receiver], 0) + 1
+                if _unpaired(after) and not was_unpaired:
+                    continue
+                if best is None or rank(receiver) < rank(best):
+                    best = receiver
+            if best is not None:
+                unseat(day, donor)
+                seat(day, best, slot)
+                moved = True
+
+    shifts = [
+        {"employee_id": emp_id, "day": day, "start_time": slot[0], "end_time": slot[1]}
+        for day in WEEK_DAYS if day in seats
+        for emp_id, slot in sorted(seats[day].items(), key=lambda item: (item[1], rank(item[0])))
+    ]
+    return shifts
+
+def repair_schedule(
+    shifts: List[Dict],
+    employees: List[Dict],
+    unavailable: List[Dict] = None,
+    slot_targets: List[Dict] = None
+) -> Dict:
+    """
+    Patch an existing week instead of regenerating it.
+    - unavailable: [{"employee_id", "day"}] - their shifts that day are dropped and refilled
+    - slot_targets: [{"day", "start_time", "end_time", "required_count"}] - slots trimmed or topped up
+    Shifts of employees not in `employees` (deactivated since) are dropped and refilled too.
+    Only the affected slots change; everyone else keeps their shift.
+    Returns {"shifts": repaired week, "added": [...], "removed": [...], "unfilled": [...]};
+    removed entries are the original shift dicts (with their "id" if they had one).
+    """
+    employees_by_id = {emp["id"]: emp for emp in employees}
+    strength = {emp["id"]: emp.get("strength") or "normal" for emp in employees}
+    blocked = {(entry["employee_id"], entry["day"]) for entry in unavailable or []}
+
+    kept = []
+    removed = []
+    load: Dict = {}
+    booked = set()
+    # (day, slot) -> shifts on it, and the headcount each affected slot should end up with
+    on_slot: Dict[tuple, List[Dict]] = {}
+    targets: Dict[tuple, int] = {}
+
+    for shift in shifts:
+        key = (shift["day"], _slot_key(shift["start_time"][:5], shift["end_time"][:5]))
+        # Shifts of employees who are no longer active are vacated like an absence
+        if (shift["employee_id"], shift["day"]) in blocked or shift["employee_id"] not in employees_by_id:
+            removed.append(shift)
+            targets[key] = targets.get(key, 0) + 1
+            continue
+        kept.append(shift)
+        on_slot.setdefault(key, []).append(shift)
+        load[shift["employee_id"]] = load.get(shift["employee_id"], 0) + 1
+        booked.add((shift["employee_id"], shift["day"]))
+    # Refill vacated slots to the headcount they had before
+    for key in list(targets):
+        targets[key] += len(on_slot.get(key, []))
+
+    for target in slot_targets or []:
+        key = (target["day"], _slot_key(target["start_time"][:5], target["end_time"][:5]))
+        targets[key] = target["required_count"]
+
+    def slot_strengths(key) -> Dict[str, int]:
+        counts: Dict[str, int] = {}
+        for shift in on_slot.get(key, []):
+            counts[strength.get(shift["employee_id"])] = counts.get(strength.get(shift["employee_id"]), 0) + 1
+        return counts
+
+    def rank(emp_id):
+        # Shifts can still belong to employees who were deactivated since
+        emp = employees_by_id.get(emp_id) or {}
+        return (load.get(emp_id, 0), emp.get("full_name") or "", str(emp_id))
+
+    added = []
+    unfilled = []
+    for key in sorted(targets, key=lambda k: (WEEK_DAYS.index(k[0]), k[1])):
+        day, slot = key
+        assigned = on_slot.setdefault(key, [])
+
+        # Over target: drop the most-booked first, keeping a leader next to new staff
+        while len(assigned) > targets[key]:
+            def drop_cost(shift):
+                counts = slot_strengths(key)
+                counts[strength.get(shift["employee_id"])] -= 1
+                return (_unpaired(counts), -load.get(shift["employee_id"], 0), rank(shift["employee_id"])[1:])
+            shift = min(assigned, key=drop_cost)
+            assigned.remove(shift)
+            kept.remove(shift)
+            removed.append(shift)
+            load[shift["employee_id"]] -= 1
+            booked.discard((shift["employee_id"], day))
+
+        # Under target: least-booked available employee, a leader first if new staff are alone
+        while len(assigned) < targets[key]:
+            candidates = [
+                emp["id"] for emp in employees
+                if day in emp.get("availability", [])
+                and (emp["id"], day) not in booked
+                and (emp["id"], day) not in blocked
+            ]
+            if not candidates:
+                unfilled.append({"day": day, "start_time": slot[0], "end_time": slot[1],
+                                 "missing": targets[key] - len(assigned)})
+                break
+            counts = slot_strengths(key)
+            need_leader = _unpaired(counts)
+            emp_id = min(candidates, key=lambda e: (
+                not (need_leader and strength[e] == LEADER),
+                strength[e] == NEW and not counts.get(LEADER),
+                rank(e)
+            ))
+            shift = {"employee_id": emp_id, "day": day, "start_time": slot[0], "end_time": slot[1]}
+            assigned.append(shift)
+            kept.append(shift)
+            added.append(shift)
+            load[emp_id] = load.get(emp_id, 0) + 1
+            booked.add((emp_id, day))
+
+    return {"shifts": kept, "added": added, "removed": removed, "unfilled": unfilled}
+
+def _is_only_needed_leader(shift: Dict, employees_by_id: Dict[str, Dict], day_shifts: List[Dict]) -> bool:
+    """True if moving this shift away would leave the day's new staff without a shiftleader"""
+    if employees_by_id.get(shift["employee_id"], {}).get("strength") != "shiftleader":
+        return False
+    strengths = [employees_by_id.get(s["employee_id"], {}).get("strength") for s in day_shifts]
+    return "new" in strengths and strengths.count("shiftleader") == 1
+
+def balance_weekly_load(shifts: List[Dict], employees: List[Dict]) -> List[Dict]:
+    """
+    Cross-day fairness pass: hand shifts from the most-booked employees to the least-booked
+    ones who are available that day and not already working it, until nobody has more than
+    one shift above anyone who could take it. Times stay with the shift; a day's only
+    shiftleader is not moved off a day with new staff unless another leader takes over.
+    """
+    employees_by_id = {emp["id"]: emp for emp in employees}
+    balanced = [dict(shift) for shift in shifts]
+
+    load = {emp["id"]: 0 for emp in employees}
+    working = set()
+    by_day: Dict[str, List[Dict]] = {}
+    for shift in balanced:
+        load[shift["employee_id"]] = load.get(shift["employee_id"], 0) + 1
+        working.add((shift["employee_id"], shift["day"]))
+        by_day.setdefault(shift["day"], []).append(shift)
+
+    moved = True
+    while moved:
+        moved = False
+        for shift in sorted(balanced, key=lambda s: -load[s["employee_id"]]):
+            donor = shift["employee_id"]
+            day = shift["day"]
+            receivers = [
+                emp for emp in employees
+                if load[emp["id"]] < load[donor] - 1
+                and day in emp.get("availability", [])
+                and (emp["id"], day) not in working
+            ]
+            if not receivers:
+                continue
+
+            if _is_only_needed_leader(shift, employees_by_id, by_day[day]):
+                receivers = [emp for emp in receivers if emp.get("strength") == "shiftleader"]
+                if not receivers:
+                    continue
+
+            receiver = min(receivers, key=lambda emp: (load[emp["id"]], emp.get("full_name") or "", emp["id"]))
+            working.discard((donor, day))
+            working.add((receiver["id"], day))
+            load[donor] -= 1
+            load[receiver["id"]] += 1
+            shift["employee_id"] = receiver["id"]
+            moved = True
+
+    return balanced
@@ -0,0 +1,174 @@
+"""
+Background schedule-generation jobs
+POST returns a job id at once; a worker pool runs the pipeline and records stage and
+progress, which clients poll or stream. Each business may only have a few jobs queued
+or running at a time, and an identical job already in flight is returned instead of
+starting another. Jobs live in process memory (per uvicorn worker) and expire after
+SCHEDULE_JOB_TTL_SECONDS.
+"""
+import os
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from dotenv import load_dotenv
+
+load_dotenv()
+
+ACTIVE_STATUSES = ("queued", "running")
+
+class JobLimitError(Exception):
+    """The business already has the maximum number of active jobs"""
+
+def _utcnow() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+class ScheduleJobs:
+    def __init__(self):
+        self.worker_count = int(os.getenv("SCHEDULE_JOB_WORKERS", "4"))
+        self.per_business_limit = int(os.getenv("SCHEDULE_JOBS_PER_BUSINESS", "2"))
+        self.ttl_seconds = float(os.getenv("SCHEDULE_JOB_TTL_SECONDS", "3600"))
+
+        self._executor = ThreadPoolExecutor(max_workers=self.worker_count, thread_name_prefix="schedule-job")
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        # Dedupe key -> id of the active job running it
+        self._active_keys: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+        self.submitted = 0
+        self.joined = 0
+        self.rejected = 0
+
+    def submit(self, business_id: str, key: str, fn: Callable[..., Any], kwargs: Dict[str, Any]) -> Tuple[Dict, bool]:
+        """
+        Queue fn(progress=..., **kwargs); returns (job, created).
+        Raises JobLimitError when the business is at its limit.
+        """
+        with self._lock:
+            self._evict()
+            existing = self._active_keys.get(key)
+            if existing:
+                self.joined += 1
+                return self._public(self._jobs[existing]), False
+
+            active = sum(1 for job in self._jobs.values()
+                         if job["business_id"] == business_id and job["status"] in ACTIVE_STATUSES)
+            if active >= self.per_business_limit:
+                self.rejected += 1
+                raise JobLimitError(
+                    f"{active} schedule jobs already running for this business (limit {self.per_business_limit})"
+                )
+
+            job_id = uuid.uuid4().hex
+            job = {
+                "id": job_id,
+                "business_id": business_id,
+                "key": key,
+                "status": "queued",
+                "stage": "queued",
+                "progress": 0.0,
+                "result": None,
+                "error": None,
+                "created_at": _utcnow(),
+                "started_at": None,
+                "finished_at": None,
+                "revision": 0,
+                "expires": None
+            }
+            self._jobs[job_id] = job
+            self._active_keys[key] = job_id
+            self.submitted += 1
+
+        self._executor.submit(self._run, job_id, fn, kwargs)
+        print(f"[JOBS] Queued schedule job {job_id} for business {business_id}")
+        return self._public(job), True
+
+    def _run(self, job_id: str, fn: Callable[..., Any], kwargs: Dict[str, Any]):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            # Already failed by stop() while it waited in the queue
+            if not job or job["status"] != "queued":
+                return
+            job.update(status="running", stage="starting", started_at=_utcnow())
+            job["revision"] += 1
+        try:
+            result = fn(progress=lambda stage, fraction: self._update(job_id, stage=stage, progress=fraction), **kwargs)
+            self._finish(job_id, status="succeeded", stage="done", progress=1.0, result=result)
+        except Exception as e:
+            # Pipeline errors carry an HTTP-style status_code/detail; anything else is a 500
+            status_code = getattr(e, "status_code", 500)
+            if status_code >= 500:
+                traceback.print_exc()
+            self._finish(job_id, status="failed", error={
+                "status_code": status_code,
+                "detail": getattr(e, "detail", f"{type(e).__name__}: {e}")
+            })
+
+    def _update(self, job_id: str, **fields: Any):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job:
+                job.update(fields)
+                job["revision"] += 1
+
+    def _finish(self, job_id: str, **fields: Any):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if not job:
+                return
+            job.update(fields, finished_at=_utcnow(), expires=time.monotonic() + self.ttl_seconds)
+            job["revision"] += 1
+            if self._active_keys.get(job["key"]) == job_id:
+                del self._active_keys[job["key"]]
+        print(f"[JOBS] Schedule job {job_id} {fields['status']}")
+
+    def _evict(self):
+        # Caller holds the lock
+        now = time.monotonic()
+        for job_id in [jid for jid, job in self._jobs.items() if job["expires"] and job["expires"] < now]:
+            del self._jobs[job_id]
+
+    def _public(self, job: Dict) -> Dict:
+        return {key: value for key, value in job.items() if key not in ("key", "expires")}
+
+    def get(self, business_id: str, job_id: str) -> Optional[Dict]:
+        """Snapshot of one job, scoped to the business"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if not job or job["business_id"] != business_id:
+                return None
+            return self._public(job)
+
+    def list(self, business_id: str) -> List[Dict]:
+        """The business's jobs, newest first, without results"""
+        with self._lock:
+            self._evict()
+            jobs = [
+                {key: value for key, value in self._public(job).items() if key != "result"}
+                for job in self._jobs.values() if job["business_id"] == business_id
+            ]
+        return sorted(jobs, key=lambda job: job["created_at"], reverse=True)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            counts = {"queued": 0, "running": 0, "succeeded": 0, "failed": 0}
+            for job in self._jobs.values():
+                counts[job["status"]] += 1
+        return {**counts, "submitted": self.submitted, "joined": self.joined, "rejected": self.rejected}
+
+    def stop(self):
+        """Fail queued jobs so pollers and streams end; running ones finish in the background"""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        with self._lock:
+            queued = [job_id for job_id, job in self._jobs.items() if job["status"] == "queued"]
+        for job_id in queued:
+            self._finish(job_id, status="failed", error={
+                "status_code": 503,
+                "detail": "Server shut down before the job started - submit it again"
+            })
+
+# Singleton instance
+schedule_jobs = ScheduleJobs()
@@ -0,0 +1,67 @@
+"""
+Schedule change notifications
+After a week is saved, every employee whose shifts were added, removed or moved gets
+their updated week through the email outbox (schedule_published template).
+"""
+from typing import Dict, List
+from db import get_supabase
+from services.email_outbox import email_outbox
+from services.schedule_engine import STORE_HOURS_DAY_NAMES, WEEK_DAYS
+
+def changed_employee_ids(diff: Dict) -> List[str]:
+    return sorted({str(change["employee_id"]) for key in ("added", "removed", "moved") for change in diff[key]})
+
+def queue_schedule_notifications(business_id: str, week_start: str, diff: Dict, shifts: List[Dict]) -> int:
+    """Queue one schedule_published email per affected employee with an email; returns how many"""
+    employee_ids = changed_employee_ids(diff)
+    if not employee_ids:
+        return 0
+
+    supabase = get_supabase()
+    profiles_result = supabase.table("profiles")\
+        .select("id, full_name, email")\
+        .eq("business_id", business_id)\
+        .in_("id", employee_ids)\
+        .execute()
+    business_result = supabase.table("businesses")\
+        .select("name, logo_url")\
+        .eq("id", business_id)\
+        .execute()
+    business = business_result.data[0] if business_result.data else {}
+
+    shifts_by_employee: Dict[str, List[Dict]] = {}
+    for shift in shifts:
+        shifts_by_employee.setdefault(str(shift["employee_id"]), []).append(shift)
+
+    messages = []
+    for profile in profiles_result.data or []:
+        if not profile.get("email"):
+            continue
+        their_shifts = sorted(
+            shifts_by_employee.get(str(profile["id"]), []),
+            key=lambda shift: (WEEK_DAYS.index(shift["day"]), shift["start_time"])
+        )
+        messages.append({
+            "business_id": business_id,
+            "to_email": profile["email"],
+            "kind": "schedule_published",
+            "payload": {
+                "business_name": business.get("name"),
+                "logo_url": business.get("logo_url"),
+                "employee_name": profile.get("full_name"),
+                "week_start": week_start,
+                "shifts": [
+                    {
+                        "day": STORE_HOURS_DAY_NAMES[shift["day"]].title(),
+                        "start_time": shift["start_time"][:5],
+                        "end_time": shift["end_time"][:5]
+                    }
+                    for shift in their_shifts
+                ]
+            }
+        })
+
+    email_outbox.enqueue_many(messages)
+    print(f"[SCHEDULE] Queued {len(messages)} schedule emails for week {week_start} "
+          f"({len(employee_ids)} employees affected)")
+    return len(messages)
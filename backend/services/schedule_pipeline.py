@@ -0,0 +1,379 @@
+"""
+Schedule generation pipeline: load inputs, generate, validate, save, notify
+Shared by the synchronous /api/schedule/generate route and background schedule jobs;
+each stage reports progress through an optional callback. generate_weeks runs the same
+stages for several consecutive weeks at once.
+"""
+import os
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional
+from dotenv import load_dotenv
+from db import get_supabase
+from services.coverage_engine import compute_coverage
+from services.fairness_engine import balance_hours, fairness_metrics
+from services.schedule_engine import calculate_schedule_coverage, solve_schedule, validate_schedule
+from services.schedule_notifications import queue_schedule_notifications
+from services.shift_store import ScheduleVersionConflict, shift_store
+from services.watsonx_client import LLMUnavailableError, watsonx_client
+
+load_dotenv()
+
+# Teams at least this large get one prompt per day unless the request says otherwise
+SCHEDULE_SPLIT_THRESHOLD = int(os.getenv("SCHEDULE_SPLIT_THRESHOLD", "40"))
+
+ProgressCallback = Callable[[str, float], None]
+
+class ScheduleGenerationError(Exception):
+    """A request-level failure; status_code/detail map straight onto an HTTP error"""
+    def __init__(self, status_code: int, detail: Any):
+        super().__init__(detail if isinstance(detail, str) else str(detail))
+        self.status_code = status_code
+        self.detail = detail
+
+def _no_progress(stage: str, fraction: float):
+    pass
+
+def notify_schedule_changes(business_id: str, week_start: str, diff: Dict, shifts: List[Dict]) -> int:
+    """Email affected employees; a notification failure never fails the save"""
+    try:
+        return queue_schedule_notifications(business_id, week_start, diff, shifts)
+    except Exception as e:
+        print(f"[SCHEDULE] Failed to queue schedule emails: {type(e).__name__}: {e}")
+        return 0
+
+def load_schedule_config(business_id: str) -> Dict:
+    """Staffing rules, store hours (with defaults) and shift slots for a business"""
+    supabase = get_supabase()
+    
+    # Get staffing rules
+    rules_result = supabase.table("staffing_rules")\
+        .select("*")\
+        .eq("business_id", business_id)\
+        .execute()
+    
+    staffing_rules = [
+        {"day": rule["day_of_week"], "required": rule["required_count"]}
+        for rule in rules_result.data
+    ]
+    
+    # Get store hours for scheduling context
+    store_hours_result = supabase.table("businesses")\
+        .select("store_hours")\
+        .eq("id", business_id)\
+        .execute()
+    
+    store_hours = None
+    if store_hours_result.data and store_hours_result.data[0] and store_hours_result.data[0].get("store_hours"):
+        store_hours = store_hours_result.data[0]["store_hours"]
+    else:
+        # Default hours if not set
+        store_hours = {
+            "monday": {"open_time": "09:00", "close_time": "17:00", "closed": False},
+            "tuesday": {"open_time": "09:00", "close_time": "17:00", "closed": False},
+            "wednesday": {"open_time": "09:00", "close_time": "17:00", "closed": False},
+            "thursday": {"open_time": "09:00", "close_time": "17:00", "closed": False},
+            "friday": {"open_time": "09:00", "close_time": "17:00", "closed": False},
+            "saturday": {"open_time": "09:00", "close_time": "17:00", "closed": False},
+            "sunday": {"open_time": "09:00", "close_time": "17:00", "closed": True}
+        }
+    
+    # Get shift slots configured for the business
+    shift_slots_result = supabase.table("shift_slots")\
+        .select("*")\
+        .eq("business_id", business_id)\
+        .order("day_of_week, start_time")\
+        .execute()
+    
+    shift_slots = shift_slots_result.data if shift_slots_result.data else []
+    
+    return {
+        "staffing_rules": staffing_rules,
+        "store_hours": store_hours,
+        "shift_slots": shift_slots
+    }
+
+def load_employees(business_id: str, week_starts: List[str]) -> Dict[str, List[Dict]]:
+    """
+    Active non-admin employees with each week's availability: {week_start: employees}.
+    Profiles and the availability of all weeks are read in one query each.
+    """
+    supabase = get_supabase()
+    
+    # Get active employees from profiles (exclude admins)
+    profiles_result = supabase.table("profiles")\
+        .select("id, full_name, strength, is_active, is_admin")\
+        .eq("business_id", business_id)\
+        .eq("is_active", True)\
+        .eq("is_admin", False)\
+        .execute()
+    
+    if not profiles_result.data:
+        raise ScheduleGenerationError(400, "No active employees found")
+    
+    # Weekly availability (the new system) for every employee and week
+    availability_result = supabase.table("weekly_availability")\
+        .select("user_id, week_start, date")\
+        .eq("business_id", business_id)\
+        .in_("week_start", week_starts)\
+        .eq("available", True)\
+        .execute()
+    
+    # Convert dates to day names
+    available_days: Dict[tuple, List[str]] = {}
+    for avail in availability_result.data or []:
+        try:
+            date_obj = datetime.fromisoformat(avail["date"]).date()
+            day_name = date_obj.strftime('%a').lower()  # Mon -> mon
+            available_days.setdefault((avail["user_id"], avail["week_start"]), []).append(day_name)
+        except Exception as e:
+            print(f"[AVAILABILITY] Error converting date {avail['date']}: {e}")
+    
+    employees_by_week = {}
+    for week_start in week_starts:
+        employees = []
+        for emp in profiles_result.data:
+            # If no availability is set, assume available all 7 days (default)
+            days = available_days.get((emp["id"], week_start)) or ["mon", "tue", "wed", "thu", "fri", "sat", "sun"]
+            employees.append({
+                "id": emp["id"],
+                "full_name": emp["full_name"],
+                "strength": emp.get("strength", "normal"),
+                "availability": days
+            })
+        defaulted = sum(1 for emp in profiles_result.data if (emp["id"], week_start) not in available_days)
+        print(f"[AVAILABILITY] Week {week_start}: {len(employees)} employees, {defaulted} without availability set")
+        employees_by_week[week_start] = employees
+    
+    return employees_by_week
+
+def load_schedule_inputs(business_id: str, week_start: str) -> Dict:
+    """Staffing rules, employees with availability, current shifts, store hours and slots for a week"""
+    supabase = get_supabase()
+    
+    config = load_schedule_config(business_id)
+    staffing_rules = config["staffing_rules"]
+    
+    if not staffing_rules:
+        raise ScheduleGenerationError(400, "No staffing rules configured. Set required staff counts first.")
+    
+    employees = load_employees(business_id, [week_start])[week_start]
+    
+    # Get current shifts for this week to provide context
+    current_shifts_result = supabase.table("shifts")\
+        .select("id, day_of_week, employee_id, start_time, end_time")\
+        .eq("business_id", business_id)\
+        .eq("week_start", week_start)\
+        .execute()
+    
+    current_schedule = current_shifts_result.data if current_shifts_result.data else []
+    
+    return {
+        **config,
+        "employees": employees,
+        "current_schedule": current_schedule
+    }
+
+def generate_week(
+    business_id: str,
+    week_start: str,
+    inputs: Dict,
+    preferences: str = "",
+    use_ai: Optional[bool] = None,
+    split_by_day: Optional[bool] = None,
+    expected_version: Optional[int] = None,
+    notify: bool = True,
+    progress: Optional[ProgressCallback] = None
+) -> Dict[str, Any]:
+    """Generate, validate and save a week from already-loaded inputs"""
+    progress = progress or _no_progress
+    staffing_rules = inputs["staffing_rules"]
+    employees = inputs["employees"]
+    current_schedule = inputs["current_schedule"]
+    store_hours = inputs["store_hours"]
+    shift_slots = inputs["shift_slots"]
+    
+    preferences = preferences or ""
+    # The local solver builds schedules; the AI is only a preference layer on top
+    if use_ai is None:
+        use_ai = bool(preferences.strip())
+    if split_by_day is None:
+        split_by_day = len(employees) >= SCHEDULE_SPLIT_THRESHOLD
+    
+    engine = "solver"
+    fallback_days = []
+    shifts = None
+    ai_warnings = []
+    
+    progress("generating", 0.2)
+    if use_ai:
+        # Generate schedule using WatsonX with preferences and current schedule context
+        try:
+            generate_kwargs = dict(
+                week_start=week_start, 
+                staffing_rules=staffing_rules, 
+                employees=employees,
+                preferences=preferences,
+                current_schedule=current_schedule,
+                store_hours=store_hours,
+                shift_slots=shift_slots,
+                business_id=business_id
+            )
+            if split_by_day:
+                shifts, fallback_days = watsonx_client.generate_schedule_by_day(**generate_kwargs)
+                engine = "ai+fallback" if fallback_days else "ai"
+            else:
+                shifts = watsonx_client.generate_schedule(**generate_kwargs)
+                engine = "ai"
+        except (LLMUnavailableError, ValueError) as e:
+            print(f"[FALLBACK] AI scheduling failed ({e}), using local solver")
+        
+        if shifts is not None and not validate_schedule(shifts, employees, store_hours, shift_slots)["valid"]:
+            print("[FALLBACK] AI schedule failed validation, using local solver")
+            shifts = None
+        if shifts is None:
+            engine = "solver"
+            fallback_days = []
+            ai_warnings.append("Preferences could not be applied by the AI; schedule built by the local solver")
+    
+    if shifts is None:
+        # Even out weekly hours; AI schedules are left as they are so preferences survive
+        shifts = balance_hours(solve_schedule(staffing_rules, employees, store_hours, shift_slots), employees)
+    
+    # Validate schedule
+    progress("validating", 0.7)
+    validation = validate_schedule(shifts, employees, store_hours, shift_slots)
+    
+    print(f"[VALIDATION] Schedule validation result: {validation}")
+    print(f"[VALIDATION] Generated shifts: {shifts}")
+    
+    if not validation["valid"]:
+        print(f"[VALIDATION] Validation failed with errors: {validation['errors']}")
+        raise ScheduleGenerationError(
+            400,
+            {"message": "Schedule validation failed", "errors": validation["errors"], "issues": validation["issues"]}
+        )
+    
+    # Write only the rows that changed, in one transaction
+    progress("saving", 0.8)
+    try:
+        saved = shift_store.save_week(business_id, week_start, shifts, expected_version=expected_version)
+    except ScheduleVersionConflict as e:
+        raise ScheduleGenerationError(409, str(e))
+    
+    progress("notifying", 0.9)
+    notified = notify_schedule_changes(business_id, week_start, saved, shifts) if notify else 0
+    
+    # Calculate coverage
+    coverage = calculate_schedule_coverage(shifts, staffing_rules)
+    coverage_detail = compute_coverage(shifts, staffing_rules, store_hours, shift_slots)
+    
+    return {
+        "message": "Schedule generated",
+        "shifts_created": len(shifts),
+        "coverage": coverage,
+        "coverage_detail": coverage_detail,
+        "fairness": fairness_metrics(shifts, employees),
+        "warnings": ai_warnings + validation["warnings"],
+        "engine": engine,
+        "fallback_days": fallback_days,
+        "version": saved["version"],
+        "changes": {key: saved[key] for key in ("added", "removed", "moved", "unchanged")},
+        "notified": notified
+    }
+
+def run_schedule_generation(
+    business_id: str,
+    week_start: str,
+    progress: Optional[ProgressCallback] = None,
+    **options: Any
+) -> Dict[str, Any]:
+    """The whole pipeline, loading included; options as for generate_week"""
+    progress = progress or _no_progress
+    progress("loading", 0.05)
+    inputs = load_schedule_inputs(business_id, week_start)
+    return generate_week(business_id, week_start, inputs, progress=progress, **options)
+
+def generate_weeks(
+    business_id: str,
+    week_start: str,
+    weeks: int,
+    notify: bool = True,
+    progress: Optional[ProgressCallback] = None
+) -> Dict[str, Any]:
+    """
+    Generate `weeks` consecutive weeks from week_start with the local solver.
+    Configuration and employees are loaded once, each week is solved with the shifts of the
+    weeks before it as prior load so fairness carries forward, and all weeks are saved in
+    one transaction - either the whole batch is written or none of it.
+    """
+    progress = progress or _no_progress
+    progress("loading", 0.05)
+    try:
+        first_week = datetime.fromisoformat(week_start).date()
+    except ValueError:
+        raise ScheduleGenerationError(400, f"Invalid week_start: {week_start}")
+    week_starts = [(first_week + timedelta(weeks=i)).isoformat() for i in range(weeks)]
+    
+    config = load_schedule_config(business_id)
+    if not config["staffing_rules"]:
+        raise ScheduleGenerationError(400, "No staffing rules configured. Set required staff counts first.")
+    employees_by_week = load_employees(business_id, week_starts)
+    
+    # Rolling sequence: every week sees the shifts and hours each employee got before it
+    carried_load: Dict[str, int] = {}
+    carried_hours: Dict[str, float] = {}
+    schedules = {}
+    warnings = {}
+    for i, week in enumerate(week_starts):
+        progress("generating", 0.1 + 0.6 * i / len(week_starts))
+        employees = employees_by_week[week]
+        shifts = solve_schedule(
+            config["staffing_rules"], employees, config["store_hours"], config["shift_slots"],
+            prior_load=carried_load
+        )
+        shifts = balance_hours(shifts, employees, prior_hours=carried_hours)
+        validation = validate_schedule(shifts, employees, config["store_hours"], config["shift_slots"])
+        if not validation["valid"]:
+            raise ScheduleGenerationError(400, {
+                "message": f"Schedule validation failed for week {week}",
+                "errors": validation["errors"],
+                "issues": validation["issues"]
+            })
+        for shift in shifts:
+            carried_load[shift["employee_id"]] = carried_load.get(shift["employee_id"], 0) + 1
+        for row in fairness_metrics(shifts, employees)["employees"]:
+            carried_hours[row["employee_id"]] = carried_hours.get(row["employee_id"], 0) + row["hours"]
+        schedules[week] = shifts
+        warnings[week] = validation["warnings"]
+    
+    progress("saving", 0.8)
+    try:
+        saved = shift_store.save_weeks(business_id, schedules)
+    except ScheduleVersionConflict as e:
+        raise ScheduleGenerationError(409, str(e))
+    
+    progress("notifying", 0.9)
+    results = []
+    for week in week_starts:
+        shifts = schedules[week]
+        notified = notify_schedule_changes(business_id, week, saved[week], shifts) if notify else 0
+        results.append({
+            "week_start": week,
+            "shifts_created": len(shifts),
+            "coverage": calculate_schedule_coverage(shifts, config["staffing_rules"]),
+            "fairness": fairness_metrics(shifts, employees_by_week[week]),
+            "warnings": warnings[week],
+            "version": saved[week]["version"],
+            "changes": {key: saved[week][key] for key in ("added", "removed", "moved", "unchanged")},
+            "notified": notified
+        })
+    
+    return {
+        "message": f"Generated {len(week_starts)} weeks",
+        "engine": "solver",
+        "weeks": results,
+        # Shifts and hours per employee over the whole batch
+        "fairness": fairness_metrics(
+            [shift for week in week_starts for shift in schedules[week]], employees_by_week[week_starts[0]]
+        )
+    }
@@ -0,0 +1,294 @@
+"""
+Week-level persistence for shifts
+Saving a week diffs it against the stored rows and sends only the changes through the
+apply_week_shift_diff Postgres function (migration 020); clearing a week uses
+replace_week_shifts (migration 019). Both run in one transaction in one round trip and
+bump the week's version in schedule_weeks for optimistic concurrency checks.
+Several weeks are saved together through apply_weeks_shift_diff (migration 021) and a week
+is rolled forward onto another by copy_week_shifts (migration 022).
+"""
+from typing import Any, Dict, List, Optional, Tuple
+from postgrest.exceptions import APIError
+from db import get_supabase
+
+class ScheduleVersionConflict(Exception):
+    """The week was changed by someone else since expected_version was read"""
+
+class ScheduleWeekNotFound(Exception):
+    """The week to copy from has no shifts"""
+
+def _shift_key(employee_id: Any, day: str, start_time: str, end_time: str) -> Tuple:
+    return (str(employee_id), day, start_time[:5], end_time[:5])
+
+def diff_week(current_rows: List[Dict], shifts: List[Dict]) -> Dict[str, Any]:
+    """
+    Minimal changes turning the stored rows (shifts table: id, day_of_week, employee_id,
+    start_time, end_time) into the new week ([{"employee_id", "day", "start_time", "end_time"}]).
+    Identical shifts keep their row; an employee whose shift on a day only changed times is
+    "moved" (one update); everything else is removed or added.
+    """
+    matched = set()
+    by_exact: Dict[Tuple, List[Dict]] = {}
+    for row in current_rows:
+        by_exact.setdefault(_shift_key(row["employee_id"], row["day_of_week"], row["start_time"], row["end_time"]), []).append(row)
+
+    unmatched = []
+    unchanged = 0
+    for shift in shifts:
+        rows = by_exact.get(_shift_key(shift["employee_id"], shift["day"], shift["start_time"], shift["end_time"]))
+        if rows:
+            matched.add(rows.pop()["id"])
+            unchanged += 1
+        else:
+            unmatched.append(shift)
+
+    by_employee_day: Dict[Tuple, List[Dict]] = {}
+    for row in current_rows:
+        if row["id"] not in matched:
+            by_employee_day.setdefault((str(row["employee_id"]), row["day_of_week"]), []).append(row)
+
+    added = []
+    moved = []
+    for shift in unmatched:
+        rows = by_employee_day.get((str(shift["employee_id"]), shift["day"]))
+        if rows:
+            row = rows.pop()
+            matched.add(row["id"])
+            moved.append({
+                "id": row["id"],
+                "employee_id": shift["employee_id"],
+                "day": shift["day"],
+                "from": {"start_time": row["start_time"][:5], "end_time": row["end_time"][:5]},
+                "to": {"start_time": shift["start_time"][:5], "end_time": shift["end_time"][:5]}
+            })
+        else:
+            added.append(shift)
+
+    removed = [
+        {
+            "id": row["id"],
+            "employee_id": row["employee_id"],
+            "day": row["day_of_week"],
+            "start_time": row["start_time"][:5],
+            "end_time": row["end_time"][:5]
+        }
+        for row in current_rows
+        if row["id"] not in matched
+    ]
+    return {"added": added, "removed": removed, "moved": moved, "unchanged": unchanged}
+
+def _diff_params(diff: Dict) -> Dict[str, List]:
+    """diff_week result as the delete / update / insert batches of apply_week_shift_diff"""
+    return {
+        "p_delete_ids": [row["id"] for row in diff["removed"]],
+        "p_updates": [
+            {
+                "id": move["id"],
+                "day_of_week": move["day"],
+                "employee_id": move["employee_id"],
+                "start_time": move["to"]["start_time"],
+                "end_time": move["to"]["end_time"]
+            }
+            for move in diff["moved"]
+        ],
+        "p_inserts": [
+            {
+                "day_of_week": shift["day"],
+                "employee_id": shift["employee_id"],
+                "start_time": shift.get("start_time", "10:00"),
+                "end_time": shift.get("end_time", "18:00")
+            }
+            for shift in diff["added"]
+        ]
+    }
+
+class ShiftStore:
+    def __init__(self):
+        # Re-diffs against fresh rows when someone else wrote the week in between
+        self.conflict_retries = 2
+
+    def get_version(self, business_id: str, week_start: str) -> int:
+        """Current version of a week; 0 if it has never been written"""
+        result = get_supabase().table("schedule_weeks")\
+            .select("version")\
+            .eq("business_id", business_id)\
+            .eq("week_start", week_start)\
+            .execute()
+        return result.data[0]["version"] if result.data else 0
+
+    def load_rows(self, business_id: str, week_start: str) -> List[Dict]:
+        result = get_supabase().table("shifts")\
+            .select("id, day_of_week, employee_id, start_time, end_time")\
+            .eq("business_id", business_id)\
+            .eq("week_start", week_start)\
+            .execute()
+        return result.data or []
+
+    def save_week(
+        self,
+        business_id: str,
+        week_start: str,
+        shifts: List[Dict],
+        expected_version: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Make the stored week equal to these shifts, writing only changed rows.
+        Returns the diff_week result plus "version". With expected_version a concurrent
+        write raises ScheduleVersionConflict; without it the diff is recomputed and retried.
+        """
+        for attempt in range(self.conflict_retries + 1):
+            # Version first: a write after this read fails the check below instead of being missed
+            version = self.get_version(business_id, week_start)
+            if expected_version is not None and version != expected_version:
+                raise ScheduleVersionConflict(f"schedule version conflict: expected {expected_version}, found {version}")
+
+            diff = diff_week(self.load_rows(business_id, week_start), shifts)
+            if not (diff["added"] or diff["removed"] or diff["moved"]):
+                return {**diff, "version": version}
+
+            try:
+                result = get_supabase().rpc("apply_week_shift_diff", {
+                    "p_business_id": business_id,
+                    "p_week_start": week_start,
+                    **_diff_params(diff),
+                    "p_expected_version": version
+                }).execute()
+            except APIError as e:
+                if e.code != "PT409":
+                    raise
+                if expected_version is not None or attempt == self.conflict_retries:
+                    raise ScheduleVersionConflict(e.message) from e
+                print(f"[SHIFTS] Week {week_start} changed while saving, re-diffing")
+                continue
+
+            print(f"[SHIFTS] Saved week {week_start}: +{result.data['inserted']} ~{result.data['updated']} "
+                  f"-{result.data['deleted']} ={diff['unchanged']} (v{result.data['version']})")
+            return {**diff, "version": result.data["version"]}
+
+    def save_weeks(self, business_id: str, weeks: Dict[str, List[Dict]]) -> Dict[str, Dict[str, Any]]:
+        """
+        save_week for several weeks at once ({week_start: shifts}): versions and rows of all
+        weeks are read in one query each and every changed week is written in one transaction.
+        Returns {week_start: diff_week result plus "version"}; concurrent writes are re-diffed.
+        """
+        week_starts = sorted(weeks)
+        for attempt in range(self.conflict_retries + 1):
+            versions_result = get_supabase().table("schedule_weeks")\
+                .select("week_start, version")\
+                .eq("business_id", business_id)\
+                .in_("week_start", week_starts)\
+                .execute()
+            versions = {row["week_start"]: row["version"] for row in versions_result.data or []}
+
+            rows_result = get_supabase().table("shifts")\
+                .select("id, week_start, day_of_week, employee_id, start_time, end_time")\
+                .eq("business_id", business_id)\
+                .in_("week_start", week_starts)\
+                .execute()
+            rows_by_week: Dict[str, List[Dict]] = {}
+            for row in rows_result.data or []:
+                rows_by_week.setdefault(row["week_start"], []).append(row)
+
+            saved = {}
+            changes = []
+            for week_start in week_starts:
+                diff = diff_week(rows_by_week.get(week_start, []), weeks[week_start])
+                saved[week_start] = {**diff, "version": versions.get(week_start, 0)}
+                if diff["added"] or diff["removed"] or diff["moved"]:
+                    params = _diff_params(diff)
+                    changes.append({
+                        "week_start": week_start,
+                        "delete_ids": params["p_delete_ids"],
+                        "updates": params["p_updates"],
+                        "inserts": params["p_inserts"],
+                        "expected_version": versions.get(week_start, 0)
+                    })
+            if not changes:
+                return saved
+
+            try:
+                result = get_supabase().rpc("apply_weeks_shift_diff", {
+                    "p_business_id": business_id,
+                    "p_weeks": changes
+                }).execute()
+            except APIError as e:
+                if e.code != "PT409":
+                    raise
+                if attempt == self.conflict_retries:
+                    raise ScheduleVersionConflict(e.message) from e
+                print(f"[SHIFTS] Weeks {week_starts[0]}..{week_starts[-1]} changed while saving, re-diffing")
+                continue
+
+            for week in result.data:
+                saved[week["week_start"]]["version"] = week["version"]
+            print(f"[SHIFTS] Saved {len(changes)} of {len(week_starts)} weeks from {week_starts[0]} in one transaction")
+            return saved
+
+    def replace_week(
+        self,
+        business_id: str,
+        week_start: str,
+        shifts: List[Dict],
+        expected_version: Optional[int] = None
+    ) -> Dict:
+        """
+        Atomically swap the week's shifts for these ones ([{"employee_id", "day", "start_time", "end_time"}]).
+        Returns {"version", "deleted", "inserted"}; raises ScheduleVersionConflict on a version mismatch.
+        """
+        rows = [
+            {
+                "day_of_week": shift["day"],
+                "employee_id": shift["employee_id"],
+                "start_time": shift.get("start_time", "10:00"),
+                "end_time": shift.get("end_time", "18:00")
+            }
+            for shift in shifts
+        ]
+        try:
+            result = get_supabase().rpc("replace_week_shifts", {
+                "p_business_id": business_id,
+                "p_week_start": week_start,
+                "p_shifts": rows,
+                "p_expected_version": expected_version
+            }).execute()
+        except APIError as e:
+            if e.code == "PT409":
+                raise ScheduleVersionConflict(e.message) from e
+            raise
+
+        print(f"[SHIFTS] Replaced week {week_start}: -{result.data['deleted']} +{result.data['inserted']} "
+              f"(v{result.data['version']})")
+        return result.data
+
+    def copy_week(
+        self,
+        business_id: str,
+        from_week: str,
+        to_week: str,
+        expected_version: Optional[int] = None
+    ) -> Dict:
+        """
+        Replace to_week's shifts with a copy of from_week's, server-side in one statement.
+        Returns {"version", "deleted", "inserted"}; raises ScheduleWeekNotFound if from_week
+        is empty and ScheduleVersionConflict on a version mismatch of to_week.
+        """
+        try:
+            result = get_supabase().rpc("copy_week_shifts", {
+                "p_business_id": business_id,
+                "p_from_week": from_week,
+                "p_to_week": to_week,
+                "p_expected_version": expected_version
+            }).execute()
+        except APIError as e:
+            if e.code == "PT404":
+                raise ScheduleWeekNotFound(e.message) from e
+            if e.code == "PT409":
+                raise ScheduleVersionConflict(e.message) from e
+            raise
+
+        print(f"[SHIFTS] Copied week {from_week} to {to_week}: -{result.data['deleted']} +{result.data['inserted']} "
+              f"(v{result.data['version']})")
+        return result.data
+
+# Singleton instance
+shift_store = ShiftStore()
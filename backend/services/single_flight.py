@@ -0,0 +1,58 @@
+"""
+In-flight request coalescing for expensive AI endpoints
+Concurrent requests with the same operation, business and input fingerprint
+share one worker-thread call instead of each starting their own LLM request.
+The shared call runs as its own task, so a caller that disconnects does not
+cancel it for the others. Coalescing is per process (per uvicorn worker).
+"""
+import asyncio
+import hashlib
+import json
+from typing import Any, Callable, Dict
+from starlette.concurrency import run_in_threadpool
+
+def fingerprint(*parts: Any) -> str:
+    """Stable hash of JSON-serializable inputs"""
+    material = json.dumps(parts, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+class SingleFlight:
+    def __init__(self):
+        # key -> task running the shared call; only touched from the event loop
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.started = 0
+        self.coalesced = 0
+
+    def key(self, operation: str, business_id: str, *inputs: Any) -> str:
+        return f"{operation}:{business_id}:{fingerprint(*inputs)}"
+
+    async def run(self, key: str, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """Run fn(*args, **kwargs) in the threadpool, or join the identical call already running"""
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(run_in_threadpool(fn, *args, **kwargs))
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._finish(key, done))
+            self.started += 1
+        else:
+            self.coalesced += 1
+            print(f"[SINGLE-FLIGHT] Joined in-flight {key.rsplit(':', 1)[0]} call")
+
+        # shield: one caller going away must not cancel the call for everyone else
+        return await asyncio.shield(task)
+
+    def _finish(self, key: str, task: asyncio.Future):
+        self._inflight.pop(key, None)
+        # Mark the exception retrieved even if every caller has gone away
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "in_flight": len(self._inflight),
+            "started": self.started,
+            "coalesced": self.coalesced
+        }
+
+# Singleton instance
+single_flight = SingleFlight()
@@ -0,0 +1,184 @@
+"""
+Pooled SMTP sender
+Keeps authenticated SMTP sessions alive between messages, reconnects transparently
+when the server drops an idle session, and sends batches over a single session
+"""
+import smtplib
+import threading
+import time
+from contextlib import contextmanager
+from email.message import Message
+from typing import List, Optional
+
+# Errors that mean the session itself is gone (as opposed to a rejected message).
+# Not OSError: every SMTPException is one, including per-message rejections.
+SESSION_ERRORS = (smtplib.SMTPServerDisconnected, ConnectionError)
+
+class _PooledConnection:
+    def __init__(self, server: smtplib.SMTP):
+        self.server = server
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+
+class SMTPConnectionPool:
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        username: Optional[str] = None,
+        password: Optional[str] = None,
+        use_ssl: bool = True,
+        size: int = 2,
+        idle_timeout: float = 60.0,
+        timeout: float = 30.0
+    ):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.use_ssl = use_ssl
+        self.size = size
+        # Sessions idle longer than this get a NOOP probe before reuse
+        self.idle_timeout = idle_timeout
+        self.timeout = timeout
+
+        self._idle: List[_PooledConnection] = []
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(size)
+
+        self.stats = {"connects": 0, "reconnects": 0, "messages": 0}
+
+    def _connect(self) -> _PooledConnection:
+        if self.use_ssl:
+            server = smtplib.SMTP_SSL(self.host, self.port, timeout=self.timeout)
+        else:
+            server = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        if self.username and self.password:
+            try:
+                server.login(self.username, self.password)
+            except Exception:
+                server.close()
+                raise
+        self._count("connects")
+        return _PooledConnection(server)
+
+    def _count(self, key: str, amount: int = 1):
+        with self._lock:
+            self.stats[key] += amount
+
+    def _is_alive(self, conn: _PooledConnection) -> bool:
+        if time.monotonic() - conn.last_used < self.idle_timeout:
+            return True
+        try:
+            return conn.server.noop()[0] == 250
+        except SESSION_ERRORS + (smtplib.SMTPException,):
+            return False
+
+    @staticmethod
+    def _close(conn: _PooledConnection):
+        try:
+            conn.server.quit()
+        except Exception:
+            try:
+                conn.server.close()
+            except Exception:
+                pass
+
+    @contextmanager
+    def connection(self):
+        """Borrow an authenticated session; broken sessions are discarded instead of returned"""
+        self._slots.acquire()
+        conn = None
+        try:
+            with self._lock:
+                conn = self._idle.pop() if self._idle else None
+            if conn is not None and not self._is_alive(conn):
+                self._close(conn)
+                self._count("reconnects")
+                conn = None
+            if conn is None:
+                try:
+                    conn = self._connect()
+                except (smtplib.SMTPAuthenticationError, smtplib.SMTPConnectError):
+                    raise
+                except OSError as e:
+                    # Any other connect/handshake failure (refused, DNS, timeout, server hung up)
+                    # surfaces as a connect error so callers don't mistake it for a dropped session
+                    raise smtplib.SMTPConnectError(-1, f"{type(e).__name__}: {e}") from e
+
+            yield conn
+
+            conn.last_used = time.monotonic()
+            with self._lock:
+                self._idle.append(conn)
+            conn = None
+        finally:
+            if conn is not None:
+                self._close(conn)
+            self._slots.release()
+
+    def send_message(self, message: Message) -> bool:
+        """Send one message; raises on failure"""
+        results = self.send_many([message])
+        if isinstance(results[0], Exception):
+            raise results[0]
+        return True
+
+    def send_many(self, messages: List[Message]) -> List[object]:
+        """
+        Send messages over as few sessions as possible.
+        Returns one entry per message: True on success, the exception otherwise.
+        A dropped session is re-established once per message before giving up on it.
+        """
+        results: List[object] = [None] * len(messages)
+        reconnected = set()
+        index = 0
+
+        while index < len(messages):
+            try:
+                with self.connection() as conn:
+                    while index < len(messages):
+                        try:
+                            conn.server.send_message(messages[index])
+                            results[index] = True
+                            self._count("messages")
+                        except SESSION_ERRORS:
+                            raise
+                        except smtplib.SMTPException as e:
+                            # Message-level rejection - the session is still usable
+                            results[index] = e
+                            try:
+                                conn.server.rset()
+                            except smtplib.SMTPException:
+                                pass
+                        except OSError as e:
+                            # Socket-level failure mid-send (e.g. a timeout) - the session is unusable
+                            raise smtplib.SMTPServerDisconnected(f"{type(e).__name__}: {e}") from e
+                        index += 1
+            except (smtplib.SMTPAuthenticationError, smtplib.SMTPConnectError) as e:
+                # Connect or login failed - nothing in this batch can go out, and retrying
+                # bad credentials per message would only risk an account lockout
+                for i in range(index, len(messages)):
+                    results[i] = e
+                break
+            except SESSION_ERRORS as e:
+                if index in reconnected:
+                    results[index] = e
+                    index += 1
+                else:
+                    reconnected.add(index)
+                    self._count("reconnects")
+            except smtplib.SMTPException as e:
+                # Unexpected protocol failure outside a message send - give up on the batch
+                for i in range(index, len(messages)):
+                    results[i] = e
+                break
+
+        return results
+
+    def close_all(self):
+        """Close every idle session"""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            self._close(conn)
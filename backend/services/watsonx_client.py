@@ -1,64 +1,322 @@
-"""IBM WatsonX AI client for inventory and scheduling"""
+"""
+LLM client for inventory, scheduling and financial analysis
+Prompts, caching and answer parsing live here; the model itself comes from the
+backend selected by LLM_BACKEND (WatsonX by default, or the offline fake).
+"""
+import json
 import os
-from typing import List, Dict, Any
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import List, Dict, Any, Iterator, Optional, Tuple
 from dotenv import load_dotenv
-import json
-from ibm_watsonx_ai.foundation_models import Model
-from ibm_watsonx_ai.metanames import GenTextParamsMetaNames as GenParams
+from services.circuit_breaker import CircuitBreaker, CircuitOpenError
+from services.llm_backend import LLMResult, create_backend, prompt_fingerprint
+from services.llm_cache import llm_cache, make_cache_key
+from services.json_extract import extract_json
+from services.llm_metrics import llm_metrics
+from services.prompt_builder import build_inventory_prompt, build_schedule_prompt, estimate_tokens
+from services.schedule_engine import WEEK_DAYS, STORE_HOURS_DAY_NAMES, balance_weekly_load, solve_schedule
 
 load_dotenv()
 
+# Seconds an operation may wait for the model before giving up (LLM_TIMEOUT_<OPERATION>_SECONDS overrides)
+DEFAULT_TIMEOUTS = {
+    "inventory_orders": 20.0,
+    "schedule": 60.0,
+    "analyze_financials": 20.0
+}
+
+class LLMUnavailableError(Exception):
+    """The model could not answer: circuit open, deadline exceeded or backend error"""
+
 class WatsonXClient:
     def __init__(self):
-        self.api_key = os.getenv("WATSONX_API_KEY")
-        self.project_id = os.getenv("WATSONX_PROJECT_ID")
-        self.url = os.getenv("WATSONX_URL", "https://us-south.ml.cloud.ibm.com")
-        
-        # Validate credentials
-        if not self.api_key:
-            raise ValueError("WATSONX_API_KEY is required")
-        if not self.project_id:
-            raise ValueError("WATSONX_PROJECT_ID is required")
-        if self.api_key.startswith("ApiKey-"):
-            raise ValueError(
-                "Invalid API key format! You provided the Key ID instead of the actual key.\n"
-                "Go to https://cloud.ibm.com/iam/apikeys and create a NEW key.\n"
-                "Copy the LONG string shown (NOT the Key ID)."
-            )
-        
-        print("=" * 60)
-        print("🤖 WATSONX AI ENABLED")
-        print("=" * 60)
-        print(f"Model: meta-llama/llama-3-3-70b-instruct")
-        print(f"Project ID: {self.project_id[:8]}...")
-        print(f"API Key: {self.api_key[:10]}...")
-        print("=" * 60)
-        
-        self.credentials = {
-            "url": self.url,
-            "apikey": self.api_key
-        }
-        
         self.model_id = "meta-llama/llama-3-3-70b-instruct"
         
+        # Keys match ibm_watsonx_ai GenTextParamsMetaNames
         self.parameters = {
-            GenParams.DECODING_METHOD: "greedy",
-            GenParams.MAX_NEW_TOKENS: 1000,
-            GenParams.MIN_NEW_TOKENS: 1,
-            GenParams.TEMPERATURE: 0.3,
-            GenParams.REPETITION_PENALTY: 1.1
+            "decoding_method": "greedy",
+            "max_new_tokens": 1000,
+            "min_new_tokens": 1,
+            "temperature": 0.3,
+            "repetition_penalty": 1.1
         }
+        
+        self.backend = create_backend(self.model_id)
+        
+        self.default_timeout = float(os.getenv("LLM_TIMEOUT_SECONDS", "30"))
+        # Calls run here so a deadline can be enforced; the model call itself has none
+        self._executor = ThreadPoolExecutor(
+            max_workers=int(os.getenv("LLM_MAX_CONCURRENT_CALLS", "16")),
+            thread_name_prefix="llm-call"
+        )
+        # Per-day schedule prompts in flight at once for one request (generate_schedule_by_day)
+        self.day_concurrency = max(1, int(os.getenv("LLM_SCHEDULE_DAY_CONCURRENCY", "3")))
+        self.breaker = CircuitBreaker(
+            f"llm:{self.backend.name}",
+            failure_threshold=int(os.getenv("LLM_BREAKER_FAILURES", "5")),
+            slow_call_seconds=float(os.getenv("LLM_BREAKER_SLOW_SECONDS", "20")),
+            slow_call_threshold=int(os.getenv("LLM_BREAKER_SLOW_CALLS", "3")),
+            reset_timeout_seconds=float(os.getenv("LLM_BREAKER_RESET_SECONDS", "30"))
+        )
+        
+        # Append live completions here so the fake backend can replay them offline
+        self.record_path = os.getenv("LLM_RECORD_FILE") or None
+        self._record_lock = threading.Lock()
+    
+    def _record(self, prompt: str, response: str):
+        if not self.record_path:
+            return
+        try:
+            with self._record_lock, open(self.record_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps({"prompt_sha256": prompt_fingerprint(prompt), "response": response}) + "\n")
+        except OSError as e:
+            print(f"[LLM] Could not record completion: {e}")
+    
+    def timeout_for(self, operation: str) -> float:
+        override = os.getenv(f"LLM_TIMEOUT_{operation.upper()}_SECONDS")
+        if override:
+            return float(override)
+        return DEFAULT_TIMEOUTS.get(operation, self.default_timeout)
     
-    def _get_model(self):
-        """Initialize WatsonX model"""
-        return Model(
-            model_id=self.model_id,
-            params=self.parameters,
-            credentials=self.credentials,
-            project_id=self.project_id
+    def _call_backend(
+        self,
+        operation: str,
+        prompt: str,
+        parameters: Dict[str, Any],
+        business_id: Optional[str] = None
+    ) -> Tuple[LLMResult, float, float]:
+        """
+        One model call behind the circuit breaker and the operation's deadline.
+        Returns (result, queue_wait_ms, latency_ms) and records the call in llm_metrics.
+        """
+        try:
+            self.breaker.check()
+        except CircuitOpenError as e:
+            llm_metrics.record_call(operation, business_id, "circuit_open")
+            raise LLMUnavailableError(str(e))
+        
+        timeout = self.timeout_for(operation)
+        timing = {"submitted": time.monotonic()}
+        
+        def run() -> LLMResult:
+            timing["started"] = time.monotonic()
+            return self.backend.generate(prompt, parameters)
+        
+        future = self._executor.submit(run)
+        try:
+            result = future.result(timeout=timeout)
+        except FutureTimeoutError:
+            # Still queued -> never runs; already running -> finishes in the background, result discarded
+            future.cancel()
+            queue_wait_ms = (timing.get("started", time.monotonic()) - timing["submitted"]) * 1000
+            llm_metrics.record_call(operation, business_id, "timeout", queue_wait_ms=queue_wait_ms)
+            self.breaker.record_failure(f"{operation} timed out after {timeout:g}s")
+            raise LLMUnavailableError(f"{operation} timed out after {timeout:g}s")
+        except Exception as e:
+            llm_metrics.record_call(operation, business_id, "error")
+            self.breaker.record_failure(f"{type(e).__name__}: {e}")
+            raise LLMUnavailableError(f"{operation} failed: {type(e).__name__}: {e}") from e
+        
+        finished = time.monotonic()
+        queue_wait_ms = (timing["started"] - timing["submitted"]) * 1000
+        latency_ms = (finished - timing["started"]) * 1000
+        self.breaker.record_success(finished - timing["submitted"])
+        llm_metrics.record_call(
+            operation,
+            business_id,
+            "ok",
+            queue_wait_ms=queue_wait_ms,
+            latency_ms=latency_ms,
+            prompt_tokens=result.prompt_tokens,
+            completion_tokens=result.completion_tokens
         )
+        return result, queue_wait_ms, latency_ms
+    
+    def generate_text(
+        self,
+        prompt: str,
+        business_id: Optional[str] = None,
+        operation: str = "generate",
+        cache_ttl: Optional[float] = None,
+        max_new_tokens: Optional[int] = None
+    ) -> str:
+        """
+        Run a prompt on the configured backend.
+        With a business_id and greedy decoding, identical prompts are served from the cache.
+        """
+        text, _ = self.generate_text_with_usage(prompt, business_id, operation, cache_ttl, max_new_tokens)
+        return text
     
-    def generate_inventory_orders(self, items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    def generate_text_with_usage(
+        self,
+        prompt: str,
+        business_id: Optional[str] = None,
+        operation: str = "generate",
+        cache_ttl: Optional[float] = None,
+        max_new_tokens: Optional[int] = None
+    ) -> Tuple[str, Dict[str, Any]]:
+        """
+        generate_text plus token usage for the call:
+        {"prompt_tokens", "completion_tokens", "max_new_tokens", "stop_reason",
+         "queue_wait_ms", "latency_ms", "cached"}
+        """
+        parameters = dict(self.parameters)
+        if max_new_tokens:
+            parameters["max_new_tokens"] = max_new_tokens
+        
+        cache_key = None
+        if business_id and parameters.get("decoding_method") == "greedy":
+            cache_key = make_cache_key(business_id, self.backend.model_id, parameters, prompt)
+            cached = llm_cache.get(business_id, cache_key)
+            llm_metrics.record_cache(operation, business_id, hit=cached is not None)
+            if cached is not None:
+                print(f"[LLM] op={operation} business={business_id} cache=hit")
+                return cached, {
+                    "prompt_tokens": 0,
+                    "completion_tokens": 0,
+                    "max_new_tokens": parameters["max_new_tokens"],
+                    "stop_reason": "cached",
+                    "queue_wait_ms": 0.0,
+                    "latency_ms": 0.0,
+                    "cached": True
+                }
+        
+        result, queue_wait_ms, latency_ms = self._call_backend(operation, prompt, parameters, business_id)
+        response = result.text
+        usage = {
+            "prompt_tokens": result.prompt_tokens,
+            "completion_tokens": result.completion_tokens,
+            "max_new_tokens": parameters["max_new_tokens"],
+            "stop_reason": result.stop_reason,
+            "queue_wait_ms": round(queue_wait_ms, 1),
+            "latency_ms": round(latency_ms, 1),
+            "cached": False
+        }
+        print(
+            f"[LLM] op={operation} business={business_id or '-'} cache={'miss' if cache_key else 'off'} "
+            f"wait_ms={queue_wait_ms:.0f} latency_ms={latency_ms:.0f} "
+            f"prompt_tokens={usage['prompt_tokens']} completion_tokens={usage['completion_tokens']} "
+            f"budget={usage['max_new_tokens']} stop={usage['stop_reason']}"
+        )
+        if usage["stop_reason"] == "max_tokens":
+            print(f"   ⚠️  {operation} hit its MAX_NEW_TOKENS budget - output may be truncated")
+        
+        self._record(prompt, response)
+        if cache_key:
+            llm_cache.set(business_id, cache_key, response, ttl=cache_ttl)
+        return response, usage
+    
+    def cache_key_for(self, prompt: str, business_id: str) -> Optional[str]:
+        """Key generate_text caches this prompt under (None when caching is off)"""
+        if not business_id or self.parameters.get("decoding_method") != "greedy":
+            return None
+        return make_cache_key(business_id, self.backend.model_id, self.parameters, prompt)
+    
+    def cache_text(self, prompt: str, business_id: str, text: str, cache_ttl: Optional[float] = None):
+        """Store an answer for a prompt, e.g. a stream the caller stopped once it had what it needed"""
+        cache_key = self.cache_key_for(prompt, business_id)
+        if cache_key and text:
+            llm_cache.set(business_id, cache_key, text, ttl=cache_ttl)
+    
+    def generate_text_stream(
+        self,
+        prompt: str,
+        business_id: Optional[str] = None,
+        operation: str = "generate",
+        cache_ttl: Optional[float] = None
+    ) -> Iterator[str]:
+        """
+        Yield the completion in chunks as the model produces them, behind the circuit
+        breaker and the operation's deadline (which covers the whole stream).
+        Closing the iterator early closes the HTTP stream, which stops generation.
+        Only completions that ran to the end are cached here; callers that stop early
+        can store their final text with cache_text. A cached answer is yielded whole.
+        """
+        cache_key = self.cache_key_for(prompt, business_id)
+        if cache_key:
+            cached = llm_cache.get(business_id, cache_key)
+            llm_metrics.record_cache(operation, business_id, hit=cached is not None)
+            if cached is not None:
+                print(f"[LLM] op={operation} business={business_id} cache=hit stream=true")
+                yield cached
+                return
+        
+        try:
+            self.breaker.check()
+        except CircuitOpenError as e:
+            llm_metrics.record_call(operation, business_id, "circuit_open")
+            raise LLMUnavailableError(str(e))
+        
+        # The backend stream is read on a worker thread so waiting for a chunk can time out
+        timeout = self.timeout_for(operation)
+        chunk_queue: "queue.Queue[Tuple[str, Any]]" = queue.Queue()
+        stop = threading.Event()
+        
+        def pump():
+            stream = self.backend.stream(prompt, self.parameters)
+            try:
+                for chunk in stream:
+                    if stop.is_set():
+                        return
+                    chunk_queue.put(("chunk", chunk))
+                chunk_queue.put(("end", None))
+            except Exception as e:
+                chunk_queue.put(("error", e))
+            finally:
+                stream.close()
+        
+        chunks = []
+        outcome = "stopped_early"
+        start = time.monotonic()
+        future = self._executor.submit(pump)
+        try:
+            while True:
+                try:
+                    kind, value = chunk_queue.get(timeout=max(0.0, start + timeout - time.monotonic()))
+                except queue.Empty:
+                    outcome = "timeout"
+                    self.breaker.record_failure(f"{operation} timed out after {timeout:g}s")
+                    raise LLMUnavailableError(f"{operation} timed out after {timeout:g}s")
+                if kind == "end":
+                    break
+                if kind == "error":
+                    outcome = "error"
+                    if not chunks:
+                        self.breaker.record_failure(f"{type(value).__name__}: {value}")
+                    raise LLMUnavailableError(f"{operation} failed: {type(value).__name__}: {value}") from value
+                if not chunks:
+                    # Time to first chunk is what the breaker judges a stream by
+                    self.breaker.record_success(time.monotonic() - start)
+                chunks.append(value)
+                yield value
+            if not chunks:
+                self.breaker.record_success(time.monotonic() - start)
+            outcome = "ok"
+        finally:
+            stop.set()
+            future.cancel()
+            # Streams report no token counts; estimate them like the prompt builder does
+            llm_metrics.record_call(
+                operation,
+                business_id,
+                outcome,
+                latency_ms=(time.monotonic() - start) * 1000,
+                prompt_tokens=estimate_tokens(prompt),
+                completion_tokens=estimate_tokens("".join(chunks))
+            )
+        
+        self._record(prompt, "".join(chunks))
+        if cache_key:
+            llm_cache.set(business_id, cache_key, "".join(chunks), ttl=cache_ttl)
+    
+    def generate_inventory_orders(
+        self,
+        items: List[Dict[str, Any]],
+        business_id: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
         """
         Generate smart inventory orders using WatsonX.
         
@@ -68,95 +326,37 @@ class WatsonXClient:
         print("🤖 Calling WatsonX AI for inventory ordering...")
         print(f"   Processing {len(items)} items")
         
-        prompt = f"""You are an inventory management AI. Given a list of items with current and minimum quantities, calculate how much to order for each item.
-
-Rules:
-- If current >= min: order_qty = 0 (no order needed)
-- If current < min: order_qty = (min - current) + buffer
-- Add a 20% buffer for items marked as low stock
-- Return ONLY valid JSON, no explanations
-
-Input items:
-{json.dumps(items, indent=2)}
-
-Return a JSON object in this exact format:
-{{"orders": [{{"id": 1, "order_qty": 15}}]}}
-
-JSON Response:"""
+        built = build_inventory_prompt(items)
+        print(f"   Prompt ~{built.estimated_tokens} tokens, answer budget {built.max_new_tokens} tokens")
 
-        model = self._get_model()
         print("   Sending request to WatsonX Llama-3.3-70B...")
-        response = model.generate_text(prompt=prompt)
+        response, _ = self.generate_text_with_usage(
+            built.prompt,
+            business_id=business_id,
+            operation="inventory_orders",
+            max_new_tokens=built.max_new_tokens
+        )
         print("   ✅ Received response from WatsonX AI")
         print(f"   📝 Raw response: {response[:500]}...")
         
-        # Parse JSON response - be very robust
-        response_text = response.strip()
-        
-        # Try to extract JSON from markdown code blocks
-        if "```json" in response_text:
-            response_text = response_text.split("```json")[1].split("```")[0].strip()
-        elif "```" in response_text:
-            response_text = response_text.split("```")[1].split("```")[0].strip()
-        
-        # Find ALL JSON objects and pick the best one (non-empty)
-        try:
-            all_json_objects = []
-            i = 0
-            while i < len(response_text):
-                if response_text[i] == '{':
-                    # Found start of a JSON object
-                    start = i
-                    brace_count = 0
-                    end = start
-                    for j in range(start, len(response_text)):
-                        if response_text[j] == '{':
-                            brace_count += 1
-                        elif response_text[j] == '}':
-                            brace_count -= 1
-                            if brace_count == 0:
-                                end = j + 1
-                                break
-                    
-                    # Extract this JSON object
-                    json_text = response_text[start:end]
-                    try:
-                        parsed = json.loads(json_text)
-                        all_json_objects.append(parsed)
-                        print(f"   🔍 Found JSON object: {json_text}")
-                    except json.JSONDecodeError:
-                        pass  # Skip invalid JSON
-                    
-                    i = end
-                else:
-                    i += 1
-            
-            # Filter to only objects with 'orders' key (ignore example data)
-            valid_results = [obj for obj in all_json_objects if 'orders' in obj]
-            print(f"   📊 Found {len(valid_results)} valid order objects (out of {len(all_json_objects)} total JSON)")
-            
-            # Pick the best result: prefer non-empty orders array
-            best_result = None
-            for obj in valid_results:
-                if len(obj['orders']) > 0:
-                    best_result = obj
-                    break
-            
-            # If no non-empty found, use the last valid one
-            if not best_result and valid_results:
-                best_result = valid_results[-1]
-            
-            if best_result:
-                print(f"   ✅ Selected result: {best_result}")
-                print(f"   📦 Generated {len(best_result.get('orders', []))} order recommendations")
-                return best_result.get("orders", [])
-            else:
-                print("   ❌ No valid JSON found")
-                return []
-        except (ValueError, json.JSONDecodeError) as e:
-            print(f"   ❌ Failed to parse JSON: {e}")
-            print(f"   Response text: {response_text[:200]}...")
+        # Single-pass extraction; rows must decode against the input items
+        result = extract_json(
+            response,
+            required_keys=("orders",),
+            validate=lambda obj: built.decode(obj) is not None,
+            ignore=[built.example]
+        )
+        llm_metrics.record_parse("inventory_orders", business_id, "ok" if result is not None else "invalid")
+        if result is None:
+            print("   ❌ No valid JSON found")
+            print(f"   Response text: {response[:200]}...")
             return []
+        
+        orders = built.decode(result)
+        if built.rejected:
+            print(f"   ⚠️ Skipped {len(built.rejected)} malformed or unknown order rows: {built.rejected[:5]}")
+        print(f"   📦 Generated {len(orders)} order recommendations")
+        return orders
     
     def generate_schedule(
         self, 
@@ -166,7 +366,8 @@ JSON Response:"""
         preferences: str = "",
         current_schedule: List[Dict] = None,
         store_hours: Dict = None,
-        shift_slots: List[Dict] = None
+        shift_slots: List[Dict] = None,
+        business_id: Optional[str] = None
     ) -> List[Dict[str, Any]]:
         """
         Generate optimal employee schedule using WatsonX.
@@ -176,69 +377,109 @@ JSON Response:"""
         - staffing_rules: [{"day": "fri", "required": 5}]
         - employees: [{"id": 1, "strength": "strong", "availability": ["fri"]}]
         
-        Output: [{"employee_id": 1, "day": "fri"}]
+        Output: [{"employee_id": 1, "day": "fri", "start_time": "09:00", "end_time": "17:00"}]
         """
         print("🤖 Calling WatsonX AI for schedule generation...")
         print(f"   Week starting: {week_start}")
         print(f"   {len(employees)} employees, {len(staffing_rules)} days to schedule")
         
-        preferences_section = f"\n\nAdditional Preferences:\n{preferences}\n" if preferences.strip() else ""
-        
-        current_schedule_section = ""
-        if current_schedule:
-            current_schedule_section = f"\n\nCurrent Schedule (you can modify/improve this):\n{json.dumps(current_schedule, indent=2)}\n"
-        
-        store_hours_section = ""
-        if store_hours:
-            store_hours_section = f"\n\nStore Hours (schedule shifts within these times):\n{json.dumps(store_hours, indent=2)}\n"
+        built = build_schedule_prompt(
+            week_start,
+            staffing_rules,
+            employees,
+            preferences=preferences,
+            current_schedule=current_schedule,
+            store_hours=store_hours,
+            shift_slots=shift_slots
+        )
+        print(f"   Prompt ~{built.estimated_tokens} tokens, answer budget {built.max_new_tokens} tokens")
+
+        print("   Sending request to WatsonX Llama-3.3-70B...")
+        response, _ = self.generate_text_with_usage(
+            built.prompt,
+            business_id=business_id,
+            operation="schedule",
+            max_new_tokens=built.max_new_tokens
+        )
+        print("   ✅ Received response from WatsonX AI")
         
-        shift_slots_section = ""
-        if shift_slots:
-            shift_slots_section = f"\n\nShift Slots (assign employees to these specific time slots):\n{json.dumps(shift_slots, indent=2)}\n"
+        # Rows must decode to real employees (rejects echoed format examples)
+        result = extract_json(
+            response,
+            required_keys=("shifts",),
+            validate=lambda obj: built.decode(obj) is not None,
+            ignore=[built.example]
+        )
+        llm_metrics.record_parse("schedule", business_id, "ok" if result is not None else "invalid")
+        if result is None:
+            print(f"   ❌ No valid schedule JSON in response: {response[:200]}...")
+            raise ValueError("WatsonX returned no valid schedule JSON")
         
-        prompt = f"""You are a scheduling AI for a small business. Create an optimal employee schedule.
-
-Rules:
-1. ONLY schedule employees who are available that day
-2. NEVER schedule the same employee twice in one day  
-3. Meet the required staff count for each day
-4. ONLY schedule shifts during store operating hours (ignore closed days)
-5. IMPORTANT: If shift slots are provided, you MUST use ONLY those exact time slots. Match employees to the configured slots - DO NOT create custom times. Each shift MUST use the start_time and end_time from one of the shift_slots for that day.
-6. Pair SHIFTLEADER employees with NEW employees when possible
-7. Distribute shifts evenly across employees
-8. If not enough staff available, schedule as many as possible
-9. When shift_slots are configured, create one shift per slot per employee (respecting the required_count for each slot){preferences_section}
+        shifts = built.decode(result)
+        if built.rejected:
+            print(f"   ⚠️ Skipped {len(built.rejected)} malformed or unknown shift rows: {built.rejected[:5]}")
+        print(f"   📅 Generated {len(shifts)} shifts across the week")
+        return shifts
 
-Week Start: {week_start}
+    def generate_schedule_by_day(
+        self,
+        week_start: str,
+        staffing_rules: List[Dict],
+        employees: List[Dict],
+        preferences: str = "",
+        current_schedule: List[Dict] = None,
+        store_hours: Dict = None,
+        shift_slots: List[Dict] = None,
+        business_id: Optional[str] = None
+    ) -> Tuple[List[Dict[str, Any]], List[str]]:
+        """
+        Large-team mode: one small prompt per day, run concurrently (at most
+        LLM_SCHEDULE_DAY_CONCURRENCY at once), then merged and rebalanced across the week.
+        A day whose prompt fails is filled by the local solver.
 
-Staffing Requirements:
-{json.dumps(staffing_rules, indent=2)}{store_hours_section}{shift_slots_section}
+        Returns (shifts, days that used the fallback).
+        """
+        days = [day for day in WEEK_DAYS if any(rule.get("day") == day for rule in staffing_rules)
+                or any(slot.get("day_of_week") == day for slot in (shift_slots or []))]
+        print(f"🤖 Splitting schedule generation into {len(days)} per-day prompts "
+              f"({len(employees)} employees, {self.day_concurrency} at a time)")
 
-Available Employees:
-{json.dumps(employees, indent=2)}{current_schedule_section}
+        def solve_day(day: str) -> Tuple[str, List[Dict], bool]:
+            day_rules = [rule for rule in staffing_rules if rule.get("day") == day]
+            day_employees = [emp for emp in employees if day in emp.get("availability", [])]
+            day_slots = [slot for slot in (shift_slots or []) if slot.get("day_of_week") == day]
+            day_current = [shift for shift in (current_schedule or []) if shift.get("day_of_week") == day]
+            day_hours = None
+            if store_hours and STORE_HOURS_DAY_NAMES[day] in store_hours:
+                day_hours = {STORE_HOURS_DAY_NAMES[day]: store_hours[STORE_HOURS_DAY_NAMES[day]]}
 
-Return ONLY valid JSON in this exact format:
-{{"shifts": [{{"employee_id": "uuid-here", "day": "fri", "start_time": "09:00", "end_time": "17:00"}}]}}
+            try:
+                shifts = self.generate_schedule(
+                    week_start,
+                    day_rules,
+                    day_employees,
+                    preferences=preferences,
+                    current_schedule=day_current,
+                    store_hours=day_hours,
+                    shift_slots=day_slots or None,
+                    business_id=business_id
+                )
+                # A sub-problem may only answer for its own day
+                return day, [shift for shift in shifts if shift.get("day") == day], False
+            except (ValueError, LLMUnavailableError) as e:
+                print(f"   ⚠️ {day}: {e} - using local solver for this day")
+                shifts = solve_schedule(day_rules, day_employees, store_hours=day_hours, shift_slots=day_slots or None)
+                return day, shifts, True
 
-JSON Response:"""
+        with ThreadPoolExecutor(max_workers=self.day_concurrency, thread_name_prefix="schedule-day") as pool:
+            results = list(pool.map(solve_day, days))
 
-        model = self._get_model()
-        print("   Sending request to WatsonX Llama-3.3-70B...")
-        response = model.generate_text(prompt=prompt)
-        print("   ✅ Received response from WatsonX AI")
-        
-        # Parse JSON response
-        response_text = response.strip()
-        
-        if "```json" in response_text:
-            response_text = response_text.split("```json")[1].split("```")[0].strip()
-        elif "```" in response_text:
-            response_text = response_text.split("```")[1].split("```")[0].strip()
-        
-        result = json.loads(response_text)
-        shifts = result.get("shifts", [])
-        print(f"   📅 Generated {len(shifts)} shifts across the week")
-        return shifts
+        merged = [shift for _, shifts, _ in results for shift in shifts]
+        fallback_days = [day for day, _, used_fallback in results if used_fallback]
+        balanced = balance_weekly_load(merged, employees)
+        print(f"   📅 Merged {len(balanced)} shifts from {len(days)} days "
+              f"({len(fallback_days)} from fallback)")
+        return balanced, fallback_days
 
 # Singleton instance
 watsonx_client = WatsonXClient()
@@ -0,0 +1,67 @@
+"""StreamingAnalysisTrimmer must match trim_analysis however the text is chunked"""
+import random
+import pytest
+from services.financial_analysis import SECTION_START, StreamingAnalysisTrimmer, trim_analysis
+
+LAST_RECOMMENDATION = "3. Track waste on top ingredients"
+
+ANALYSIS = """KEY INSIGHTS
+• Revenue covers expenses with a healthy margin
+• Payroll is the largest controllable cost
+
+COST SAVINGS
+• Trim overtime hours to save $200 weekly
+
+WINS
+• Profitable every week this period
+
+RECOMMENDATIONS
+1. Review weekly labor against sales
+2. Bundle supply orders to cut costs
+3. Track waste on top ingredients"""
+
+RESPONSES = [
+    ANALYSIS,
+    "Sure! Here is the analysis:\n\n" + ANALYSIS,
+    "Here you go.\n" + ANALYSIS + "\n\nNote: I revised the numbers above.\n4. One more idea",
+    "No formatted section at all, just prose.",
+]
+
+def chunked(text, rng):
+    chunks, i = [], 0
+    while i < len(text):
+        size = rng.randint(1, 12)
+        chunks.append(text[i:i + size])
+        i += size
+    return chunks
+
+@pytest.mark.parametrize("response", RESPONSES, ids=["exact", "preamble", "trailing_notes", "unformatted"])
+@pytest.mark.parametrize("seed", range(5))
+def test_streamed_text_matches_trim_analysis(response, seed):
+    trimmer = StreamingAnalysisTrimmer()
+    emitted = []
+    for chunk in chunked(response, random.Random(seed)):
+        emitted.append(trimmer.feed(chunk))
+        if trimmer.done:
+            break
+
+    expected = trim_analysis(response)
+    assert trimmer.finish() == expected
+    if SECTION_START in response:
+        # done needs the 3rd recommendation's line to end; otherwise the stream simply ran out
+        assert trimmer.started
+        assert trimmer.done == (LAST_RECOMMENDATION + "\n" in response)
+        assert "".join(emitted) == expected
+    else:
+        assert not trimmer.started and "".join(emitted) == ""
+
+def test_nothing_is_emitted_after_done():
+    trimmer = StreamingAnalysisTrimmer()
+    trimmer.feed(ANALYSIS + "\n")
+    assert trimmer.done
+    assert trimmer.feed("4. Extra recommendation\n") == ""
+
+def test_trim_analysis_is_idempotent():
+    trimmed = trim_analysis(RESPONSES[2])
+    assert trimmed == ANALYSIS
+    assert trim_analysis(trimmed) == trimmed
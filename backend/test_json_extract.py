@@ -0,0 +1,42 @@
+"""extract_json on the response shapes the model produces"""
+from services.json_extract import extract_json, iter_json_objects
+
+ANSWER = {"orders": [[1, 18], [2, 42]]}
+EXAMPLE = {"orders": [[101, 15]]}
+
+def test_plain_and_fenced():
+    assert extract_json('{"orders": [[1, 18], [2, 42]]}', required_keys=("orders",)) == ANSWER
+    fenced = '```json\n{\n  "orders": [[1, 18], [2, 42]]\n}\n```\nThese include a buffer.'
+    assert extract_json(fenced, required_keys=("orders",)) == ANSWER
+
+def test_echoed_example_is_ignored():
+    text = 'Based on the format {"orders":[[101,15]]}, here is the result:\n{"orders": [[1, 18], [2, 42]]}'
+    assert extract_json(text, required_keys=("orders",), ignore=[EXAMPLE]) == ANSWER
+
+def test_non_empty_answer_wins_over_an_earlier_empty_one():
+    text = '{"orders": []}\nWait, corrected:\n{"orders": [[1, 18], [2, 42]]}'
+    assert extract_json(text, required_keys=("orders",)) == ANSWER
+
+def test_only_empty_answer_is_returned():
+    assert extract_json('{"orders": []}', required_keys=("orders",)) == {"orders": []}
+
+def test_braces_inside_strings_and_prose():
+    text = 'To compute {min - current} for {id}:\n{"note": "covers {close} \\"lead\\" }", "orders": [[1, 18], [2, 42]]}\n{buffer}'
+    assert extract_json(text, required_keys=("orders",)) == {"note": 'covers {close} "lead" }', **ANSWER}
+
+def test_inner_object_of_a_broken_outer_one():
+    text = '{"result": {"orders": [[1, 18], [2, 42]]},}'
+    assert extract_json(text, required_keys=("orders",)) == ANSWER
+
+def test_truncated_or_missing_json():
+    assert extract_json('{"orders": [[1, 18], [2, 4', required_keys=("orders",)) is None
+    assert extract_json("I'm sorry, I can't help with that.", required_keys=("orders",)) is None
+    assert extract_json("", required_keys=("orders",)) is None
+
+def test_validate_rejects_candidates():
+    text = '{"orders": [[999, 1]]}\n{"orders": [[1, 18], [2, 42]]}'
+    valid = lambda obj: all(row[0] in (1, 2) for row in obj["orders"])
+    assert extract_json(text, required_keys=("orders",), validate=valid) == ANSWER
+
+def test_objects_come_outermost_first():
+    assert list(iter_json_objects('x {"a": {"b": 1}} y {"c": 2}')) == [{"a": {"b": 1}}, {"c": 2}]
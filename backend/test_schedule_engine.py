@@ -0,0 +1,164 @@
+"""Invariants of the local scheduler: solve_schedule, repair_schedule and balance_hours"""
+import random
+from collections import Counter
+import pytest
+from services.fairness_engine import balance_hours, fairness_metrics
+from services.schedule_engine import LEADER, NEW, WEEK_DAYS, repair_schedule, solve_schedule, validate_schedule
+
+SLOT_TIMES = [("09:00:00", "13:00:00"), ("13:00:00", "17:00:00"), ("17:00:00", "21:00:00")]
+
+def make_team(size, seed, leaders=None):
+    """Seeded employees (every 5th a shiftleader, every 4th new) and two slots per time per day"""
+    rng = random.Random(seed)
+    employees = []
+    for i in range(size):
+        if leaders is not None:
+            strength = LEADER if i < leaders else (NEW if i % 2 else "normal")
+        else:
+            strength = LEADER if i % 5 == 0 else NEW if i % 4 == 0 else "normal"
+        employees.append({
+            "id": f"emp-{i}",
+            "full_name": f"Employee {i}",
+            "strength": strength,
+            "availability": sorted(rng.sample(WEEK_DAYS, rng.randint(3, 7)), key=WEEK_DAYS.index)
+        })
+    shift_slots = [
+        {"id": len(WEEK_DAYS) * s + d, "day_of_week": day, "slot_name": f"Slot {s}",
+         "start_time": start, "end_time": end, "required_count": 2}
+        for d, day in enumerate(WEEK_DAYS)
+        for s, (start, end) in enumerate(SLOT_TIMES)
+    ]
+    staffing_rules = [{"day": day, "required": 6} for day in WEEK_DAYS]
+    return employees, shift_slots, staffing_rules
+
+def slot_counts(shifts):
+    return Counter((s["day"], s["start_time"][:5], s["end_time"][:5]) for s in shifts)
+
+def assert_hard_constraints(shifts, employees, shift_slots):
+    by_id = {emp["id"]: emp for emp in employees}
+    for shift in shifts:
+        assert shift["day"] in by_id[shift["employee_id"]]["availability"], shift
+
+    per_day = Counter((s["employee_id"], s["day"]) for s in shifts)
+    assert max(per_day.values(), default=1) == 1
+
+    required = {
+        (slot["day_of_week"], slot["start_time"][:5], slot["end_time"][:5]): slot["required_count"]
+        for slot in shift_slots
+    }
+    for key, count in slot_counts(shifts).items():
+        assert count <= required[key], key
+
+    assert validate_schedule(shifts, employees, None, shift_slots)["valid"]
+
+def unpaired_slots(shifts, employees):
+    strength = {emp["id"]: emp["strength"] for emp in employees}
+    slots = {}
+    for shift in shifts:
+        slots.setdefault((shift["day"], shift["start_time"]), []).append(strength[shift["employee_id"]])
+    return [key for key, strengths in slots.items() if NEW in strengths and LEADER not in strengths]
+
+# ==================== SOLVER ====================
+
+@pytest.mark.parametrize("size,seed", [(6, 1), (12, 2), (30, 3), (80, 4)])
+def test_solver_keeps_hard_constraints(size, seed):
+    employees, shift_slots, staffing_rules = make_team(size, seed)
+    shifts = solve_schedule(staffing_rules, employees, None, shift_slots)
+    assert_hard_constraints(shifts, employees, shift_slots)
+
+def test_solver_fills_every_slot_when_staff_allows():
+    employees, shift_slots, staffing_rules = make_team(40, 5)
+    for emp in employees:
+        emp["availability"] = list(WEEK_DAYS)
+    shifts = solve_schedule(staffing_rules, employees, None, shift_slots)
+    assert all(count == 2 for count in slot_counts(shifts).values())
+    assert len(slot_counts(shifts)) == len(shift_slots)
+
+def test_solver_pairs_new_staff_with_a_leader():
+    # Enough leaders to put one on every slot of every day
+    employees, shift_slots, staffing_rules = make_team(40, 6, leaders=len(SLOT_TIMES) + 1)
+    for emp in employees:
+        emp["availability"] = list(WEEK_DAYS)
+    shifts = solve_schedule(staffing_rules, employees, None, shift_slots)
+    assert unpaired_slots(shifts, employees) == []
+
+def test_solver_is_deterministic():
+    employees, shift_slots, staffing_rules = make_team(25, 7)
+    first = solve_schedule(staffing_rules, employees, None, shift_slots)
+    assert solve_schedule(staffing_rules, employees, None, shift_slots) == first
+
+def test_solver_skips_closed_days():
+    employees, shift_slots, staffing_rules = make_team(20, 8)
+    store_hours = {"sunday": {"closed": True}}
+    shifts = solve_schedule(staffing_rules, employees, store_hours, shift_slots)
+    assert shifts and not any(s["day"] == "sun" for s in shifts)
+
+# ==================== REPAIR ====================
+
+def solved_week(size=20, seed=9):
+    employees, shift_slots, staffing_rules = make_team(size, seed)
+    for emp in employees:
+        emp["availability"] = list(WEEK_DAYS)
+    shifts = solve_schedule(staffing_rules, employees, None, shift_slots)
+    return employees, shift_slots, [{**shift, "id": i} for i, shift in enumerate(shifts)]
+
+def test_repair_refills_an_absence_and_leaves_other_shifts_alone():
+    employees, shift_slots, shifts = solved_week()
+    absent = shifts[0]
+    result = repair_schedule(shifts, employees, unavailable=[{"employee_id": absent["employee_id"], "day": absent["day"]}])
+
+    assert result["removed"] == [absent]
+    assert len(result["added"]) == 1
+    added = result["added"][0]
+    assert (added["day"], added["start_time"], added["end_time"]) == (absent["day"], absent["start_time"], absent["end_time"])
+    assert added["employee_id"] != absent["employee_id"]
+    assert [s for s in result["shifts"] if "id" in s] == shifts[1:]
+    assert_hard_constraints(result["shifts"], employees, shift_slots)
+
+def test_repair_trims_and_tops_up_slots():
+    employees, shift_slots, shifts = solved_week()
+    target = {"day": "tue", "start_time": "09:00:00", "end_time": "13:00:00"}
+    trimmed = repair_schedule(shifts, employees, slot_targets=[{**target, "required_count": 1}])
+    assert slot_counts(trimmed["shifts"])[("tue", "09:00", "13:00")] == 1
+    assert len(trimmed["removed"]) == 1 and not trimmed["added"]
+
+    topped = repair_schedule(shifts, employees, slot_targets=[{**target, "required_count": 3}])
+    assert slot_counts(topped["shifts"])[("tue", "09:00", "13:00")] == 3
+    per_day = Counter((s["employee_id"], s["day"]) for s in topped["shifts"])
+    assert max(per_day.values()) == 1
+
+def test_repair_vacates_shifts_of_inactive_employees():
+    employees, shift_slots, shifts = solved_week()
+    gone = shifts[0]["employee_id"]
+    active = [emp for emp in employees if emp["id"] != gone]
+    result = repair_schedule(shifts, active)
+
+    assert {s["employee_id"] for s in result["removed"]} == {gone}
+    assert not any(s["employee_id"] == gone for s in result["shifts"])
+    assert len(result["added"]) == len(result["removed"])
+    assert_hard_constraints(result["shifts"], active, shift_slots)
+
+def test_repair_reports_slots_it_cannot_fill():
+    employees = [{"id": "a", "full_name": "A", "availability": ["mon"]}]
+    shifts = [{"employee_id": "a", "day": "mon", "start_time": "09:00", "end_time": "17:00"}]
+    result = repair_schedule(shifts, employees, unavailable=[{"employee_id": "a", "day": "mon"}])
+    assert result["shifts"] == []
+    assert result["unfilled"] == [{"day": "mon", "start_time": "09:00", "end_time": "17:00", "missing": 1}]
+
+# ==================== HOURS BALANCING ====================
+
+@pytest.mark.parametrize("size,seed", [(10, 11), (40, 12)])
+def test_balance_hours_keeps_constraints_and_lowers_variance(size, seed):
+    employees, shift_slots, staffing_rules = make_team(size, seed)
+    # Uneven slot lengths, so equal shift counts are not equal hours
+    lengths = [("09:00:00", "11:00:00"), ("11:00:00", "15:00:00"), ("15:00:00", "21:00:00")]
+    for slot in shift_slots:
+        slot["start_time"], slot["end_time"] = lengths[int(slot["slot_name"][-1])]
+    shifts = solve_schedule(staffing_rules, employees, None, shift_slots)
+    balanced = balance_hours(shifts, employees)
+
+    assert_hard_constraints(balanced, employees, shift_slots)
+    assert slot_counts(balanced) == slot_counts(shifts)
+    assert len(unpaired_slots(balanced, employees)) <= len(unpaired_slots(shifts, employees))
+    before = fairness_metrics(shifts, employees)["summary"]["variance"]
+    assert fairness_metrics(balanced, employees)["summary"]["variance"] <= before
@@ -0,0 +1,74 @@
+"""diff_week: the minimal row changes must turn the stored week into the new one"""
+import random
+from collections import Counter
+import pytest
+from services.shift_store import diff_week
+
+DAYS = ["mon", "tue", "wed", "thu", "fri", "sat", "sun"]
+TIMES = [("09:00", "13:00"), ("13:00", "17:00"), ("17:00", "21:00")]
+
+def rows_for(shifts):
+    return [
+        {"id": i + 1, "employee_id": s["employee_id"], "day_of_week": s["day"],
+         "start_time": s["start_time"] + ":00", "end_time": s["end_time"] + ":00"}
+        for i, s in enumerate(shifts)
+    ]
+
+def random_week(rng, employees=8):
+    shifts = []
+    for day in DAYS:
+        for emp in rng.sample(range(employees), rng.randint(0, employees)):
+            start, end = rng.choice(TIMES)
+            shifts.append({"employee_id": f"e{emp}", "day": day, "start_time": start, "end_time": end})
+    return shifts
+
+def apply_diff(rows, diff):
+    """What the shifts table holds after save_week applies the diff"""
+    removed = {row["id"] for row in diff["removed"]}
+    moved = {move["id"]: move for move in diff["moved"]}
+    week = []
+    for row in rows:
+        if row["id"] in removed:
+            continue
+        times = moved[row["id"]]["to"] if row["id"] in moved else {"start_time": row["start_time"][:5], "end_time": row["end_time"][:5]}
+        week.append((row["employee_id"], row["day_of_week"], times["start_time"], times["end_time"]))
+    week.extend((s["employee_id"], s["day"], s["start_time"][:5], s["end_time"][:5]) for s in diff["added"])
+    return Counter(week)
+
+def as_counter(shifts):
+    return Counter((s["employee_id"], s["day"], s["start_time"][:5], s["end_time"][:5]) for s in shifts)
+
+@pytest.mark.parametrize("seed", range(20))
+def test_diff_round_trips(seed):
+    rng = random.Random(seed)
+    rows = rows_for(random_week(rng))
+    new_week = random_week(rng)
+    diff = diff_week(rows, new_week)
+
+    assert apply_diff(rows, diff) == as_counter(new_week)
+    touched = [row["id"] for row in diff["removed"]] + [move["id"] for move in diff["moved"]]
+    assert len(touched) == len(set(touched))
+    assert diff["unchanged"] + len(diff["moved"]) + len(diff["removed"]) == len(rows)
+
+def test_identical_week_changes_nothing():
+    week = random_week(random.Random(1))
+    diff = diff_week(rows_for(week), list(reversed(week)))
+    assert diff == {"added": [], "removed": [], "moved": [], "unchanged": len(week)}
+
+def test_time_change_is_one_move():
+    rows = rows_for([{"employee_id": "e1", "day": "mon", "start_time": "09:00", "end_time": "13:00"}])
+    diff = diff_week(rows, [{"employee_id": "e1", "day": "mon", "start_time": "13:00", "end_time": "17:00"}])
+    assert diff["added"] == [] and diff["removed"] == []
+    assert diff["moved"] == [{
+        "id": 1, "employee_id": "e1", "day": "mon",
+        "from": {"start_time": "09:00", "end_time": "13:00"},
+        "to": {"start_time": "13:00", "end_time": "17:00"}
+    }]
+
+def test_reassigned_shift_is_remove_plus_add():
+    rows = rows_for([{"employee_id": "e1", "day": "mon", "start_time": "09:00", "end_time": "13:00"}])
+    new_shift = {"employee_id": "e2", "day": "mon", "start_time": "09:00", "end_time": "13:00"}
+    diff = diff_week(rows, [new_shift])
+    assert diff["added"] == [new_shift]
+    assert [row["id"] for row in diff["removed"]] == [1]
+    assert diff["moved"] == []
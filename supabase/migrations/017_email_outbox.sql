@@ -0,0 +1,36 @@
+-- Email Outbox
+-- Durable queue for outbound email; request handlers enqueue, backend workers send
+
+create table if not exists email_outbox (
+  id bigint generated always as identity primary key,
+  business_id uuid references businesses(id) on delete cascade not null,
+  to_email text not null,
+  kind text not null,
+  payload jsonb not null default '{}'::jsonb,
+  status text check (
+    status in ('pending','sending','sent','dead')
+  ) not null default 'pending',
+  attempts int not null default 0,
+  max_attempts int not null default 5,
+  next_attempt_at timestamptz not null default now(),
+  locked_at timestamptz,
+  last_error text,
+  sent_at timestamptz,
+  created_at timestamptz default now()
+);
+
+-- Enable RLS on email_outbox
+alter table email_outbox enable row level security;
+
+-- Businesses can see the delivery status of their own mail
+create policy "Users can view their business outbox"
+  on email_outbox for select
+  using (business_id::text = (auth.jwt() -> 'user_metadata' ->> 'business_id'));
+
+-- Workers poll for due pending rows
+create index if not exists idx_email_outbox_due
+  on email_outbox(next_attempt_at)
+  where status = 'pending';
+
+create index if not exists idx_email_outbox_business_status
+  on email_outbox(business_id, status, created_at desc);
@@ -0,0 +1,19 @@
+-- Low Stock Sweep
+-- Lets the nightly sweep push "current_quantity < minimum_quantity" into SQL
+-- (PostgREST filters can't compare two columns) and page through it by (business_id, id)
+
+create or replace view low_stock_inventory
+with (security_invoker = true) as
+  select id, business_id, name, current_quantity, minimum_quantity, unit
+  from inventory_items
+  where current_quantity < minimum_quantity;
+
+-- Partial index: only low rows, already in sweep order
+create index if not exists idx_inventory_items_low_stock
+  on inventory_items(business_id, id)
+  where current_quantity < minimum_quantity;
+
+-- Recipient lookup for the sweep (admins of a batch of businesses)
+create index if not exists idx_profiles_business_admin
+  on profiles(business_id)
+  where is_admin = true;
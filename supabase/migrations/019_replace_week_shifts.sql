@@ -0,0 +1,75 @@
+-- Atomic Week Replacement
+-- Swaps a week's shifts in one transaction (no empty-schedule gap for readers) and
+-- versions each (business, week) so writers can detect concurrent edits
+
+create table if not exists schedule_weeks (
+  business_id uuid references businesses(id) on delete cascade not null,
+  week_start date not null,
+  version int not null default 0,
+  updated_at timestamptz default now(),
+  primary key (business_id, week_start)
+);
+
+-- Enable RLS on schedule_weeks
+alter table schedule_weeks enable row level security;
+
+create policy "Users can view their business schedule weeks"
+  on schedule_weeks for select
+  using (business_id::text = (auth.jwt() -> 'user_metadata' ->> 'business_id'));
+
+-- Week reads and the delete below filter on (business_id, week_start)
+create index if not exists idx_shifts_business_week
+  on shifts(business_id, week_start);
+
+-- p_shifts: [{"day_of_week", "employee_id", "start_time", "end_time"}]
+-- p_expected_version: null skips the check; otherwise raises PT409 (HTTP 409) if the week moved on
+create or replace function replace_week_shifts(
+  p_business_id uuid,
+  p_week_start date,
+  p_shifts jsonb,
+  p_expected_version int default null
+) returns jsonb
+language plpgsql
+set search_path = public
+as $$
+declare
+  v_version int;
+  v_deleted int;
+  v_inserted int;
+begin
+  insert into schedule_weeks (business_id, week_start)
+  values (p_business_id, p_week_start)
+  on conflict (business_id, week_start) do nothing;
+
+  -- Row lock serializes writers of the same week
+  select version into v_version
+  from schedule_weeks
+  where business_id = p_business_id and week_start = p_week_start
+  for update;
+
+  if p_expected_version is not null and v_version <> p_expected_version then
+    raise exception 'schedule version conflict: expected %, found %', p_expected_version, v_version
+      using errcode = 'PT409';
+  end if;
+
+  delete from shifts
+  where business_id = p_business_id and week_start = p_week_start;
+  get diagnostics v_deleted = row_count;
+
+  insert into shifts (business_id, week_start, day_of_week, employee_id, start_time, end_time)
+  select p_business_id, p_week_start, s.day_of_week, s.employee_id, s.start_time, s.end_time
+  from jsonb_to_recordset(coalesce(p_shifts, '[]'::jsonb))
+    as s(day_of_week text, employee_id uuid, start_time text, end_time text);
+  get diagnostics v_inserted = row_count;
+
+  update schedule_weeks
+  set version = v_version + 1, updated_at = now()
+  where business_id = p_business_id and week_start = p_week_start;
+
+  return jsonb_build_object('version', v_version + 1, 'deleted', v_deleted, 'inserted', v_inserted);
+end;
+$$;
+
+-- Takes business_id as a parameter, so only the backend (service role) may call it
+revoke execute on function replace_week_shifts(uuid, date, jsonb, int) from public, anon, authenticated;
+grant execute on function replace_week_shifts(uuid, date, jsonb, int) to service_role;
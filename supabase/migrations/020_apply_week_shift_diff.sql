@@ -0,0 +1,96 @@
+-- Diff-Based Week Writes
+-- Applies only the changed rows of a week (delete / update / insert batches) in one
+-- transaction, so unchanged shifts keep their ids; shares the version check of 019
+
+-- Creates the week row if needed, locks it and checks the expected version (PT409 = HTTP 409)
+create or replace function lock_schedule_week(
+  p_business_id uuid,
+  p_week_start date,
+  p_expected_version int default null
+) returns int
+language plpgsql
+set search_path = public
+as $$
+declare
+  v_version int;
+begin
+  insert into schedule_weeks (business_id, week_start)
+  values (p_business_id, p_week_start)
+  on conflict (business_id, week_start) do nothing;
+
+  select version into v_version
+  from schedule_weeks
+  where business_id = p_business_id and week_start = p_week_start
+  for update;
+
+  if p_expected_version is not null and v_version <> p_expected_version then
+    raise exception 'schedule version conflict: expected %, found %', p_expected_version, v_version
+      using errcode = 'PT409';
+  end if;
+
+  return v_version;
+end;
+$$;
+
+-- p_updates / p_inserts: [{"id" (updates only), "day_of_week", "employee_id", "start_time", "end_time"}]
+create or replace function apply_week_shift_diff(
+  p_business_id uuid,
+  p_week_start date,
+  p_delete_ids bigint[],
+  p_updates jsonb,
+  p_inserts jsonb,
+  p_expected_version int default null
+) returns jsonb
+language plpgsql
+set search_path = public
+as $$
+declare
+  v_version int;
+  v_deleted int;
+  v_updated int;
+  v_inserted int;
+begin
+  v_version := lock_schedule_week(p_business_id, p_week_start, p_expected_version);
+
+  delete from shifts
+  where business_id = p_business_id
+    and week_start = p_week_start
+    and id = any(coalesce(p_delete_ids, '{}'::bigint[]));
+  get diagnostics v_deleted = row_count;
+
+  update shifts s
+  set day_of_week = u.day_of_week,
+      employee_id = u.employee_id,
+      start_time = u.start_time,
+      end_time = u.end_time
+  from jsonb_to_recordset(coalesce(p_updates, '[]'::jsonb))
+    as u(id bigint, day_of_week text, employee_id uuid, start_time text, end_time text)
+  where s.id = u.id
+    and s.business_id = p_business_id
+    and s.week_start = p_week_start;
+  get diagnostics v_updated = row_count;
+
+  insert into shifts (business_id, week_start, day_of_week, employee_id, start_time, end_time)
+  select p_business_id, p_week_start, i.day_of_week, i.employee_id, i.start_time, i.end_time
+  from jsonb_to_recordset(coalesce(p_inserts, '[]'::jsonb))
+    as i(day_of_week text, employee_id uuid, start_time text, end_time text);
+  get diagnostics v_inserted = row_count;
+
+  update schedule_weeks
+  set version = v_version + 1, updated_at = now()
+  where business_id = p_business_id and week_start = p_week_start;
+
+  return jsonb_build_object(
+    'version', v_version + 1,
+    'deleted', v_deleted,
+    'updated', v_updated,
+    'inserted', v_inserted
+  );
+end;
+$$;
+
+-- Take business_id as a parameter, so only the backend (service role) may call them
+revoke execute on function lock_schedule_week(uuid, date, int) from public, anon, authenticated;
+grant execute on function lock_schedule_week(uuid, date, int) to service_role;
+revoke execute on function apply_week_shift_diff(uuid, date, bigint[], jsonb, jsonb, int) from public, anon, authenticated;
+grant execute on function apply_week_shift_diff(uuid, date, bigint[], jsonb, jsonb, int) to service_role;
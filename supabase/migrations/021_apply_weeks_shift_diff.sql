@@ -0,0 +1,44 @@
+-- Multi-Week Diff Writes
+-- Applies the changes of several weeks (batch schedule generation) in one transaction:
+-- either every week is written or none is
+
+-- p_weeks: [{"week_start", "delete_ids", "updates", "inserts", "expected_version"}],
+-- the batches as for apply_week_shift_diff (020). Weeks are locked in date order so two
+-- overlapping batches cannot deadlock.
+create or replace function apply_weeks_shift_diff(
+  p_business_id uuid,
+  p_weeks jsonb
+) returns jsonb
+language plpgsql
+set search_path = public
+as $$
+declare
+  v_week jsonb;
+  v_result jsonb;
+  v_results jsonb := '[]'::jsonb;
+begin
+  for v_week in
+    select value
+    from jsonb_array_elements(coalesce(p_weeks, '[]'::jsonb))
+    order by (value->>'week_start')::date
+  loop
+    v_result := apply_week_shift_diff(
+      p_business_id,
+      (v_week->>'week_start')::date,
+      array(select jsonb_array_elements_text(coalesce(v_week->'delete_ids', '[]'::jsonb))::bigint),
+      v_week->'updates',
+      v_week->'inserts',
+      (v_week->>'expected_version')::int
+    );
+    v_results := v_results || jsonb_build_array(
+      v_result || jsonb_build_object('week_start', v_week->>'week_start')
+    );
+  end loop;
+
+  return v_results;
+end;
+$$;
+
+-- Takes business_id as a parameter, so only the backend (service role) may call it
+revoke execute on function apply_weeks_shift_diff(uuid, jsonb) from public, anon, authenticated;
+grant execute on function apply_weeks_shift_diff(uuid, jsonb) to service_role;
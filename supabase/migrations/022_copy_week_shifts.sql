@@ -0,0 +1,50 @@
+-- Week Roll-Forward
+-- Copies one week's shifts onto another with a single INSERT ... SELECT, replacing what the
+-- target week had, under the version lock of 020
+
+-- Raises PT404 (HTTP 404) if the source week has no shifts, PT409 on a version mismatch
+create or replace function copy_week_shifts(
+  p_business_id uuid,
+  p_from_week date,
+  p_to_week date,
+  p_expected_version int default null
+) returns jsonb
+language plpgsql
+set search_path = public
+as $$
+declare
+  v_version int;
+  v_deleted int;
+  v_inserted int;
+begin
+  if not exists (
+    select 1 from shifts
+    where business_id = p_business_id and week_start = p_from_week
+  ) then
+    raise exception 'no shifts found for week %', p_from_week
+      using errcode = 'PT404';
+  end if;
+
+  v_version := lock_schedule_week(p_business_id, p_to_week, p_expected_version);
+
+  delete from shifts
+  where business_id = p_business_id and week_start = p_to_week;
+  get diagnostics v_deleted = row_count;
+
+  insert into shifts (business_id, week_start, day_of_week, employee_id, start_time, end_time)
+  select business_id, p_to_week, day_of_week, employee_id, start_time, end_time
+  from shifts
+  where business_id = p_business_id and week_start = p_from_week;
+  get diagnostics v_inserted = row_count;
+
+  update schedule_weeks
+  set version = v_version + 1, updated_at = now()
+  where business_id = p_business_id and week_start = p_to_week;
+
+  return jsonb_build_object('version', v_version + 1, 'deleted', v_deleted, 'inserted', v_inserted);
+end;
+$$;
+
+-- Takes business_id as a parameter, so only the backend (service role) may call it
+revoke execute on function copy_week_shifts(uuid, date, date, int) from public, anon, authenticated;
+grant execute on function copy_week_shifts(uuid, date, date, int) to service_role;
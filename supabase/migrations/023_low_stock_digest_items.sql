@@ -0,0 +1,71 @@
+-- Durable Low Stock Digests
+-- Items waiting for a business's debounced low stock digest live here instead of in
+-- process memory, so a restart keeps them and every app process sees the same digest
+
+create table if not exists low_stock_digest_items (
+  business_id uuid references businesses(id) on delete cascade not null,
+  item_id bigint references inventory_items(id) on delete cascade not null,
+  to_email text not null,
+  business_name text,
+  logo_url text,
+  -- {"name", "current_quantity", "minimum_quantity", "unit"} as shown in the email
+  item jsonb not null,
+  created_at timestamptz not null default now(),
+  primary key (business_id, item_id, to_email)
+);
+
+-- Enable RLS on low_stock_digest_items (backend only, via the service role)
+alter table low_stock_digest_items enable row level security;
+
+-- Moves every digest whose window has closed (first item older than p_window_seconds)
+-- into email_outbox - one low_stock_alert per recipient - and deletes its items, in one
+-- transaction. Concurrent callers never claim the same items. Returns emails queued.
+create or replace function flush_low_stock_digests(
+  p_window_seconds int,
+  p_max_attempts int default 5,
+  p_force boolean default false
+) returns int
+language plpgsql
+set search_path = public
+as $$
+declare
+  v_queued int;
+begin
+  with due as (
+    select business_id
+    from low_stock_digest_items
+    group by business_id
+    having p_force or min(created_at) <= now() - make_interval(secs => p_window_seconds)
+  ), claimed as (
+    delete from low_stock_digest_items d
+    using due
+    where d.business_id = due.business_id
+    returning d.*
+  ), items as (
+    select distinct on (business_id, item_id) business_id, item_id, item, business_name, logo_url
+    from claimed
+    order by business_id, item_id, created_at desc
+  ), digests as (
+    select business_id,
+           max(business_name) as business_name,
+           max(logo_url) as logo_url,
+           jsonb_agg(item order by item->>'name') as items
+    from items
+    group by business_id
+  ), recipients as (
+    select distinct business_id, to_email from claimed
+  )
+  insert into email_outbox (business_id, to_email, kind, payload, status, max_attempts, next_attempt_at)
+  select r.business_id, r.to_email, 'low_stock_alert',
+         jsonb_build_object('business_name', d.business_name, 'logo_url', d.logo_url, 'items', d.items),
+         'pending', p_max_attempts, now()
+  from recipients r
+  join digests d on d.business_id = r.business_id;
+  get diagnostics v_queued = row_count;
+
+  return v_queued;
+end;
+$$;
+
+revoke execute on function flush_low_stock_digests(int, int, boolean) from public, anon, authenticated;
+grant execute on function flush_low_stock_digests(int, int, boolean) to service_role;
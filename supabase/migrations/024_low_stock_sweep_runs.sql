@@ -0,0 +1,14 @@
+-- Low Stock Sweep Runs
+-- One row per sweep day; every app process runs the nightly timer, and the one whose
+-- insert wins (on conflict do nothing) is the only one that sends digests that day
+
+create table if not exists low_stock_sweep_runs (
+  sweep_date date primary key,
+  claimed_by text,
+  started_at timestamptz not null default now(),
+  finished_at timestamptz,
+  stats jsonb
+);
+
+-- Enable RLS on low_stock_sweep_runs (backend only, via the service role)
+alter table low_stock_sweep_runs enable row level security;